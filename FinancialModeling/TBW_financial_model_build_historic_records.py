@@ -9,10 +9,72 @@ simulation model
 @author: dgorelic
 """
 
-def build_HistoricalMonthlyWaterDeliveriesAndSalesData(historical_financial_data_path = 'C:/Users/dgorelic/OneDrive - University of North Carolina at Chapel Hill/UNC/Research/TBW/Data/financials'):
+# corrections of records missing from the source workbooks, applied over the
+# values read from them in every build (full or incremental); increase the
+# version when they change, the version applied is kept in the build manifest
+HISTORIC_RECORD_OVERRIDES_VERSION = 1
+
+# (fiscal year, month of fiscal year from 0 = Oct) -> monthly deliveries by
+# member and uniform sales total, variable sales by member are the deliveries
+# times the variable uniform rate of the fiscal year (see spreadsheets for 2015 rate)
+MONTHLY_DELIVERY_OVERRIDES = {(2015,10): [880.93,1432.20,0,1445.67,665.73,89.13,4513.66], # aug 2015
+                              (2015,11): [842.7,1316.33,0,1508.09,680.08,89.82,4437.02]} # sept 2015
+MONTHLY_OVERRIDE_VARIABLE_UNIFORM_RATE = {2015: 0.439}
+
+
+def read_MonthlyWaterSalesForYear(year, workbook):
+    # monthly deliveries (with dates), fixed sales by member and variable sales
+    # by member plus TBC delivery and sales of one Water Sales Revenue workbook
+    import numpy as np
+    from excel_ingestion import read_ExcelSheet
+    if workbook is None:
+        raise FileNotFoundError('No Water Sales Revenue workbook found for ' + str(year))
+    
+    deliveries = read_ExcelSheet(workbook, skiprows = 3).iloc[1:13,0:8].values
+    
+    # as well as TBC sales for tampa
+    tabs = ['StPete','Pin','Tpa','Hills','Pas','NPR']
+    fixed = np.full((12, len(tabs)), np.nan)
+    variable = np.full((12, len(tabs)+2), np.nan)
+    for p, poc in enumerate(tabs):
+        sales_data = read_ExcelSheet(workbook, sheet_name = poc, skiprows = 3)
+        
+        # extract specific columns
+        if year < 2013:
+            variable[:,p] = [x for x in sales_data.iloc[17,3:15]] # variable rate monthly charges
+            fixed[:,p] = [x for x in sales_data.iloc[22,3:15]] # fixed rate monthly charges 
+        else:
+            variable[:,p] = [x for x in sales_data.iloc[19,3:15]] # variable rate monthly charges
+            fixed[:,p] = [x for x in sales_data.iloc[24,3:15]] # fixed rate monthly charges 
+        
+        if poc == 'Tpa': # grab TBC monthly use and charge
+            # 2010-2012, rows 30 and 31 are mg use and charge
+            if year < 2013:
+                variable[:,6] = [x for x in sales_data.iloc[30,3:15]] # tbc delivery and sales
+                variable[:,7] = [x for x in sales_data.iloc[31,3:15]]    
+            # 2013, rows 32 and 33
+            elif year < 2014:
+                variable[:,6] = [x for x in sales_data.iloc[32,3:15]] # tbc delivery and sales
+                variable[:,7] = [x for x in sales_data.iloc[33,3:15]] 
+            # 2014-2015 has nothing
+            # 2016-2019, 28-29
+            elif year >= 2016 and year < 2020:
+                variable[:,6] = [x for x in sales_data.iloc[28,3:15]] # tbc delivery and sales
+                variable[:,7] = [x for x in sales_data.iloc[29,3:15]] 
+    
+    return deliveries, fixed, variable
+
+
+def build_HistoricalMonthlyWaterDeliveriesAndSalesData(historical_financial_data_path = 'C:/Users/dgorelic/OneDrive - University of North Carolina at Chapel Hill/UNC/Research/TBW/Data/financials',
+                                                       years = range(2010,2020), cache_path = None):
     # also need separate tracked data for water deliveries (to calculate sales revenue) to each member for true-up - WaterSalesByMember_cleaned
     #   (can I get this by month?)
+    # with a cache_path, only years whose workbook changed since the last build
+    # are read again (see historic_record_updates), they are listed in
+    # all_monthly_data.attrs['updated_fiscal_years']
     import os; import pandas as pd; import numpy as np
+    from excel_ingestion import find_WaterSalesRevenueWorkbooks
+    from historic_record_updates import get_CachedYearBlock
     os.chdir(historical_financial_data_path)
     convert_kgal_to_MG = 1000
     
@@ -25,33 +87,6 @@ def build_HistoricalMonthlyWaterDeliveriesAndSalesData(historical_financial_data
                          'Water Delivery - City of New Port Richey', 
                          'Water Delivery - Uniform Sales Total']
     
-    # read in Water sales revenue tables to get monthly deliveries
-    monthly_water_sales_by_member = pd.DataFrame(np.array(MonthlyWaterSales)).transpose()
-    for year in range(2010,2020):
-        if os.path.exists('Water Sales Revenue ' + str(year) + '-WS.xlsx'):
-            sales_data = pd.read_excel('Water Sales Revenue ' + str(year) + '-WS.xlsx', 
-                                       skiprows = 3)
-            monthly_water_sales_by_member = pd.DataFrame(np.vstack((monthly_water_sales_by_member, sales_data.iloc[1:13,0:8])))
-        elif os.path.exists('Water Sales Revenue ' + str(year) + ' WS.xlsx'):
-            sales_data = pd.read_excel('Water Sales Revenue ' + str(year) + ' WS.xlsx', 
-                                       skiprows = 3)
-            monthly_water_sales_by_member = pd.DataFrame(np.vstack((monthly_water_sales_by_member, sales_data.iloc[1:13,0:8])))
-        elif os.path.exists('Water Sales Revenue ' + str(year) + ' WS.xls'):
-            sales_data = pd.read_excel('Water Sales Revenue ' + str(year) + ' WS.xls', 
-                                       skiprows = 3)
-            monthly_water_sales_by_member = pd.DataFrame(np.vstack((monthly_water_sales_by_member, sales_data.iloc[1:13,0:8])))
-        elif os.path.exists('Water Sales Revenue ' + str(year) + ' WS-FINAL.xls'):
-            sales_data = pd.read_excel('Water Sales Revenue ' + str(year) + ' WS-FINAL.xls', 
-                                       skiprows = 3)
-            monthly_water_sales_by_member = pd.DataFrame(np.vstack((monthly_water_sales_by_member, sales_data.iloc[1:13,0:8])))
-            
-    # clean and fill in missing data in 2015
-    monthly_water_sales_by_member.columns = MonthlyWaterSales
-    monthly_water_sales_by_member = monthly_water_sales_by_member.iloc[1:,:]
-    monthly_water_sales_by_member.iloc[70,1:] = [880.93,1432.20,0,1445.67,665.73,89.13,4513.66] # aug 2015
-    monthly_water_sales_by_member.iloc[71,1:] = [842.7,1316.33,0,1508.09,680.08,89.82,4437.02]# sept 2015
-    monthly_water_sales_by_member = monthly_water_sales_by_member.replace(np.nan,0)
-    
     # use same spreadsheets to collect monthly billing for fixed and variable uniform sales
     MonthlyWaterSalesFixed = ['Fixed Water Sales - City of St. Petersburg',
                               'Fixed Water Sales - Pinellas County', 
@@ -68,60 +103,33 @@ def build_HistoricalMonthlyWaterDeliveriesAndSalesData(historical_financial_data
                                  'TBC Delivery - City of Tampa', 
                                  'TBC Sales - City of Tampa']
     
-    # as well as TBC sales for tampa
-    tabs = ['StPete','Pin','Tpa','Hills','Pas','NPR']; p = 0
-    monthly_water_sales_by_member_variable = pd.DataFrame(np.empty(shape = (120,len(MonthlyWaterSalesVariable))))
-    monthly_water_sales_by_member_variable[:] = np.nan
-    monthly_water_sales_by_member_fixed = pd.DataFrame(np.empty(shape = (120,len(MonthlyWaterSales[1:-1]))))
-    monthly_water_sales_by_member_fixed[:] = np.nan
-    monthly_water_sales_by_member_fixed.columns = MonthlyWaterSalesFixed
-    monthly_water_sales_by_member_variable.columns = MonthlyWaterSalesVariable
-    for poc in tabs:
-        for year in range(2010,2020):
-            # read file
-            if os.path.exists('Water Sales Revenue ' + str(year) + '-WS.xlsx'):
-                sales_data = pd.read_excel('Water Sales Revenue ' + str(year) + '-WS.xlsx', 
-                                           sheet_name = poc, skiprows = 3)
-            elif os.path.exists('Water Sales Revenue ' + str(year) + ' WS.xlsx'):
-                sales_data = pd.read_excel('Water Sales Revenue ' + str(year) + ' WS.xlsx', sheet_name = poc,
-                                           skiprows = 3)
-            elif os.path.exists('Water Sales Revenue ' + str(year) + ' WS.xls'):
-                sales_data = pd.read_excel('Water Sales Revenue ' + str(year) + ' WS.xls', sheet_name = poc,
-                                           skiprows = 3)
-            elif os.path.exists('Water Sales Revenue ' + str(year) + ' WS-FINAL.xls'):
-                sales_data = pd.read_excel('Water Sales Revenue ' + str(year) + ' WS-FINAL.xls', sheet_name = poc,
-                                           skiprows = 3)
-              
-            # extract specific columns
-            if year < 2013:
-                monthly_water_sales_by_member_variable.iloc[range(0+12*(year-2010),12+12*(year-2010)),p] = [x for x in sales_data.iloc[17,3:15]] # variable rate monthly charges
-                monthly_water_sales_by_member_fixed.iloc[range(0+12*(year-2010),12+12*(year-2010)),p] = [x for x in sales_data.iloc[22,3:15]] # fixed rate monthly charges 
-            else:
-                monthly_water_sales_by_member_variable.iloc[range(0+12*(year-2010),12+12*(year-2010)),p] = [x for x in sales_data.iloc[19,3:15]] # variable rate monthly charges
-                monthly_water_sales_by_member_fixed.iloc[range(0+12*(year-2010),12+12*(year-2010)),p] = [x for x in sales_data.iloc[24,3:15]] # fixed rate monthly charges 
-    
-            if poc == 'Tpa': # grab TBC monthly use and charge
-                # 2010-2012, rows 30 and 31 are mg use and charge
-                if year < 2013:
-                    monthly_water_sales_by_member_variable.iloc[range(0+12*(year-2010),12+12*(year-2010)),6] = [x for x in sales_data.iloc[30,3:15]] # tbc delivery and sales
-                    monthly_water_sales_by_member_variable.iloc[range(0+12*(year-2010),12+12*(year-2010)),7] = [x for x in sales_data.iloc[31,3:15]]    
-                # 2013, rows 32 and 33
-                elif year < 2014:
-                    monthly_water_sales_by_member_variable.iloc[range(0+12*(year-2010),12+12*(year-2010)),6] = [x for x in sales_data.iloc[32,3:15]] # tbc delivery and sales
-                    monthly_water_sales_by_member_variable.iloc[range(0+12*(year-2010),12+12*(year-2010)),7] = [x for x in sales_data.iloc[33,3:15]] 
-                # 2014-2015 has nothing
-                elif year < 2016:
-                    print('')
-                # 2016-2019, 28-29
-                elif year < 2020:
-                    monthly_water_sales_by_member_variable.iloc[range(0+12*(year-2010),12+12*(year-2010)),6] = [x for x in sales_data.iloc[28,3:15]] # tbc delivery and sales
-                    monthly_water_sales_by_member_variable.iloc[range(0+12*(year-2010),12+12*(year-2010)),7] = [x for x in sales_data.iloc[29,3:15]] 
-    
-        p += 1
-       
-    # fill in missing variable rate data
-    monthly_water_sales_by_member_variable.iloc[70,:-2] = [x*0.439*convert_kgal_to_MG for x in [880.93,1432.20,0,1445.67,665.73,89.13]] # aug 2015, multiply use by variable uniform rate (see spreadsheets for 2015 rate)
-    monthly_water_sales_by_member_variable.iloc[71,:-2] = [x*0.439*convert_kgal_to_MG for x in [842.7,1316.33,0,1508.09,680.08,89.82]] # sept 2015
+    # read in Water sales revenue tables to get monthly deliveries and sales,
+    # each workbook is read once for all tabs (see excel_ingestion)
+    water_sales_workbooks = find_WaterSalesRevenueWorkbooks(years)
+    blocks = []; updated_years = []
+    for year in years:
+        if cache_path is None:
+            block = read_MonthlyWaterSalesForYear(year, water_sales_workbooks[year]); updated = True
+        else:
+            block, updated = get_CachedYearBlock(cache_path, 'monthly_water_sales', year, [water_sales_workbooks[year]],
+                                                 read_MonthlyWaterSalesForYear, year, water_sales_workbooks[year])
+        blocks.append(block)
+        if updated:
+            updated_years.append(year)
+    
+    monthly_water_sales_by_member = pd.DataFrame(np.vstack([np.array(MonthlyWaterSales)] + [b[0] for b in blocks]))
+    monthly_water_sales_by_member.columns = MonthlyWaterSales
+    monthly_water_sales_by_member = monthly_water_sales_by_member.iloc[1:,:]
+    monthly_water_sales_by_member_fixed = pd.DataFrame(np.vstack([b[1] for b in blocks]), columns = MonthlyWaterSalesFixed)
+    monthly_water_sales_by_member_variable = pd.DataFrame(np.vstack([b[2] for b in blocks]), columns = MonthlyWaterSalesVariable)
+    
+    # clean and fill in missing data in 2015
+    for (year, month), deliveries in MONTHLY_DELIVERY_OVERRIDES.items():
+        if year in years:
+            row = 12*(year-years[0]) + month
+            monthly_water_sales_by_member.iloc[row,1:] = deliveries
+            monthly_water_sales_by_member_variable.iloc[row,:-2] = [x*MONTHLY_OVERRIDE_VARIABLE_UNIFORM_RATE[year]*convert_kgal_to_MG for x in deliveries[:-1]]
+    monthly_water_sales_by_member = monthly_water_sales_by_member.replace(np.nan,0)
     monthly_water_sales_by_member_variable = monthly_water_sales_by_member_variable.replace(np.nan,0)
     
     # export for record/convenience
@@ -129,13 +137,34 @@ def build_HistoricalMonthlyWaterDeliveriesAndSalesData(historical_financial_data
                                                monthly_water_sales_by_member_fixed, 
                                                monthly_water_sales_by_member_variable)))
     all_monthly_data.columns = MonthlyWaterSales + MonthlyWaterSalesFixed + MonthlyWaterSalesVariable
+    all_monthly_data.attrs['updated_fiscal_years'] = updated_years
     # all_monthly_data.to_csv('historical_monthly_water_deliveries_and_sales_by_member.csv')
     
     return all_monthly_data
 
 
+def read_AnnualRatesForYear(year, workbook, operating_results_workbook):
+    # cells of the Tpa sheet of the year's Water Sales Revenue workbook (TBC
+    # rate and variable uniform rate) and the year's column of the historical
+    # operating results table, None where the year has none
+    from excel_ingestion import read_ExcelSheet
+    tpa_cells = None
+    if workbook is not None:
+        variable_rate_data = read_ExcelSheet(workbook, skiprows = 0, sheet_name = 'Tpa')
+        tpa_cells = {'tbc_rate' : variable_rate_data.iloc[4,3], 'variable_rate' : variable_rate_data.iloc[6,3]}
+    
+    hist_oper_data = read_ExcelSheet(operating_results_workbook, skiprows = 2, usecols = (0,1,2,3,4,5))
+    
+    # replace empty '-' cells with 0. Doesn't seem to remove negative signs from filled cells (good)    
+    hist_oper_data = hist_oper_data.replace('-',0)  
+    operating_results = hist_oper_data[year].tolist() if year in hist_oper_data.columns else None
+    
+    return tpa_cells, operating_results
+
+
 def build_HistoricalAnnualData(n_fiscal_years = 12, most_recent_year = 2022,
-        historical_financial_data_path = 'C:/Users/dgorelic/OneDrive - University of North Carolina at Chapel Hill/UNC/Research/TBW/Data/financials'):
+        historical_financial_data_path = 'C:/Users/dgorelic/OneDrive - University of North Carolina at Chapel Hill/UNC/Research/TBW/Data/financials',
+        cache_path = None):
     # names of financial streams/categories to track
     # that are NOT included already in historical_monthly_water_deliveries_and_sales_by_member.csv
     # other notes: 
@@ -183,48 +212,55 @@ def build_HistoricalAnnualData(n_fiscal_years = 12, most_recent_year = 2022,
     
     # full and variable uniform rates of FY2010-2019, and TBC sales rate
     # manually pulled from reports and Water Sales Revenue
+    # with a cache_path, only years whose workbook or operating results table
+    # changed since the last build are read again (see historic_record_updates)
+    from excel_ingestion import find_WaterSalesRevenueWorkbooks, read_ExcelSheet
+    from historic_record_updates import get_CachedYearBlock
     import os; os.chdir(historical_financial_data_path)
+    water_sales_workbooks = find_WaterSalesRevenueWorkbooks(range(most_recent_year-n_fiscal_years,most_recent_year))
     variable_rate = []; full_rate = []; tbc_rate = []; debt_service = []
     fund_balance = [];
-    gross_revenue = []; 
+    gross_revenue = []; updated_years = []
     for year in range(most_recent_year-n_fiscal_years,most_recent_year):
-        if os.path.exists('Water Sales Revenue ' + str(year) + '-WS.xlsx'):
-            variable_rate_data = pd.read_excel('Water Sales Revenue ' + str(year) + '-WS.xlsx', skiprows = 0, sheet_name = 'Tpa')
-        elif os.path.exists('Water Sales Revenue ' + str(year) + ' WS.xlsx'):
-            variable_rate_data = pd.read_excel('Water Sales Revenue ' + str(year) + ' WS.xlsx', skiprows = 0, sheet_name = 'Tpa')
-        elif os.path.exists('Water Sales Revenue ' + str(year) + ' WS.xls'):
-            variable_rate_data = pd.read_excel('Water Sales Revenue ' + str(year) + ' WS.xls', skiprows = 0, sheet_name = 'Tpa')
-        elif os.path.exists('Water Sales Revenue ' + str(year) + ' WS-FINAL.xls'):
-            variable_rate_data = pd.read_excel('Water Sales Revenue ' + str(year) + ' WS-FINAL.xls', skiprows = 0, sheet_name = 'Tpa')
-          
         if year > 2015:
-            hist_oper_data = pd.read_excel('Table 12 - Historical Operating Results by Fiscal Year - 2019-DONE.xlsx', skiprows = 2, usecols = (0,1,2,3,4,5))
+            operating_results_workbook = 'Table 12 - Historical Operating Results by Fiscal Year - 2019-DONE.xlsx'
         else:
-            hist_oper_data = pd.read_excel('Table 11 - Historical Operating Results by Fiscal Year 2015-2011.xlsx', skiprows = 2, usecols = (0,1,2,3,4,5))
-          
-        # replace empty '-' cells with 0. Doesn't seem to remove negative signs from filled cells (good)    
-        hist_oper_data = hist_oper_data.replace('-',0)  
+            operating_results_workbook = 'Table 11 - Historical Operating Results by Fiscal Year 2015-2011.xlsx'
+        
+        if cache_path is None:
+            year_cells = read_AnnualRatesForYear(year, water_sales_workbooks[year], operating_results_workbook); updated = True
+        else:
+            year_cells, updated = get_CachedYearBlock(cache_path, 'annual_rates', year,
+                                                      [water_sales_workbooks[year], operating_results_workbook],
+                                                      read_AnnualRatesForYear, year, water_sales_workbooks[year], operating_results_workbook)
+        if updated:
+            updated_years.append(year)
+        
+        # years without a workbook keep the rates of the previous one
+        if year_cells[0] is not None:
+            tpa_cells = year_cells[0]
+        operating_results = year_cells[1]
             
         if year == 2020:
             variable_rate.append(0.4028)
         else:
-            variable_rate.append(variable_rate_data.iloc[6,3])
+            variable_rate.append(tpa_cells['variable_rate'])
         
         # value not always given explicitly, seems to be $0.157/kgal every year UNTIL FY20
-        if np.isnan(variable_rate_data.iloc[4,3]):
+        if np.isnan(tpa_cells['tbc_rate']):
             tbc_rate.append(0.157)
         elif year > 2019:
             tbc_rate.append(0.195)
         else:
-            tbc_rate.append(variable_rate_data.iloc[4,3])
+            tbc_rate.append(tpa_cells['tbc_rate'])
         
         # missing 2010 from data, will manually fill
         if year < 2011:
             full_rate.append(2.3980) # from 2019 CAFR, p.124
             fund_balance.append(np.nan)
         elif year < 2016:
-            full_rate.append(hist_oper_data[year].iloc[3])
-            fund_balance.append(hist_oper_data[year].iloc[37])
+            full_rate.append(operating_results[3])
+            fund_balance.append(operating_results[37])
         elif year == 2020:
             full_rate.append(2.559)
             fund_balance.append(29314554) # FROM FY21 APPROVED OPERATING BUDGET, P.26 TABLE
@@ -235,8 +271,8 @@ def build_HistoricalAnnualData(n_fiscal_years = 12, most_recent_year = 2022,
             full_rate.append(2.5634)
             fund_balance.append(30152968)
         else:
-            full_rate.append(hist_oper_data[year].iloc[3])
-            fund_balance.append(hist_oper_data[year].iloc[38])
+            full_rate.append(operating_results[3])
+            fund_balance.append(operating_results[38])
         
         
     acquisition_credits = [10231557, 10231557, 10231557, 10231557, 10231557, 
@@ -245,7 +281,7 @@ def build_HistoricalAnnualData(n_fiscal_years = 12, most_recent_year = 2022,
         
     # read in Operating Expenses (table 5) over time
     # NOTE: each row is different FY, row 0 is FY19, goes to FY10 in row 9
-    OperatingExpenses = pd.read_excel('Table 5 Operating Department -Program Expenses - 2019-DONE.xlsx', 
+    OperatingExpenses = read_ExcelSheet('Table 5 Operating Department -Program Expenses - 2019-DONE.xlsx', 
                                       skiprows = 3, nrows = 10, 
                                       usecols = (0,1,2,3,4,5,6,7,8,9,10,11,12,13,14,15,16))
     OperatingExpenses = OperatingExpenses.replace('-',0)
@@ -257,7 +293,7 @@ def build_HistoricalAnnualData(n_fiscal_years = 12, most_recent_year = 2022,
     
     # read in Restricted Assets (table 2) over time
     # NOTE: each row is different FY, row 0 is FY19, goes to FY10 in row 9
-    RestrictedAssets = pd.read_excel('Table 2 Restricted Assets - 2019-DONE.xlsx', 
+    RestrictedAssets = read_ExcelSheet('Table 2 Restricted Assets - 2019-DONE.xlsx', 
                                      skiprows = 3, nrows = 10, 
                                      usecols = (0,1,2,3,4,5,6,7,8,9,10,11,12))
     RestrictedAssets = RestrictedAssets.replace('-',0)
@@ -269,7 +305,7 @@ def build_HistoricalAnnualData(n_fiscal_years = 12, most_recent_year = 2022,
     
     # collect reserve fund and rate stabilization fund balances
     # with end-of-FY amounts from FY2010 to FY2019
-    RateStab = pd.read_excel(historical_financial_data_path + '/Rate Stabilization 2019 - FINAL.xls')
+    RateStab = read_ExcelSheet(historical_financial_data_path + '/Rate Stabilization 2019 - FINAL.xls')
 #    FundBalance = pd.read_excel(historical_financial_data_path + '/Utility Rsrv -2019 - FINAL.xlsx')
     
     rate_stab_fund_total = [x for x in RateStab.iloc[[182, 193, 209, 231, 250, 268, 285, 305, 334, 369],19]]
@@ -405,6 +441,7 @@ def build_HistoricalAnnualData(n_fiscal_years = 12, most_recent_year = 2022,
     annual_streams.iloc[:,25] = energy_fund_deposit
     annual_streams.iloc[:,26] = energy_fund_transfer_in
     
+    annual_streams.attrs['updated_fiscal_years'] = updated_years
     return annual_streams
 
 
@@ -810,9 +847,10 @@ def append_UpToJan2021DeliveryAndSalesData(monthly_record,
     # (1) get monthly deliveries by member
     import pandas as pd
     import numpy as np
+    from excel_ingestion import read_ExcelSheet
     # read daily records starting at Oct 2019 -> Dec 2020 (inclusive)
     # dataset has a 'Maytum' column, referring to the Maytum WTP delivery point in New Port Richey
-    additional_daily_water_deliveries = pd.read_excel(daily_delivery_path + '/DeliveryandHarneyAug_up_to_Jan2021.xlsx', 
+    additional_daily_water_deliveries = read_ExcelSheet(daily_delivery_path + '/DeliveryandHarneyAug_up_to_Jan2021.xlsx', 
                                                       skiprows = 3652, sheet_name = 'All Data') 
     additional_daily_water_deliveries.columns = ['Date', 'Total Demand', 'NPR', 'Pinellas', 'St. Pete', 
                                                  'NW Hillsborough', 'SC Hillsborough', 'CoT TBC', 'Pasco', 'CoT']
@@ -936,14 +974,16 @@ def get_ExistingDebt(data_path = 'C:/Users/dgorelic/OneDrive - University of Nor
     # pull bond issue data, simplified to only include necessary info for modeling
     # as model progresses, this table will be adjusted to remove debt paid off
     import pandas as pd
-    debt_data = pd.read_excel(data_path + '/Current_Future_BondIssues.xlsx', sheet_name = 'Existing Debt for Modeling')
+    from excel_ingestion import read_ExcelSheet
+    debt_data = read_ExcelSheet(data_path + '/Current_Future_BondIssues.xlsx', sheet_name = 'Existing Debt for Modeling')
     
     return debt_data
 
 def get_PotentialInfrastructureProjects(data_path = 'C:/Users/dgorelic/OneDrive - University of North Carolina at Chapel Hill/UNC/Research/TBW/Data/financials'):
     # pull potential infrastructure projects to be financed, simplified to only include necessary info for modeling
     import pandas as pd
-    debt_data = pd.read_excel(data_path + '/Current_Future_BondIssues.xlsx', sheet_name = 'Potential Projs for Modeling')
+    from excel_ingestion import read_ExcelSheet
+    debt_data = read_ExcelSheet(data_path + '/Current_Future_BondIssues.xlsx', sheet_name = 'Potential Projs for Modeling')
     
     return debt_data
 
@@ -951,7 +991,8 @@ def get_CIPSchedule(hist_financial_path):
     # read in data from Maribel on CIP projects from FY21-31, clip and reorganize
     #03/2022 update: Christina attempt at adding in the new Financial Model Forecast 10 year multiple sources for FY22-32
     import pandas as pd
-    cip_data = pd.read_excel(hist_financial_path + '/FinancialModelForecast10yrmultiplesourcesTBWFY22.xlsx', sheet_name = 'Sheet1')
+    from excel_ingestion import read_ExcelSheet
+    cip_data = read_ExcelSheet(hist_financial_path + '/FinancialModelForecast10yrmultiplesourcesTBWFY22.xlsx', sheet_name = 'Sheet1')
     cip_data_cleaned = cip_data.iloc[6:,:].drop(columns = cip_data.columns[[0,1,3,4,16]], axis = 1)
     cip_data_cleaned.columns = cip_data.iloc[5,[2,5,6,7,8,9,10,11,12,13,14,15,17,18,19,20,21,22,23]]
     
@@ -960,7 +1001,7 @@ def get_CIPSchedule(hist_financial_path):
     cip_data_cleaned['FY 2022'] = cip_data_cleaned['Remaining FY 2022'] + cip_data_cleaned['Current FY Actual to Date']
     
     #Need to bring in FY21 data from previous financial model forecast10yearmultiplesourcesFY21
-    cip_data_FY21 = pd.read_excel(hist_financial_path + '/FinancialModelForecast10yrmultiplesourcesTBW.xlsx', sheet_name = 'Sheet1')
+    cip_data_FY21 = read_ExcelSheet(hist_financial_path + '/FinancialModelForecast10yrmultiplesourcesTBW.xlsx', sheet_name = 'Sheet1')
     cip_data_FY21_cleaned = cip_data_FY21.iloc[6:,:].drop(columns = cip_data_FY21.columns[[0,1,3,4,16]], axis = 1)
     cip_data_FY21_cleaned.columns = cip_data_FY21.iloc[5,[2,5,6,7,8,9,10,11,12,13,14,15,17,18,19,20,21,22,23]]
     
@@ -985,7 +1026,8 @@ def get_CIPSchedule(hist_financial_path):
 def get_ReserveDepositSchedule(hist_financial_path):
     # read in data from Maribel on planned fund deposits from FY21-31
     import pandas as pd
-    reserve_deposit_data = pd.read_excel(hist_financial_path + '/FinancialModelAvailableBalanceandDeposits10yrmultiplesourcesTBW.xlsx', sheet_name = 'Sheet1')
+    from excel_ingestion import read_ExcelSheet
+    reserve_deposit_data = read_ExcelSheet(hist_financial_path + '/FinancialModelAvailableBalanceandDeposits10yrmultiplesourcesTBW.xlsx', sheet_name = 'Sheet1')
     reserve_data_cleaned = reserve_deposit_data.iloc[9:,:].drop(columns = reserve_deposit_data.columns[[0,1,3,4,5]], axis = 1)
     reserve_data_cleaned.columns = ['Type'] + list(reserve_deposit_data.iloc[8,[6,7,8,9,10,11,12,13,14,15,16,17,18]].values)
     
@@ -1011,9 +1053,17 @@ def get_ReserveDepositSchedule(hist_financial_path):
 #           and passed here
 hist_financial_path = 'C:/Users/cmpet/OneDrive/Documents/UNCTBW'
 
-monthly_water_deliveries_and_sales = build_HistoricalMonthlyWaterDeliveriesAndSalesData(hist_financial_path)
-annual_budget_data = build_HistoricalAnnualData(historical_financial_data_path = hist_financial_path)
+# incremental builds only read fiscal years whose source workbooks changed
+# since the last build and patch the rows that changed in the exported
+# tables; set to False to read every year again and rewrite the tables
+INCREMENTAL_BUILD = True
+fiscal_year_cache_path = hist_financial_path + '/excel_cache/fiscal_years' if INCREMENTAL_BUILD else None
+
+monthly_water_deliveries_and_sales = build_HistoricalMonthlyWaterDeliveriesAndSalesData(hist_financial_path, cache_path = fiscal_year_cache_path)
+annual_budget_data = build_HistoricalAnnualData(historical_financial_data_path = hist_financial_path, cache_path = fiscal_year_cache_path)
 historical_annual_budget_projections = build_HistoricalProjectedAnnualBudgets(hist_financial_path)
+updated_fiscal_years = {'monthly water sales' : monthly_water_deliveries_and_sales.attrs['updated_fiscal_years'],
+                        'annual data' : annual_budget_data.attrs['updated_fiscal_years']}
 
 # step 0b: data for actual budget results goes to end of FY 2019 (Sept 31, 2019)
 #           but OROP/OMS water supply modeling begins "Jan 2021"
@@ -1047,9 +1097,21 @@ projected_reserve_fund_starting_balances, projected_FY_reserve_fund_deposits = g
 # (exporting steps removed from above functions to be done here at end)
 existing_issued_debt.to_csv(model_path + '/existing_debt.csv', index = None)
 potential_projects.to_csv(model_path + '/potential_projects.csv', index = None)
-monthly_water_deliveries_and_sales.to_csv(model_path + '/water_sales_and_deliveries_all_2020.csv', index = None)
-annual_budget_data.to_csv(model_path + '/historical_actuals.csv', index = None)
-historical_annual_budget_projections.to_csv(model_path + '/historical_budgets.csv', index = None)
+if INCREMENTAL_BUILD:
+    # consolidated tables are patched where they changed, the build manifest
+    # records the corrections version and the years and rows updated
+    from historic_record_updates import patch_CSV, write_BuildManifest
+    patched_rows = {}
+    for table, filename in [(monthly_water_deliveries_and_sales, model_path + '/water_sales_and_deliveries_all_2020.csv'),
+                            (annual_budget_data, model_path + '/historical_actuals.csv'),
+                            (historical_annual_budget_projections, model_path + '/historical_budgets.csv')]:
+        patched_rows[filename] = patch_CSV(filename, table)
+        print(filename + ': ' + str(len(patched_rows[filename])) + ' rows updated')
+    write_BuildManifest(model_path, HISTORIC_RECORD_OVERRIDES_VERSION, updated_fiscal_years, patched_rows)
+else:
+    monthly_water_deliveries_and_sales.to_csv(model_path + '/water_sales_and_deliveries_all_2020.csv', index = None)
+    annual_budget_data.to_csv(model_path + '/historical_actuals.csv', index = None)
+    historical_annual_budget_projections.to_csv(model_path + '/historical_budgets.csv', index = None)
 projected_cip_expenditures.to_csv(model_path + '/projected_CIP_expendituresFY22.csv') #updated FY on csv name
 projected_reserve_fund_starting_balances.to_csv(model_path + '/projected_FY21_reserve_fund_starting_balances.csv', index = None) 
 projected_FY_reserve_fund_deposits.to_csv(model_path + '/projected_reserve_fund_deposits.csv', index = None)
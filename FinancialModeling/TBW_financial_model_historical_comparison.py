@@ -10,6 +10,7 @@ import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
+from historical_comparison_results import load_ResultCubes, read_ResultTable, get_EnvelopeStatistics
 sns.set()
 
 data_path = 'C:/Users/cmpet/OneDrive/Documents/UNCTBW/Modeloutput/historical_comparison'
@@ -19,9 +20,10 @@ data_path = 'C:/Users/cmpet/OneDrive/Documents/UNCTBW/Modeloutput/historical_com
 # read historic data
 # hard-coded covenant values from budget spreadsheets shared by TBW (Fy2019 Table 12)/reports
 # NOTE: UPDATED TO INCLUDE MORE FYS, BUT SCRIPT MAY BE UNSTABLE IF APPENDED AGAIN LATER
-hist_actuals = pd.read_csv(data_path + '/historic_actuals.csv')
-hist_budgets = pd.read_csv(data_path + '/historic_budgets.csv')
-hist_water_delivery_sales = pd.read_csv(data_path + '/historic_sales.csv')
+# (fiscal year x variable) tables, water deliveries and sales summed by FY
+hist_actuals = read_ResultTable(data_path + '/historic_actuals.csv')
+hist_budgets = read_ResultTable(data_path + '/historic_budgets.csv')
+hist_water_delivery_sales = read_ResultTable(data_path + '/historic_sales.csv')
 
 # NOTE: Previously, FY 18 and FY 19 were adjusted by David Gorelick to include 
 #   CIP and R&R fund deposits not recorded in Table 12 of CAFR reports as they
@@ -37,25 +39,31 @@ hist_debt_covenant = [1.0,1.01,1.0,1.01,1.0,1.11,1.16,1.19] # from FY13 -> 20
 # make a set of colors for the plots
 n_reals = 10; sim = 0; f_id = 125
 
-# read modeled data
-for col in [x for x in hist_actuals.columns[2:].values]:
-    data_to_plot = pd.DataFrame({'Fiscal Year': hist_actuals['Fiscal Year'].values})
+# read modeled data, each output file of each realization once, as
+# (realization x fiscal year x variable) cubes of every table
+cubes = load_ResultCubes(data_path, f_id, sim, range(1,n_reals+1))
+
+# envelope and error of modeled values against historic records, all variables at once
+for table, historic in [('actuals', hist_actuals), ('budgets', hist_budgets), ('deliveries', hist_water_delivery_sales)]:
+    statistics, summary = get_EnvelopeStatistics(cubes[table], historic)
+    statistics.to_csv(data_path + '/' + table + '_historic_comp_f' + str(f_id) + '_s' + str(sim) + '.csv', index = None)
+    summary.to_csv(data_path + '/' + table + '_historic_comp_summary_f' + str(f_id) + '_s' + str(sim) + '.csv', index = None)
+
+for col in hist_actuals.columns:
+    if col in ['Uniform Rate (Full)', 
+               'Uniform Rate (Variable Portion)', 
+               'TBC Sales Rate']:
+        y_label = '$/kgal'; y_divider = 1 # plot in $/kgal rate
+    else:
+        y_divider = 1000000; y_label = '$ Millions' # plot in millions of dollars
+    fiscal_years = hist_actuals.index[2:]
+    modeled = cubes['actuals'].get(col, fiscal_years)/y_divider
     fig = plt.figure(figsize = (6,5)); ax = fig.add_subplot(1,1,1)
-    for r_id in range(1,n_reals+1):
-        model_actuals = pd.read_csv(data_path + '/budget_actuals_f' + str(f_id) + '_s' + str(sim) + '_r' + str(r_id) + '.csv')
-        if col in ['Uniform Rate (Full)', 
-                   'Uniform Rate (Variable Portion)', 
-                   'TBC Sales Rate']:
-            y_label = '$/kgal'; y_divider = 1 # plot in $/kgal rate
-        else:
-            y_divider = 1000000; y_label = '$ Millions' # plot in millions of dollars
-        data_to_plot.insert(data_to_plot.shape[1], 'Modeled ' + str(r_id), model_actuals[col]/y_divider)
-        
-    ax.fill_between(data_to_plot['Fiscal Year'][2:], 
-                    np.max(data_to_plot.iloc[2:,1:], axis = 1), 
-                    np.min(data_to_plot.iloc[2:,1:], axis = 1), 
+    ax.fill_between(fiscal_years, 
+                    np.nanmax(modeled, axis = 0), 
+                    np.nanmin(modeled, axis = 0), 
                     color = 'm', alpha = 0.75, edgecolor = 'm')
-    ax.plot(data_to_plot['Fiscal Year'][2:], 
+    ax.plot(fiscal_years, 
             hist_actuals[col].values[2:]/y_divider, 
             color = 'k', linewidth = 5)
     ax.set_xticks(range(2014,2022))
@@ -66,24 +74,21 @@ for col in [x for x in hist_actuals.columns[2:].values]:
     plt.savefig(data_path + '/' + col + '_actual_historic_comp.png', bbox_inches= 'tight')
     plt.close()
     
-for col in [x for x in hist_budgets.columns[2:].values]:
-    data_to_plot = pd.DataFrame({'Fiscal Year': hist_budgets['Fiscal Year'].values})
+for col in hist_budgets.columns:
+    if col in ['Uniform Rate', 
+               'Variable Uniform Rate', 
+               'TBC Rate']:
+        y_label = '$/kgal'; y_divider = 1 # plot in $/kgal rate
+    else:
+        y_divider = 1000000; y_label = '$ Millions' # plot in millions of dollars
+    fiscal_years = hist_budgets.index[2:]
+    modeled = cubes['budgets'].get(col, fiscal_years)/y_divider
     fig = plt.figure(figsize = (6,5)); ax = fig.add_subplot(1,1,1)
-    for r_id in range(1,n_reals+1):
-        model_budgets = pd.read_csv(data_path + '/budget_projections_f' + str(f_id) + '_s' + str(sim) + '_r' + str(r_id) + '.csv')
-        if col in ['Uniform Rate', 
-                   'Variable Uniform Rate', 
-                   'TBC Rate']:
-            y_label = '$/kgal'; y_divider = 1 # plot in $/kgal rate
-        else:
-            y_divider = 1000000; y_label = '$ Millions' # plot in millions of dollars
-        data_to_plot.insert(data_to_plot.shape[1], 'Modeled ' + str(r_id), model_budgets[col]/y_divider)
-
-    ax.fill_between(data_to_plot['Fiscal Year'][2:], 
-                    np.max(data_to_plot.iloc[2:,1:], axis = 1), 
-                    np.min(data_to_plot.iloc[2:,1:], axis = 1), 
+    ax.fill_between(fiscal_years, 
+                    np.nanmax(modeled, axis = 0), 
+                    np.nanmin(modeled, axis = 0), 
                     color = 'm', alpha = 0.75, edgecolor = 'm')
-    ax.plot(data_to_plot['Fiscal Year'][2:], 
+    ax.plot(fiscal_years, 
             hist_budgets[col].values[2:]/y_divider, 
             color = 'k', linewidth = 5)
     
@@ -99,20 +104,19 @@ for col in [x for x in hist_budgets.columns[2:].values]:
     plt.savefig(data_path + '/' + col + '_budget_historic_comp.png', bbox_inches= 'tight')
     plt.close()
     
+# sales revenue columns (columns 10 to 21 of the csv, after the index,
+# Fiscal Year and Month columns)
 y_divider = 1000000; y_label = '$ Millions' # plot in millions of dollars
-for col in [x for x in hist_water_delivery_sales.columns[10:22].values]:
-    data_to_plot = pd.DataFrame({'Fiscal Year': hist_water_delivery_sales['Fiscal Year'].values})
+for col in hist_water_delivery_sales.columns[7:19]:
+    fiscal_years = hist_water_delivery_sales.index[1:]
+    modeled = cubes['deliveries'].get(col, fiscal_years)/y_divider
     fig = plt.figure(figsize = (6,5)); ax = fig.add_subplot(1,1,1)
-    for r_id in range(1,n_reals+1):
-        model_water_delivery_sales = pd.read_csv(data_path + '/water_deliveries_revenues_f' + str(f_id) + '_s' + str(sim) + '_r' + str(r_id) + '.csv')
-        data_to_plot.insert(data_to_plot.shape[1], 'Modeled ' + str(r_id), model_water_delivery_sales[col]/y_divider)
-        
-    ax.fill_between(np.unique(data_to_plot['Fiscal Year'])[1:], 
-                    np.max(data_to_plot.groupby('Fiscal Year').sum().iloc[1:,1:], axis = 1), 
-                    np.min(data_to_plot.groupby('Fiscal Year').sum().iloc[1:,1:], axis = 1), 
+    ax.fill_between(fiscal_years, 
+                    np.nanmax(modeled, axis = 0), 
+                    np.nanmin(modeled, axis = 0), 
                     color = 'm', alpha = 0.75, edgecolor = 'm')
-    ax.plot(np.unique(data_to_plot['Fiscal Year'])[1:], 
-            hist_water_delivery_sales[col].groupby(hist_water_delivery_sales['Fiscal Year']).sum().values[1:]/y_divider, 
+    ax.plot(fiscal_years, 
+            hist_water_delivery_sales[col].values[1:]/y_divider, 
             color = 'k', linewidth = 5)
     ax.set_xticks(range(2014,2022))
     ax.set_xticklabels(range(2014,2022))
@@ -123,16 +127,14 @@ for col in [x for x in hist_water_delivery_sales.columns[10:22].values]:
     plt.close()
 
 # exceptions for covenants
-DC = pd.DataFrame({'Fiscal Year': [2015,2016,2017,2018,2019,2020]})
-RC = pd.DataFrame({'Fiscal Year': [2015,2016,2017,2018,2019,2020]})
+covenant_years = [2015,2016,2017,2018,2019,2020]
+DC = pd.DataFrame(cubes['metrics'].get('Debt Covenant Ratio', covenant_years).T, 
+                  columns = ['Modeled ' + str(r_id) for r_id in range(1,n_reals+1)])
+DC.insert(0, 'Fiscal Year', covenant_years)
+RC = pd.DataFrame(cubes['metrics'].get('Rate Covenant Ratio', covenant_years).T, 
+                  columns = ['Modeled ' + str(r_id) for r_id in range(1,n_reals+1)])
+RC.insert(0, 'Fiscal Year', covenant_years)
 fig, (ax1, ax2) = plt.subplots(1,2, sharey = False, figsize = (12,5))
-for r_id in range(1,n_reals+1):
-    model_metrics = pd.read_csv(data_path + '/financial_metrics_f' + str(f_id) + '_s' + str(sim) + '_r' + str(r_id) + '.csv')
-    Modeled = model_metrics['Debt Covenant Ratio']
-    DC.insert(DC.shape[1], 'Modeled ' + str(r_id), Modeled.values)
-    
-    Modeled = model_metrics['Rate Covenant Ratio']
-    RC.insert(RC.shape[1], 'Modeled ' + str(r_id), Modeled.values)
 
 ax1.fill_between(DC['Fiscal Year'], 
                  np.max(DC.iloc[:,1:], axis = 1), 
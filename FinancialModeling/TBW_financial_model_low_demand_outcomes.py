@@ -7,28 +7,30 @@ Create figure with subset of realizations to show financial impact of
 @author: dgorelick
 """
 
+import os
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
 sns.set()
 data_path = 'F:/MonteCarlo_Project/Cornell_UNC/financial_model_output'
+scripts_path = 'F:/MonteCarlo_Project/Cornell_UNC/TampaBayWater/data_management'
 sim = 0
 
-# get demand averages and identify which fall into which quantile ranges
-demand_averages = pd.read_csv('F:/MonteCarlo_Project/Cornell_UNC/financial_model_input_data/avg_demand_2040.csv', header = None)
-demand_quantiles = demand_averages.quantile((0.95,0.9,0.75,0.5,0.25,0.10,0.05)).iloc[:,0]
+# get demand statistics (built by rank_demand_realizations.py) and
+# identify which realizations fall into which quantile ranges
+os.chdir(scripts_path); from demand_index import read_demand_index, select_demand_band
+demand_annual, demand_summary = read_demand_index('F:/MonteCarlo_Project/Cornell_UNC/financial_model_input_data')
 
-high_demand_indexes = demand_averages.iloc[:,0].values >= demand_quantiles.iloc[0] # top 5th percentile
-low_demand_indexes = demand_averages.iloc[:,0].values <= demand_quantiles.iloc[-1] # bottom 5th percentile
+high_demand_ids = select_demand_band(demand_summary, run = 141, lower_quantile = 0.95) # top 5th percentile
+low_demand_ids = select_demand_band(demand_summary, run = 141, upper_quantile = 0.05) # bottom 5th percentile
 
 # warning: financial model skips realization ID 95 and doesn't read realization 1000 (bug to fix)
-# so adjust data before assigning quantiles for realization selection
-financial_demand_averages = demand_averages.iloc[demand_averages.index != 94, 0]
-financial_demand_averages = financial_demand_averages.iloc[:-1]
+# so match realization ids to rows of financial model output before selecting
+financial_realization_ids = np.array([r for r in range(1,1000) if r != 95])
 
-financial_high_demand_indexes = financial_demand_averages.values >= demand_quantiles.iloc[0] # top 5th percentile
-financial_low_demand_indexes = financial_demand_averages.values <= demand_quantiles.iloc[-1] # bottom 5th percentile
+financial_high_demand_indexes = np.isin(financial_realization_ids, high_demand_ids) # top 5th percentile
+financial_low_demand_indexes = np.isin(financial_realization_ids, low_demand_ids) # bottom 5th percentile
      
 # plot data across simulations/evaluations and select realizations
 for run_id in [141]:
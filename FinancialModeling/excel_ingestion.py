@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+"""
+Workbook-once reading of the historic financial Excel records
+
+Building historic records reads many tabs of the same workbooks (every
+point of connection tab of each Water Sales Revenue workbook, Table 11/12
+for every fiscal year, ...). Here each workbook is parsed once with all of
+its sheets as raw cells, kept in memory for the rest of the build and
+cached as a pickle next to the workbook, keyed by its modification time
+and size, so later builds skip Excel parsing until the workbook changes.
+
+Sheets are then cut from the raw cells with the same options (and the same
+pandas parser) as pd.read_excel, so
+
+    read_ExcelSheet(filename, sheet_name = 'Tpa', skiprows = 3)
+
+gives the same table as pd.read_excel(filename, sheet_name = 'Tpa', skiprows = 3).
+
+@author: dgorelic
+"""
+
+import os
+import pickle
+import hashlib
+import pandas as pd
+from pandas.io.parsers import TextParser
+
+# filename variants of the annual Water Sales Revenue workbooks, in order of precedence
+WATER_SALES_REVENUE_VARIANTS = ['-WS.xlsx', ' WS.xlsx', ' WS.xls', ' WS-FINAL.xls']
+
+CACHE_FOLDER = 'excel_cache'
+
+# raw sheets of workbooks read in this process, by absolute path
+_workbooks = {}
+
+
+def find_Workbook(candidates, path = '.'):
+    # first of the candidate filenames that exists, None if none do
+    for filename in candidates:
+        if os.path.exists(os.path.join(path, filename)):
+            return os.path.join(path, filename)
+    return None
+
+
+def find_WaterSalesRevenueWorkbooks(years, path = '.'):
+    # fiscal year -> Water Sales Revenue workbook (None if there is none),
+    # resolved once for every reader of the same years
+    return {year: find_Workbook(['Water Sales Revenue ' + str(year) + variant
+                                 for variant in WATER_SALES_REVENUE_VARIANTS], path)
+            for year in years}
+
+
+def cache_Filename(filename):
+    filename = os.path.abspath(filename)
+    key = hashlib.md5(filename.encode('utf-8')).hexdigest()[:12]
+    return os.path.join(os.path.dirname(filename), CACHE_FOLDER,
+                        os.path.basename(filename) + '.' + key + '.pkl')
+
+
+def get_ExcelWorkbook(filename, use_cache = True):
+    # sheet name -> raw cells (object DataFrame without header) of every
+    # sheet, parsed from the workbook only if it changed since it was cached
+    filename = os.path.abspath(filename)
+    stat = os.stat(filename)
+    signature = (stat.st_mtime, stat.st_size)
+    if filename in _workbooks and _workbooks[filename][0] == signature:
+        return _workbooks[filename][1]
+
+    cached = cache_Filename(filename)
+    sheets = None
+    if use_cache and os.path.exists(cached):
+        with open(cached, 'rb') as f:
+            cached_signature, cached_sheets = pickle.load(f)
+        if cached_signature == signature:
+            sheets = cached_sheets
+
+    if sheets is None:
+        sheets = pd.read_excel(filename, sheet_name = None, header = None, dtype = object)
+        if use_cache:
+            os.makedirs(os.path.dirname(cached), exist_ok = True)
+            with open(cached + '.tmp', 'wb') as f:
+                pickle.dump((signature, sheets), f, protocol = pickle.HIGHEST_PROTOCOL)
+            os.replace(cached + '.tmp', cached)
+
+    _workbooks[filename] = (signature, sheets)
+    return sheets
+
+
+def read_ExcelSheet(filename, sheet_name = 0, header = 0, skiprows = None, nrows = None,
+                    usecols = None, use_cache = True):
+    # pd.read_excel of one sheet, from the workbook read once
+    sheets = get_ExcelWorkbook(filename, use_cache)
+    if isinstance(sheet_name, int):
+        sheet_name = list(sheets.keys())[sheet_name]
+    if sheet_name not in sheets:
+        raise ValueError('Worksheet named ' + repr(sheet_name) + ' not found in ' + filename)
+
+    # empty cells are given to the parser as '', as by the Excel readers,
+    # and only rows up to the last one needed are passed when nrows is set
+    raw = sheets[sheet_name]
+    if nrows is not None:
+        raw = raw.iloc[:(skiprows or 0) + (0 if header is None else header + 1) + nrows]
+    rows = [['' if pd.isna(x) else x for x in row] for row in raw.values.tolist()]
+    if len(rows) == 0:
+        return pd.DataFrame()
+    parser = TextParser(rows, header = header, skiprows = skiprows, nrows = nrows, usecols = usecols)
+    return parser.read()
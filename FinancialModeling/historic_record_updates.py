@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+"""
+Incremental updates of the consolidated historic record tables
+
+Values read for each fiscal year (e.g. the monthly sales of one Water Sales
+Revenue workbook) are kept as a block in a cache folder with the
+modification time and size of the files they were read from. A block is
+only read again when one of its files changes or it is missing, so adding
+the workbook of a new fiscal year, or a revised one, only reads that year.
+
+Consolidated tables are then written with patch_CSV, which rewrites only
+the rows whose values changed (or appends new rows) and leaves every other
+row of the existing file as it was. Each build records the version of the
+hard-coded corrections applied over the source data and what was updated
+in a manifest next to the tables.
+
+    block, updated = get_CachedYearBlock(cache_path, 'monthly_sales', 2019,
+                                         [workbook], read_MonthlyWaterSalesForYear, 2019, workbook)
+    patched_rows = patch_CSV(model_path + '/historical_actuals.csv', annual_budget_data)
+
+@author: dgorelic
+"""
+
+import os
+import io
+import csv
+import json
+import pickle
+import datetime
+
+MANIFEST_FILENAME = 'historic_records_manifest.json'
+
+
+def file_Signature(filenames):
+    # modification time and size of each source file, None for missing files
+    signature = []
+    for filename in filenames:
+        if filename is not None and os.path.exists(filename):
+            stat = os.stat(filename)
+            signature.append((os.path.abspath(filename), stat.st_mtime, stat.st_size))
+        else:
+            signature.append((filename, None, None))
+    return signature
+
+
+def get_CachedYearBlock(cache_path, table, year, sources, build, *args, **kwargs):
+    # values of one fiscal year of a table, built again only if the
+    # source files changed; returns the block and whether it was built
+    signature = file_Signature(sources)
+    filename = os.path.join(cache_path, table + '_' + str(year) + '.pkl')
+    if os.path.exists(filename):
+        with open(filename, 'rb') as f:
+            cached_signature, block = pickle.load(f)
+        if cached_signature == signature:
+            return block, False
+
+    block = build(*args, **kwargs)
+    os.makedirs(cache_path, exist_ok = True)
+    with open(filename + '.tmp', 'wb') as f:
+        pickle.dump((signature, block), f, protocol = pickle.HIGHEST_PROTOCOL)
+    os.replace(filename + '.tmp', filename)
+    return block, True
+
+
+def patch_CSV(filename, table, index = False):
+    # write table to filename changing only rows that differ from the
+    # existing file, returns the (0-based) data rows written
+    text = io.StringIO()
+    table.to_csv(text, index = index)
+    new_rows = list(csv.reader(io.StringIO(text.getvalue())))
+
+    if os.path.exists(filename):
+        with open(filename, newline = '') as f:
+            old_rows = list(csv.reader(f))
+    else:
+        old_rows = []
+
+    # a different header means a different layout, so the table is rewritten
+    if len(old_rows) == 0 or old_rows[0] != new_rows[0]:
+        patched = list(range(len(new_rows) - 1))
+        rows = new_rows
+    else:
+        patched = [r - 1 for r in range(1, len(new_rows))
+                   if r >= len(old_rows) or old_rows[r] != new_rows[r]]
+        rows = old_rows[:len(new_rows)]
+        for r in patched:
+            if r + 1 < len(rows):
+                rows[r + 1] = new_rows[r + 1]
+            else:
+                rows.append(new_rows[r + 1])
+        if len(old_rows) == len(new_rows) and len(patched) == 0:
+            return patched
+
+    with open(filename + '.tmp', 'w', newline = '') as f:
+        csv.writer(f, lineterminator = '\n').writerows(rows)
+    os.replace(filename + '.tmp', filename)
+    return patched
+
+
+def write_BuildManifest(model_path, overrides_version, updated_years, patched_rows):
+    # record of the last build: version of the corrections applied, fiscal
+    # years read again from their sources and rows patched in each table
+    manifest = {'built' : datetime.datetime.now().isoformat(timespec = 'seconds'),
+                'overrides_version' : overrides_version,
+                'updated_fiscal_years' : {table: sorted(int(y) for y in years)
+                                          for table, years in updated_years.items()},
+                'patched_rows' : {os.path.basename(table): rows for table, rows in patched_rows.items()}}
+    with open(os.path.join(model_path, MANIFEST_FILENAME), 'w') as f:
+        json.dump(manifest, f, indent = 4)
+    return manifest
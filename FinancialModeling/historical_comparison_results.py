@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+"""
+Read-once result cubes for comparing hind-cast runs with historic records
+
+Each realization of a hind-cast simulation writes a budget_actuals,
+budget_projections, water_deliveries_revenues and financial_metrics csv.
+Here every file of every realization is read once (realizations in
+parallel) and stacked into a (realization x fiscal year x variable) cube
+per table, so any variable can be compared without reading files again.
+Monthly tables (water deliveries and revenues) are summed by fiscal year.
+
+Envelope and error statistics of the realizations against a historic table
+(historic_actuals.csv, historic_budgets.csv, ...) are computed for all
+variables at once:
+
+    cubes = load_ResultCubes(data_path, 125, 0, range(1,11))
+    hist_actuals = read_ResultTable(data_path + '/historic_actuals.csv')
+    statistics, summary = get_EnvelopeStatistics(cubes['actuals'], hist_actuals)
+
+@author: dgorelic
+"""
+
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+
+# table name -> output filename prefix of each realization
+RESULT_TABLES = {'actuals'    : 'budget_actuals',
+                 'budgets'    : 'budget_projections',
+                 'deliveries' : 'water_deliveries_revenues',
+                 'metrics'    : 'financial_metrics'}
+
+
+def result_Filename(data_path, table, f_id, sim, r_id):
+    return data_path + '/' + RESULT_TABLES[table] + '_f' + str(f_id) + '_s' + str(sim) + '_r' + str(r_id) + '.csv'
+
+
+def get_FiscalYearTable(output):
+    # (fiscal year x variable) numeric values of a model output table as
+    # written by to_csv, monthly tables are summed over each fiscal year
+    output = output.drop(columns = [c for c in output.columns if str(c).startswith('Unnamed')])
+    fiscal_years = output['Fiscal Year'].astype(int).values
+    if 'Month' in output.columns:
+        values = output.drop(columns = ['Fiscal Year', 'Month']).select_dtypes('number')
+        return values.groupby(fiscal_years).sum()
+    values = output.drop(columns = ['Fiscal Year']).select_dtypes('number')
+    values.index = fiscal_years
+    return values
+
+
+def read_ResultTable(filename):
+    return get_FiscalYearTable(pd.read_csv(filename))
+
+
+def read_RealizationTables(data_path, f_id, sim, r_id, tables = RESULT_TABLES):
+    # every output table of one realization, each file read once
+    return {table: read_ResultTable(result_Filename(data_path, table, f_id, sim, r_id)) for table in tables}
+
+
+class ResultCube:
+    def __init__(self, values, realizations, fiscal_years, variables):
+        self.values = values
+        self.realizations = list(realizations)
+        self.fiscal_years = list(fiscal_years)
+        self.variables = list(variables)
+
+    def select(self, variables = None, fiscal_years = None):
+        # (realization x fiscal year x variable) values of the given variables
+        # and fiscal years, NaN for fiscal years that were not modeled
+        variables = self.variables if variables is None else list(variables)
+        fiscal_years = self.fiscal_years if fiscal_years is None else list(fiscal_years)
+        v = [self.variables.index(x) for x in variables]
+        values = np.full((len(self.realizations), len(fiscal_years), len(variables)), np.nan)
+        found = [i for i, fy in enumerate(fiscal_years) if fy in self.fiscal_years]
+        values[:,found,:] = self.values[:,[self.fiscal_years.index(fiscal_years[i]) for i in found],:][:,:,v]
+        return values
+
+    def get(self, variable, fiscal_years = None):
+        # (realization x fiscal year) values of one variable
+        return self.select([variable], fiscal_years)[:,:,0]
+
+
+def load_ResultCubes(data_path, f_id, sim, realizations, tables = RESULT_TABLES, n_threads = 8):
+    # table name -> ResultCube of the realizations of a simulation
+    realizations = list(realizations)
+    with ThreadPoolExecutor(n_threads) as pool:
+        frames = list(pool.map(lambda r_id: read_RealizationTables(data_path, f_id, sim, r_id, tables), realizations))
+
+    cubes = {}
+    for table in tables:
+        fiscal_years = sorted(set(fy for f in frames for fy in f[table].index))
+        variables = list(dict.fromkeys(v for f in frames for v in f[table].columns))
+        values = np.stack([f[table].reindex(index = fiscal_years, columns = variables).values.astype(float)
+                           for f in frames])
+        cubes[table] = ResultCube(values, realizations, fiscal_years, variables)
+    return cubes
+
+
+def get_EnvelopeStatistics(cube, historic, variables = None, fiscal_years = None):
+    # envelope of the realizations and error of their mean against the
+    # historic (fiscal year x variable) table, for every variable at once;
+    # returns a (fiscal year, variable) table and a per variable summary
+    variables = [v for v in (historic.columns if variables is None else variables) if v in cube.variables]
+    fiscal_years = list(historic.index if fiscal_years is None else fiscal_years)
+    modeled = cube.select(variables, fiscal_years)
+    observed = historic.reindex(index = fiscal_years, columns = variables).values.astype(float)
+
+    # fiscal years without modeled (or historic) values give NaN statistics
+    with warnings.catch_warnings(), np.errstate(invalid = 'ignore', divide = 'ignore'):
+        warnings.simplefilter('ignore', RuntimeWarning)
+        low = np.nanmin(modeled, axis = 0)
+        high = np.nanmax(modeled, axis = 0)
+        mean = np.nanmean(modeled, axis = 0)
+        error = mean - observed
+        relative_error = np.where(observed != 0, error / np.abs(observed), np.nan)
+        within = (observed >= low) & (observed <= high)
+        realization_rmse = np.nanmedian(np.sqrt(np.nanmean((modeled - observed)**2, axis = 1)), axis = 0)
+
+    n_years, n_variables = len(fiscal_years), len(variables)
+    statistics = pd.DataFrame({'Fiscal Year'      : np.repeat(fiscal_years, n_variables),
+                               'Variable'         : np.tile(variables, n_years),
+                               'Historic'         : observed.ravel(),
+                               'Modeled Min'      : low.ravel(),
+                               'Modeled Mean'     : mean.ravel(),
+                               'Modeled Max'      : high.ravel(),
+                               'Error'            : error.ravel(),
+                               'Relative Error'   : relative_error.ravel(),
+                               'Within Envelope'  : within.ravel()})
+
+    # summary over the fiscal years with both modeled and historic values
+    compared = ~np.isnan(error)
+    n_compared = compared.sum(axis = 0)
+    with np.errstate(invalid = 'ignore', divide = 'ignore'):
+        summary = pd.DataFrame({'Variable'                : variables,
+                                'Fiscal Years Compared'   : n_compared,
+                                'Mean Absolute Error'     : np.nansum(np.abs(error), axis = 0) / n_compared,
+                                'RMSE'                    : np.sqrt(np.nansum(error**2, axis = 0) / n_compared),
+                                'Mean Relative Error'     : np.nansum(np.abs(relative_error), axis = 0) / n_compared,
+                                'Envelope Coverage'       : (within & compared).sum(axis = 0) / n_compared,
+                                'Median Realization RMSE' : realization_rmse})
+    return statistics, summary
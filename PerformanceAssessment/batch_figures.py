@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+"""
+Batch rendering of performance assessment figures
+
+Renders a list of (figure type, run, options) jobs in parallel worker
+processes with the Agg backend, instead of running one plotting script per
+figure with a hard-coded scenario. Figures are drawn from each run's
+MetricsCube (see shortfall_metrics), which a worker loads once and keeps
+for every further figure of the same run.
+
+    jobs = [('reliability', 141, {'definition' : 'no_sch'}),
+            ('magnitudes', 142, {})]
+    renderFigures(jobs)
+
+The full report figure set for several runs is rendered from the command line:
+
+    python batch_figures.py 125 141 142 143
+
+@author: dgorelick
+"""
+
+import os
+import sys
+import numpy as np
+from metrics_cube import MetricsCube
+
+YEARS = np.arange(2021, 2041)
+
+# percentiles across realizations shown as '15%, 10% and 5% of simulations'
+TAIL_PERCENTILES = [85, 90, 95]
+TAIL_STYLES = [('lightcoral', '-'), ('brown', '-.'), ('darkred', '--')]
+TAIL_LEGEND = ['15% of simulations', '10% of simulations', '5% of simulations']
+
+MAGNITUDE_SOURCES = ['Alafia', 'SCH', 'SCH3', 'TBC', 'CWUP']
+MAGNITUDE_SOURCE_NAMES = ['Alafia \nRiver', 'South Central \nHillsborough Wells',
+                          'South Central \nHillsborough Demand', 'Tampa Bypass Canal',
+                          'Consolidated Well Use']
+
+# figure file name suffix of each failure definition, as the matlab scripts
+DEFINITION_SUFFIXES = {'all' : '', 'no_sch' : '_no_sch', 'only_sch' : '_only_sch'}
+
+# data loaded by this (worker) process, one MetricsCube per run
+_loaded_cubes = {}
+
+
+def initializeWorker():
+    # headless rendering, must be set before pyplot is imported
+    import matplotlib
+    matplotlib.use('Agg')
+    import seaborn as sns
+    sns.set()
+
+
+def loadCube(run, path = '.'):
+    if (run, path) not in _loaded_cubes:
+        _loaded_cubes[(run, path)] = MetricsCube(run, path = path)
+    return _loaded_cubes[(run, path)]
+
+
+def colors_from_values(values, palette_name):
+    # from stackoverflow: https://stackoverflow.com/questions/36271302/changing-color-scale-in-seaborn-bar-plot
+    import seaborn as sns
+    normalized = (values - min(values)) / max(max(values) - min(values), 1e-12)
+    indices = np.round(normalized * (len(values) - 1)).astype(np.int32)
+    palette = sns.color_palette(palette_name, len(values))
+    return np.array(palette).take(indices, axis=0)
+
+
+def plotReliability(cube, fig, definition = 'all'):
+    # percent of realizations without a shortfall in each year
+    reliability = (1 - cube.get('reliability', source = definition, pct = 1)) * 100
+    ax = fig.add_subplot(111)
+    ax.bar(np.arange(len(YEARS)), reliability, color = colors_from_values(reliability, 'YlOrRd_r'),
+           edgecolor = '#838383')
+    ax.set_ylim([0,100])
+    ax.set_ylabel('Percent of Simulations without \nsupply shortfall', fontsize=14)
+    ax.set_xticks(np.arange(len(YEARS)))
+    ax.set_xticklabels(YEARS, rotation=90, fontsize=14)
+    return 'Reliability_' + str(cube.run) + DEFINITION_SUFFIXES[definition] + '.png'
+
+
+def plotSeverity(cube, fig, definition = 'all', failure_period_days = 30):
+    # days of continuous shortfall in the tail of realizations
+    periods = cube.get('failure_periods', source = definition, pct = TAIL_PERCENTILES)
+    ax = fig.add_subplot(111)
+    for p, (color, linestyle) in enumerate(TAIL_STYLES):
+        ax.plot(YEARS, periods[:,p] * failure_period_days + 5, color = color, linestyle = linestyle)
+    ax.set_xticks(YEARS)
+    ax.set_xticklabels(YEARS, rotation=90, fontsize=14)
+    ax.set_yticks(np.linspace(0,6,7)*60)
+    ax.set_yticklabels(['0', '60', '120', '180', '240', '300', '360'], fontsize=14)
+    ax.set_xlim([2021,2040])
+    ax.set_ylim([0,370])
+    ax.set_ylabel('Shortfall Severity \n(Days of continuous supply shortfall per year)', fontsize=14)
+    ax.legend(TAIL_LEGEND, fontsize=14, loc='lower right')
+    return 'Severity_' + str(cube.run) + DEFINITION_SUFFIXES[definition] + '.png'
+
+
+def plotDurationDistribution(cube, fig, definition = 'all', failure_period_days = 30):
+    # distribution of days of continuous shortfall across realizations, by year
+    periods = cube.get('failure_periods', source = definition)
+    for i, year in enumerate(YEARS):
+        ax = fig.add_subplot(5,4,i+1)
+        ax.plot(cube.percentiles, periods[i,:] * failure_period_days)
+        ax.set_xlabel('Realization Percentile')
+        ax.set_ylim([0,400])
+        ax.set_title(str(year))
+        if i % 4 == 0:
+            ax.set_ylabel('Max days of \ncontinuous shortfall')
+        else:
+            ax.set_yticklabels([])
+    fig.tight_layout()
+    return 'duration_distribution_' + str(cube.run) + DEFINITION_SUFFIXES[definition] + '.png'
+
+
+def plotMagnitudes(cube, fig):
+    # 30-day moving shortfall magnitude of each source in the tail of realizations
+    for i, (source, source_name) in enumerate(zip(MAGNITUDE_SOURCES, MAGNITUDE_SOURCE_NAMES)):
+        ax = fig.add_subplot(2,3,i+1)
+        magnitudes = cube.get('magnitude', source = source, pct = TAIL_PERCENTILES)
+        for p, (color, linestyle) in enumerate(TAIL_STYLES):
+            ax.plot(YEARS, magnitudes[:,p], color = color, linestyle = linestyle)
+        if i <= 1:
+            ax.set_xticklabels([])
+        ax.set_ylim([0,15])
+        ax.set_xlim([2020,2040])
+        if i == 0 or i == 3:
+            ax.set_ylabel('Shortfall Magnitude (mgd)', fontsize=14)
+        ax.set_title(source_name, fontsize=14)
+    fig.tight_layout()
+    return 'individual_magnitudes' + str(cube.run) + '.png'
+
+
+# figure type -> (plotting function, figure size)
+FIGURE_TYPES = {'reliability'           : (plotReliability, (12,6)),
+                'severity'              : (plotSeverity, (10,7)),
+                'duration_distribution' : (plotDurationDistribution, (15,15)),
+                'magnitudes'            : (plotMagnitudes, (12,8))}
+
+
+def reportJobs(runs):
+    # every figure of the report for each run
+    jobs = []
+    for run in runs:
+        for definition in DEFINITION_SUFFIXES.keys():
+            jobs.append(('reliability', run, {'definition' : definition}))
+            jobs.append(('severity', run, {'definition' : definition}))
+            jobs.append(('duration_distribution', run, {'definition' : definition}))
+        jobs.append(('magnitudes', run, {}))
+    return jobs
+
+
+def renderFigure(job, cube_path = '.', out_path = 'Figures', dpi = 300):
+    # render one (figure type, run, options) job, returns the figure file
+    # or the error message if it could not be drawn
+    from matplotlib import pyplot as plt
+
+    figure_type, run, options = job
+    plot, figsize = FIGURE_TYPES[figure_type]
+    fig = plt.figure(figsize = figsize)
+    try:
+        filename = os.path.join(out_path, plot(loadCube(run, cube_path), fig, **options))
+        fig.savefig(filename, bbox_inches = 'tight', dpi = dpi)
+    except (KeyError, ValueError) as error:
+        filename = 'ERROR: ' + figure_type + ' for run ' + str(run) + ': ' + str(error)
+    finally:
+        plt.close(fig)
+    return filename
+
+
+def _renderFigure(arguments):
+    return renderFigure(*arguments)
+
+
+def renderFigures(jobs, cube_path = '.', out_path = 'Figures', dpi = 300, n_processes = None):
+    # jobs are ordered by run so each worker tends to get figures of a run
+    # it has already loaded, results are in the order of the given jobs
+    os.makedirs(out_path, exist_ok = True)
+    order = sorted(range(len(jobs)), key = lambda j: str(jobs[j][1]))
+    arguments = [(jobs[j], cube_path, out_path, dpi) for j in order]
+
+    if n_processes == 1:
+        initializeWorker()
+        rendered = [_renderFigure(a) for a in arguments]
+    else:
+        from multiprocessing import Pool
+        with Pool(n_processes, initializer = initializeWorker) as pool:
+            n_workers = pool._processes
+            rendered = pool.map(_renderFigure, arguments,
+                                chunksize = max(1, len(arguments) // (4 * n_workers)))
+
+    filenames = [None] * len(jobs)
+    for j, filename in zip(order, rendered):
+        filenames[j] = filename
+    return filenames
+
+
+if __name__ == '__main__':
+    runs = [int(run) for run in sys.argv[1:]] if len(sys.argv) > 1 else [125, 141, 142, 143]
+    for filename in renderFigures(reportJobs(runs)):
+        print(filename)
@@ -6,6 +6,7 @@ Created on Fri Apr 16 10:35:31 2021
 """
 
 import numpy as np
+from metrics_cube import MetricsCube
 import matplotlib
 import matplotlib.cm as cm 
 from matplotlib import pyplot as plt
@@ -19,25 +20,29 @@ source_names = ['Alafia \nRiver',  'South Central \nHillsborough Wells',
 scenario = 141
 years = np.arange(2021, 2041)
 
+cube_141 = MetricsCube(141)
+cube_125 = MetricsCube(125)
+
 fig = plt.figure(figsize=(12,8), dpi=300)
 
 for i in range(0, 5):
     
     source = sources[i]
-    mo_ave_141 = np.loadtxt(source + '_mov30_' + str(141) +'.csv', delimiter=',')
-    mo_ave_125 = np.loadtxt(source + '_mov30_' + str(125) +'.csv', delimiter=',')
+    # (year x percentile) magnitudes for the 85th, 90th and 95th percentiles
+    mo_ave_141 = cube_141.get('magnitude', source = source, pct = [85,90,95])
+    mo_ave_125 = cube_125.get('magnitude', source = source, pct = [85,90,95])
 
     ax = fig.add_subplot(2,3,i+1)
     if i > 1:
         ax.set_xticklabels(range(2020,2045, 5), fontsize=12)
     else:
         ax.set_xticklabels([])
-    ax.plot(years, mo_ave_141[:,85], color='lightcoral')
-    ax.plot(years, mo_ave_141[:, 90], color='brown', linestyle='-.')
-    ax.plot(years, mo_ave_141[:,95], color='darkred', linestyle=':')
-    ax.plot(years, mo_ave_125[:,85], color='lightsteelblue')
-    ax.plot(years, mo_ave_125[:, 90], color='cornflowerblue', linestyle='-.')
-    ax.plot(years, mo_ave_125[:,95], color='royalblue', linestyle=':')
+    ax.plot(years, mo_ave_141[:,0], color='lightcoral')
+    ax.plot(years, mo_ave_141[:,1], color='brown', linestyle='-.')
+    ax.plot(years, mo_ave_141[:,2], color='darkred', linestyle=':')
+    ax.plot(years, mo_ave_125[:,0], color='lightsteelblue')
+    ax.plot(years, mo_ave_125[:,1], color='cornflowerblue', linestyle='-.')
+    ax.plot(years, mo_ave_125[:,2], color='royalblue', linestyle=':')
     
     #plot_quantiles(sources[i], ax, axes_lables, sources_names[i])
     if i == 3:
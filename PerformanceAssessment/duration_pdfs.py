@@ -21,7 +21,7 @@ def colors_from_values(values, palette_name):
     return np.array(palette).take(indices, axis=0)
 
 
-failure_criteria_periods_30_percent = np.loadtxt('failure_duration_no_sch_' + str(scenario) + '.csv',
+failure_criteria_periods_30_percent = np.loadtxt('Severity/failure_1mgd_duration_no_sch_' + str(scenario) + '.csv',
  delimiter=',')
 
 fig = plt.figure(figsize=(15,15))
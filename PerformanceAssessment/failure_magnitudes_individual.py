@@ -1,4 +1,5 @@
 import numpy as np
+from metrics_cube import MetricsCube
 import matplotlib
 import matplotlib.cm as cm 
 from matplotlib import pyplot as plt
@@ -13,20 +14,22 @@ scenario = 141
 
 years = np.arange(2021, 2041)
 
+cube = MetricsCube(scenario)
+
 fig = plt.figure(figsize=(12,8), dpi=300)
 
 for i in range(0, 5):
     ax = fig.add_subplot(2,3,i+1)
     source = sources[i]
-    mo_ave = np.loadtxt('Magnitude/' + source + '_mov30_' + str(scenario) +'.csv', delimiter=',')
+    mo_ave = cube.get('magnitude', source = source, pct = [85,90,95])
     if i > 1:
         ax.set_xticklabels(range(2020,2045, 5), fontsize=12)
     else:
         ax.set_xticklabels([])
     
-    ax.plot(years, mo_ave[:,85], color='lightcoral')
-    ax.plot(years, mo_ave[:, 90], color='brown', linestyle='-.')
-    ax.plot(years, mo_ave[:,95], color='darkred', linestyle=':')
+    ax.plot(years, mo_ave[:,0], color='lightcoral')
+    ax.plot(years, mo_ave[:,1], color='brown', linestyle='-.')
+    ax.plot(years, mo_ave[:,2], color='darkred', linestyle=':')
     
     #plot_quantiles(sources[i], ax, axes_lables, sources_names[i])
    
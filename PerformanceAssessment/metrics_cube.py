@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+"""
+Percentile cube of performance metrics for a run
+
+All metrics of a run are kept in one binary file (metrics_cube_<run>.npz) as
+a (metric x source x year x percentile) array so figures can select what they
+need without re-reading csv tables or realization output, i.e.
+
+    cube = MetricsCube(141)
+    cube.get('magnitude', source = 'TBC', pct = [85,90,95])  # (year x 3)
+
+Metrics can be added to an existing cube at any time (add + save), entries
+that were never added are NaN. Metrics without a distribution across
+realizations (i.e. reliability) are repeated across all percentiles.
+Percentiles are labelled 1 to 100.
+
+@author: dgorelick
+"""
+
+import os
+import numpy as np
+
+PERCENTILES = np.arange(1, 101)
+DEFAULT_YEARS = np.arange(2021, 2041)
+
+
+class MetricsCube:
+    def __init__(self, run, path = '.', years = DEFAULT_YEARS):
+        self.run = int(run)
+        self.path = path
+        self.metrics = []
+        self.sources = []
+        self.years = np.asarray(years)
+        self.percentiles = PERCENTILES.copy()
+        self.data = np.full([0, 0, len(self.years), len(self.percentiles)], np.nan)
+
+        if os.path.exists(self.filename()):
+            self.load()
+
+    def filename(self):
+        return os.path.join(self.path, 'metrics_cube_' + str(self.run) + '.npz')
+
+    def load(self):
+        with np.load(self.filename(), allow_pickle = False) as stored:
+            self.metrics = [str(m) for m in stored['metrics']]
+            self.sources = [str(s) for s in stored['sources']]
+            self.years = stored['years']
+            self.percentiles = stored['percentiles']
+            self.data = stored['data']
+
+    def save(self):
+        # write to a temporary file first so an interrupted save
+        # does not corrupt the existing cube
+        os.makedirs(self.path, exist_ok = True)
+        temporary_filename = self.filename() + '.tmp.npz'
+        np.savez(temporary_filename,
+                 metrics = np.array(self.metrics, dtype = str),
+                 sources = np.array(self.sources, dtype = str),
+                 years = self.years, percentiles = self.percentiles,
+                 data = self.data)
+        os.replace(temporary_filename, self.filename())
+
+    def _index(self, labels, label, kind):
+        # position of a metric or source, extending the cube for new labels
+        if label not in labels:
+            labels.append(label)
+            pad = [(0, 0)] * 4
+            pad[0 if kind == 'metric' else 1] = (0, 1)
+            self.data = np.pad(self.data, pad, constant_values = np.nan)
+        return labels.index(label)
+
+    def add(self, metric, source, values):
+        # store (year x percentile) values of a metric for a source,
+        # a (year) vector is repeated across percentiles
+        values = np.asarray(values, dtype = np.float64)
+        if values.ndim == 1:
+            values = np.repeat(values[:,np.newaxis], len(self.percentiles), axis = 1)
+        if values.shape != self.data.shape[2:]:
+            raise ValueError('Expected values of shape ' + str(self.data.shape[2:]) +
+                             ' (year x percentile) for ' + metric + ' ' + source +
+                             ', got ' + str(values.shape))
+
+        m = self._index(self.metrics, metric, 'metric')
+        s = self._index(self.sources, source, 'source')
+        self.data[m, s, :, :] = values
+
+    def has(self, metric, source = None):
+        if metric not in self.metrics:
+            return False
+        if source is None:
+            return True
+        return source in self.sources and \
+            not np.isnan(self.data[self.metrics.index(metric),
+                                   self.sources.index(source)]).all()
+
+    def get(self, metric, source = None, pct = None, year = None):
+        # values of a metric, dimensions given as a single label are dropped
+        # so get('magnitude', source = 'TBC', pct = 95) is a (year) vector
+        if metric not in self.metrics:
+            raise KeyError('Metric ' + str(metric) + ' not in cube for run ' +
+                           str(self.run) + ', available: ' + ', '.join(self.metrics))
+        selection = self.data[self.metrics.index(metric)]
+
+        # last axis first so dropping an axis does not move the others
+        for axis, labels, selected, name in [(2, list(self.percentiles), pct, 'percentile'),
+                                             (1, list(self.years), year, 'year'),
+                                             (0, self.sources, source, 'source')]:
+            if selected is None:
+                continue
+            single = np.isscalar(selected) or isinstance(selected, str)
+            wanted = [selected] if single else list(selected)
+            missing = [str(w) for w in wanted if w not in labels]
+            if len(missing) > 0:
+                raise KeyError(name.capitalize() + ' not in cube for run ' +
+                               str(self.run) + ': ' + ', '.join(missing))
+            index = [labels.index(w) for w in wanted]
+            selection = np.take(selection, index[0] if single else index, axis = axis)
+
+        return selection
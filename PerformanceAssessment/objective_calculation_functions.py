@@ -1,16 +1,38 @@
 import numpy as np
 import pandas as pd
+from analysis_functions import register_AMPL_columns
 
 # FUNCTIONS TO READ AMPL OUTPUT AND EXTRACT OBJECTIVE-BASED STATISTICS
 # FOR A GIVEN REALIZATION, TO BE USED WITH A LOOP LATER TO CALCULATE 
 # MODEL SIMULATION/RUN OBJECTIVES IN A MASTER SCRIPT
 # D Gorelick (Jan 2020)
 
+# columns of cleaned AMPL files needed for each objective, so that
+# realizations can be read with read_AMPL_cleaned_columns(filename, 
+# ['level_of_service']) instead of loading every column
+# (permit and slack variables are not tracked in every run)
+GW_PERMIT_VIOLATION_COLUMNS = ['wup_mavg_pos__CWUP',
+                               'wup_mavg_pos__SCH',
+                               'wup_mavg_pos__BUD']
+SW_PERMIT_VIOLATION_COLUMNS = ['ngw_slack__Alafia',
+                               'ngw_slack__Reservoir',
+                               'ngw_slack__TBC']
+MONITORING_WELL_COLUMN_PREFIXES = ['targetoffset_neg__', 
+                                   'regwell_viol__', 
+                                   'ufas_wl', 
+                                   'wf_prod__']
+
+# order of sources in (day x source) level of service violation arrays
+LEVEL_OF_SERVICE_SOURCES = ['CWUP', 'SCH', 'BUD', 'Alafia', 'Reservoir', 'TBC']
+
+register_AMPL_columns('level_of_service', 
+                      optional = GW_PERMIT_VIOLATION_COLUMNS + SW_PERMIT_VIOLATION_COLUMNS)
+register_AMPL_columns('environmental_sustainability', 
+                      prefixes = MONITORING_WELL_COLUMN_PREFIXES)
+
 def getGWPermitViolations(AMPL_cleaned_data):
     # names of GW permit violation variables (if tracked)
-    Slack_Variable_Names = ['wup_mavg_pos__CWUP',
-                            'wup_mavg_pos__SCH',
-                            'wup_mavg_pos__BUD']
+    Slack_Variable_Names = GW_PERMIT_VIOLATION_COLUMNS
     
     # initialize vectors of NaN for each variable
     daily_overage_matrix = np.zeros([len(AMPL_cleaned_data),
@@ -36,9 +58,7 @@ def getGWPermitViolations(AMPL_cleaned_data):
 
 def getSWPermitViolations(AMPL_cleaned_data):
     # names of GW permit violation variables (if tracked)
-    Slack_Variable_Names = ['ngw_slack__Alafia',
-                            'ngw_slack__Reservoir',
-                            'ngw_slack__TBC']
+    Slack_Variable_Names = SW_PERMIT_VIOLATION_COLUMNS
     
     # initialize matrix of NaN for variables
     daily_slack_matrix = np.zeros([len(AMPL_cleaned_data),
@@ -60,75 +80,79 @@ def getSWPermitViolations(AMPL_cleaned_data):
             daily_TBC_slack_vector]
     
     
-def getMonitoringWellViolations(AMPL_cleaned_data, 
-                                SAS_well_attributes):
-    # collect SAS well info
-    monitoring_wells     = SAS_well_attributes['PointName']
-    associated_wellfield = SAS_well_attributes['WFCode']
-    
-    # build empty dataset to hold wellfield outcomes
-    daily_wellfield_average_monitoring_violation_matrix = np.zeros([
-            len(AMPL_cleaned_data),
-            len(np.unique(associated_wellfield))])
-
-    # count wells in each wellfield
-    from collections import Counter
-    wellfields_dict = Counter(associated_wellfield).keys()
-    wells_per_field_dict = Counter(associated_wellfield).values()
-    
-    wellfields = []
-    for key in wellfields_dict:
-        wellfields.append(key)
-        
-    wells_per_field = []
-    for val in wells_per_field_dict:
-        wells_per_field.append(val)
-    
-    # loop through recorded data to assign violations to each wellfield
-    for well in range(len(monitoring_wells)):
-        wellfield = associated_wellfield[well]
-        if 'targetoffset_neg__' + monitoring_wells[well] in AMPL_cleaned_data.columns:
-            # add violations to wellfield, divided by total number of wells
-            # cumulative sum of them over 6 months 
-            well_violations = AMPL_cleaned_data['targetoffset_neg__' + 
-                                                monitoring_wells[well]].fillna(0)
-            daily_wellfield_average_monitoring_violation_matrix[
-                    :,wellfields.index(wellfield)] += well_violations / wells_per_field[
-                                    wellfields.index(wellfield)]
-    
-    # convert days without data to NaN
-    daily_wellfield_average_monitoring_violation_matrix = \
-        pd.DataFrame(daily_wellfield_average_monitoring_violation_matrix) \
-        .replace({0:np.nan})
-    daily_wellfield_average_monitoring_violation_matrix.columns = wellfields
+def buildWellfieldIncidence(SAS_well_attributes):
+    # (well x wellfield) matrix assigning each SAS monitoring well to its 
+    # wellfield, weighted by 1 / number of wells in the wellfield so a 
+    # matrix multiply gives wellfield average violations
+    # wellfields are kept in order of first appearance
+    monitoring_wells     = list(SAS_well_attributes['PointName'].values)
+    associated_wellfield = list(SAS_well_attributes['WFCode'].values)
+    wellfields = list(dict.fromkeys(associated_wellfield))
     
-    # pull production data
-    daily_wellfield_total_production_matrix = np.zeros([
-            len(AMPL_cleaned_data),
-            len(np.unique(associated_wellfield))])
+    incidence = np.zeros([len(monitoring_wells), len(wellfields)])
+    incidence[np.arange(len(monitoring_wells)), 
+              [wellfields.index(wf) for wf in associated_wellfield]] = 1
+    incidence /= incidence.sum(axis = 0)
     
-    for wellfield in range(len(wellfields)):
-        daily_wellfield_total_production_matrix[:,wellfield] = AMPL_cleaned_data[
-                'wf_prod__' + wellfields[wellfield]]
+    return [monitoring_wells, wellfields, incidence]
+
+
+def getMonitoringWellViolationArrays(AMPL_cleaned_data, 
+                                     SAS_well_attributes,
+                                     wellfield_incidence = None):
+    # daily wellfield average monitoring violations (day x wellfield), 
+    # Upper Floridian well violations (day x well) and wellfield total 
+    # production (day x wellfield) as arrays with missing data as 0
+    # the incidence from buildWellfieldIncidence can be passed in so it is
+    # built once when looping over many realizations
+    if wellfield_incidence is None:
+        wellfield_incidence = buildWellfieldIncidence(SAS_well_attributes)
+    monitoring_wells, wellfields, incidence = wellfield_incidence
+    
+    # wells without recorded data contribute no violations
+    tracked = [well for well in range(len(monitoring_wells)) if 
+               'targetoffset_neg__' + monitoring_wells[well] in AMPL_cleaned_data.columns]
+    well_violations = np.nan_to_num(AMPL_cleaned_data[
+            ['targetoffset_neg__' + monitoring_wells[well] for well in tracked]].values.astype(np.float64))
+    daily_wellfield_average_monitoring_violation_matrix = well_violations @ incidence[tracked,:]
     
-    # name and convert to dataframe
-    daily_wellfield_total_production_matrix = pd.DataFrame(daily_wellfield_total_production_matrix)
-    daily_wellfield_total_production_matrix.columns = wellfields
+    # pull production data
+    daily_wellfield_total_production_matrix = np.nan_to_num(AMPL_cleaned_data[
+            ['wf_prod__' + wellfield for wellfield in wellfields]].values.astype(np.float64))
     
     # collect water quality well levels 
     WQ_wells = [x[9:] for x in AMPL_cleaned_data.columns if 'ufas_wl' in x]
     daily_upper_floridian_well_violation_matrix = np.zeros([
-            len(AMPL_cleaned_data),
-            len(np.unique(WQ_wells))])
-    
+            len(AMPL_cleaned_data), len(WQ_wells)])
     for well in range(len(WQ_wells)):
         if 'regwell_viol__' + WQ_wells[well] in AMPL_cleaned_data.columns:
-            daily_upper_floridian_well_violation_matrix[:,well] = AMPL_cleaned_data[
-                    'regwell_viol__' + WQ_wells[well]]
-        
-    # name and convert to dataframe
-    daily_upper_floridian_well_violation_matrix = pd.DataFrame(daily_upper_floridian_well_violation_matrix).replace({0:np.nan})
-    daily_upper_floridian_well_violation_matrix.columns = WQ_wells
+            daily_upper_floridian_well_violation_matrix[:,well] = np.nan_to_num(
+                    AMPL_cleaned_data['regwell_viol__' + WQ_wells[well]].values)
+    
+    return [daily_wellfield_average_monitoring_violation_matrix, 
+            daily_upper_floridian_well_violation_matrix,
+            daily_wellfield_total_production_matrix,
+            wellfields, WQ_wells]
+
+
+def getMonitoringWellViolations(AMPL_cleaned_data, 
+                                SAS_well_attributes):
+    daily_wellfield_average_monitoring_violation_matrix, \
+    daily_upper_floridian_well_violation_matrix, \
+    daily_wellfield_total_production_matrix, \
+    wellfields, WQ_wells = getMonitoringWellViolationArrays(AMPL_cleaned_data, 
+                                                            SAS_well_attributes)
+    
+    # name and convert to dataframes, days without violations as NaN
+    daily_wellfield_average_monitoring_violation_matrix = \
+        pd.DataFrame(daily_wellfield_average_monitoring_violation_matrix, 
+                     columns = wellfields).replace({0:np.nan})
+    daily_upper_floridian_well_violation_matrix = \
+        pd.DataFrame(daily_upper_floridian_well_violation_matrix, 
+                     columns = WQ_wells).replace({0:np.nan})
+    daily_wellfield_total_production_matrix = \
+        pd.DataFrame(daily_wellfield_total_production_matrix, 
+                     columns = wellfields)
     
     return [daily_wellfield_average_monitoring_violation_matrix, 
             daily_upper_floridian_well_violation_matrix,
@@ -143,134 +167,227 @@ def getInfrastructurePathway(AMPL_cleaned_data):
             daily_debt_service]
  
     
+def getLevelOfServiceViolations(AMPL_cleaned_data):
+    # daily permit violations of a realization as a (day x source) array,
+    # sources ordered as LEVEL_OF_SERVICE_SOURCES with groundwater first
+    return np.stack(getGWPermitViolations(AMPL_cleaned_data) + 
+                    getSWPermitViolations(AMPL_cleaned_data), axis = 1)
+
+
+def persistViolations(violations, persistence_days = 7):
+    # groundwater permit overages are reported weekly, so each overage is 
+    # held for persistence_days (the day itself and following days) by 
+    # taking the max over a trailing window along the day axis
+    # violations can be (day), (day x source) or (realization x day x source)
+    violations = np.array(violations, dtype = np.float64)
+    day_axis = 0 if violations.ndim < 3 else 1
+    persisted = violations.copy()
+    n_days = violations.shape[day_axis]
+    for lag in range(1, min(persistence_days, n_days)):
+        current = [slice(None)] * violations.ndim; current[day_axis] = slice(lag, None)
+        lagged  = [slice(None)] * violations.ndim; lagged[day_axis]  = slice(None, -lag)
+        persisted[tuple(current)] = np.fmax(persisted[tuple(current)], 
+                                            violations[tuple(lagged)])
+    
+    return persisted
+
+
+def findViolationEvents(in_violation):
+    # run-length encoding of consecutive days in violation
+    # in_violation is a boolean (day) or (realization x day) array,
+    # returns realization index, first day and length of every event
+    in_violation = np.atleast_2d(np.asarray(in_violation, dtype = bool))
+    padded = np.zeros([in_violation.shape[0], in_violation.shape[1] + 2], dtype = np.int8)
+    padded[:,1:-1] = in_violation
+    
+    # +1 where events start, -1 the day after they end, rows are 
+    # padded so events never continue from one realization to the next
+    change = np.diff(padded, axis = 1)
+    realization, start = np.nonzero(change == 1)
+    end = np.nonzero(change == -1)[1]
+    
+    return realization, start, end - start
+
+
+def calculateLevelOfServiceBatch(violations, 
+                                 n_groundwater_sources = 3, 
+                                 persistence_days = 7, 
+                                 failure_event_days = 14):
+    # level of service for many realizations at once from a 
+    # (realization x day x source) array of daily permit violations, 
+    # the first n_groundwater_sources sources are persisted (see above)
+    violations = np.array(violations, dtype = np.float64)
+    if violations.ndim == 2:
+        violations = violations[np.newaxis,:,:]
+    violations[:,:,:n_groundwater_sources] = persistViolations(
+            violations[:,:,:n_groundwater_sources], persistence_days)
+    
+    # total daily violations for the region
+    in_violation = np.nansum(violations, axis = 2) > 0
+    
+    # calculate basic ratio of days in violation to total days
+    level_of_service_reliability = in_violation.mean(axis = 1)
+    
+    # count failure events (14+ consec days of failure) in each realization
+    realization, start, length = findViolationEvents(in_violation)
+    count_of_failure_events_vulnerability = np.bincount(
+            realization[length >= failure_event_days], 
+            minlength = violations.shape[0])
+    
+    # longest event in each realization, if at least 365 days the 
+    # realization is in failure
+    longest_event = np.zeros(violations.shape[0], dtype = int)
+    np.maximum.at(longest_event, realization, length)
+    
+    return [level_of_service_reliability, 
+            count_of_failure_events_vulnerability,
+            longest_event]
+
+
+def calculateAnnualLevelOfService(AMPL_cleaned_data, n_years = 20,
+                                  days_per_year = 365):
+    # level of service of each consecutive 365-day year of a realization,
+    # each year is evaluated on its own as if it were a separate record
+    violation_tracker = getLevelOfServiceViolations(AMPL_cleaned_data)
+    n_years = min(n_years, len(violation_tracker) // days_per_year)
+    annual_violations = violation_tracker[:n_years * days_per_year,:].reshape(
+            n_years, days_per_year, violation_tracker.shape[1])
+
+    annual_reliability, annual_vulnerability, _ = \
+        calculateLevelOfServiceBatch(annual_violations)
+
+    return [annual_reliability,
+            annual_vulnerability]
+
+
 def calculateLevelOfService(AMPL_cleaned_data):
     # call "get" functions to pull data necessary to calculate objective
     # statistics for the realization
-    daily_CWUP_overage_vector, \
-    daily_SCH_overage_vector, \
-    daily_BUD_overage_vector = getGWPermitViolations(AMPL_cleaned_data)
-    
-    for i in range(0, len(daily_CWUP_overage_vector)):
-        if daily_CWUP_overage_vector[i] > 0:
-            daily_CWUP_overage_vector[i:i+6] = daily_CWUP_overage_vector[i]
-    
-    for i in range(0, len(daily_SCH_overage_vector)):
-        if daily_SCH_overage_vector[i] > 0:
-            daily_SCH_overage_vector[i:i+6] = daily_SCH_overage_vector[i]
-    
-    for i in range(0, len(daily_BUD_overage_vector)):
-        if daily_BUD_overage_vector[i] > 0:
-            daily_BUD_overage_vector[i:i+6] = daily_BUD_overage_vector[i]
-    
-    daily_Alafia_slack_vector, \
-    daily_Reservoir_slack_vector, \
-    daily_TBC_slack_vector = getSWPermitViolations(AMPL_cleaned_data)
+    violation_tracker = getLevelOfServiceViolations(AMPL_cleaned_data)
     
     # calculate reliability as the fraction of days without permit violations
     # and take count of longest stretch of consecutive days of violation 
     # (if greater than 365, entire realization is a failure, which is a good 
     # way to track firm yield on the supply under stationary demand realizations
     # but may not function well under transient conditions to track failure)
-    violation_tracker = np.stack((daily_CWUP_overage_vector, 
-                                  daily_SCH_overage_vector, 
-                                  daily_BUD_overage_vector, 
-                                  daily_Alafia_slack_vector, 
-                                  daily_Reservoir_slack_vector, 
-                                  daily_TBC_slack_vector), axis = 1)
-    
-    
-    # total daily violations for the region
-    daily_violation_sum = np.nansum(violation_tracker, axis = 1)
-    
-    # calculate basic ratio of days in violation to total days
-    realization_level_of_service_reliability = sum(
-            daily_violation_sum > 0) / len(daily_violation_sum)
-    
-    # length of all violation events
-    import itertools
-    length_of_events = [sum(1 for _ in group) \
-                        for key, group in \
-                        itertools.groupby(daily_violation_sum > 0) if key]
+    reliability, vulnerability, longest_event = \
+        calculateLevelOfServiceBatch(violation_tracker)
     
     # check if largest event is at least 365 days
-    if len(length_of_events) > 0:
-        if max(length_of_events) > 364:
-            print('Realization in failure')
-    
-    # calculate number of failure events (14+ consec days of failure)
-    realization_count_of_failure_events_vulnerability = len(
-            [True for x in length_of_events if x > 13])
+    if longest_event[0] > 364:
+        print('Realization in failure')
     
-    return [realization_level_of_service_reliability, 
-            realization_count_of_failure_events_vulnerability]
+    return [reliability[0], 
+            vulnerability[0]]
 
 
-def calculateEnvironmentalSustainability(AMPL_cleaned_data, 
-                                         SAS_well_attributes):
-    # call "get" functions to pull data necessary to calculate objective
-    # statistics for the realization
-    daily_wellfield_average_monitoring_violation_matrix, \
-    daily_upper_floridian_well_violation_matrix, \
-    daily_wellfield_total_production_matrix = \
-        getMonitoringWellViolations(AMPL_cleaned_data, SAS_well_attributes)
-    
-    # count of weekly violations by wellfield each 365 day period
-    realization_GW_violation_annual_count_by_wellfield = \
-        (daily_wellfield_average_monitoring_violation_matrix. \
-             fillna(0) > 0).rolling(window = 365).sum().iloc[365:,:]
+def rollingSum(data, window, axis = 1):
+    # sum over trailing windows along an axis by differencing a cumulative 
+    # sum, only full windows are returned (position k ends at day k+window-1)
+    cumulative = np.cumsum(np.asarray(data, dtype = np.float64), axis = axis)
+    n = cumulative.shape[axis]
+    if n < window:
+        shape = list(cumulative.shape); shape[axis] = 0
+        return np.zeros(shape)
+    
+    first = np.take(cumulative, [window - 1], axis = axis)
+    later = np.take(cumulative, np.arange(window, n), axis = axis) - \
+            np.take(cumulative, np.arange(0, n - window), axis = axis)
+    
+    return np.concatenate([first, later], axis = axis)
+
+
+def quantileOverDays(data, q):
+    # quantile across days of a (realization x day) array, NaN if no days
+    if data.shape[1] == 0:
+        return np.full(data.shape[0], np.nan)
+    return np.quantile(data, q, axis = 1)
+
+
+def calculateEnvironmentalSustainabilityBatch(monitoring_violations, 
+                                              upper_floridian_violations,
+                                              production):
+    # environmental sustainability objectives for many realizations at once
+    #   monitoring_violations:      (realization x day x wellfield)
+    #   upper_floridian_violations: (realization x day x well) or 
+    #                               (realization x day) total violation
+    #   production:                 (realization x day x wellfield)
+    # with missing data as 0 (see getMonitoringWellViolationArrays)
+    monitoring_violations = np.asarray(monitoring_violations, dtype = np.float64)
+    production = np.asarray(production, dtype = np.float64)
+    upper_floridian_violations = np.asarray(upper_floridian_violations, dtype = np.float64)
+    if upper_floridian_violations.ndim == 3:
+        upper_floridian_violations = upper_floridian_violations.sum(axis = 2)
+    
+    # count of weekly violations by wellfield each 365 day period, 
+    # first full period is skipped as in earlier versions
+    annual_count_by_wellfield = rollingSum(monitoring_violations > 0, 365)[:,1:,:]
         
     # for objective statistic, find weeks in violation in each rolling period
     # for worst-performing wellfield and take the average of those values
-    realization_GW_worst_case_year_total_weekly_violations = \
-        realization_GW_violation_annual_count_by_wellfield.max(axis = 1).mean()
+    GW_worst_case_year_total_weekly_violations = \
+        annual_count_by_wellfield.max(axis = 2, initial = -np.inf).mean(axis = 1)
     
     # track relative size of well level violation to wellfield production
     # for 7-day rolling window, don't report but record for interest
     # (not an easily-interpretable statistic)
-    
     # correct near-zero or negative demand values
-    daily_wellfield_total_production_matrix[
-            daily_wellfield_total_production_matrix < 1e-4] = 0
-    
-    seven_day_rolling_sum_violation_to_production_ratio_by_wellfield = \
-        daily_wellfield_average_monitoring_violation_matrix.fillna(0). \
-            rolling(window = 7, axis = 0).sum() / \
-                daily_wellfield_total_production_matrix.fillna(0). \
-                rolling(window = 7, axis = 0).sum()
-    
-    realization_GW_violation_magnitude_to_production_ratio = \
-        seven_day_rolling_sum_violation_to_production_ratio_by_wellfield. \
-            iloc[7:,:].median()
-            
+    production = np.where(production < 1e-4, 0, production)
+    seven_day_rolling_violation_sums = rollingSum(monitoring_violations, 7)[:,1:,:]
+    with np.errstate(divide = 'ignore', invalid = 'ignore'):
+        violation_to_production_ratio = seven_day_rolling_violation_sums / \
+            rollingSum(production, 7)[:,1:,:]
+    GW_violation_magnitude_to_production_ratio = np.nanmedian(
+            violation_to_production_ratio, axis = 1) \
+        if violation_to_production_ratio.shape[1] > 0 else \
+        np.full(violation_to_production_ratio.shape[::2], np.nan)
+    
     # for reporting long-term sustainability, report wellfield average
     # violation deficit over a 365-day rolling average
     # because reporting is only done weekly, do a rolling average of the 
     # rolling weekly sum 
-    seven_day_rolling_violation_sums = \
-        daily_wellfield_average_monitoring_violation_matrix.fillna(0). \
-            rolling(window = 7, axis = 0).sum().iloc[7:,:]
     annual_average_weekly_violation = \
-        seven_day_rolling_violation_sums.rolling(
-                window = 365).mean().iloc[365:,:]
+        rollingSum(seven_day_rolling_violation_sums, 365)[:,1:,:] / 365
     
     # from this annual moving average of weekly average wellfield violations
     # take the average across sites "daily" and find the 95th percentile 
     # violation in time to get a sense of sustainability
     regional_worst_case_annual_average_weekly_wellfield_violation_depth = \
-        annual_average_weekly_violation.mean(axis = 1).quantile(q = 0.95)
+        quantileOverDays(annual_average_weekly_violation.mean(axis = 2), 0.95)
     
     # similarly, get weekly Upper Floridian frequency of violation
     # summarized across all wells, tracked as moving sum of daily violation
     # frequency over annual periods
-    # I THINK THIS IS TRACKED WEEKLY FOR ALL SITES SO THIS SHOULD MAX OUT AT 52
-    # VIOLATIONS PER ANNUAL PERIOD?
     regional_worst_case_moving_sum_annual_total_UFGW_violation_frequency = \
-        (daily_upper_floridian_well_violation_matrix.sum(
-                axis = 1) > 0).rolling(window = 365).sum().quantile(q = 0.95)
+        quantileOverDays(rollingSum(upper_floridian_violations > 0, 365), 0.95)
     
-    return [realization_GW_worst_case_year_total_weekly_violations, 
+    return [GW_worst_case_year_total_weekly_violations, 
             regional_worst_case_annual_average_weekly_wellfield_violation_depth,
-            regional_worst_case_moving_sum_annual_total_UFGW_violation_frequency]
+            regional_worst_case_moving_sum_annual_total_UFGW_violation_frequency,
+            GW_violation_magnitude_to_production_ratio]
+
+
+def calculateEnvironmentalSustainability(AMPL_cleaned_data, 
+                                         SAS_well_attributes,
+                                         wellfield_incidence = None):
+    # call "get" functions to pull data necessary to calculate objective
+    # statistics for the realization
+    daily_wellfield_average_monitoring_violation_matrix, \
+    daily_upper_floridian_well_violation_matrix, \
+    daily_wellfield_total_production_matrix, _, _ = \
+        getMonitoringWellViolationArrays(AMPL_cleaned_data, SAS_well_attributes, 
+                                         wellfield_incidence)
+    
+    # I THINK UPPER FLORIDIAN VIOLATIONS ARE TRACKED WEEKLY FOR ALL SITES 
+    # SO THIS SHOULD MAX OUT AT 52 VIOLATIONS PER ANNUAL PERIOD?
+    objectives = calculateEnvironmentalSustainabilityBatch(
+            daily_wellfield_average_monitoring_violation_matrix[np.newaxis,:,:], 
+            daily_upper_floridian_well_violation_matrix[np.newaxis,:,:],
+            daily_wellfield_total_production_matrix[np.newaxis,:,:])
+    
+    return [objectives[0][0], 
+            objectives[1][0],
+            objectives[2][0]]
 
 
 def calculateCosts(AMPL_cleaned_data):
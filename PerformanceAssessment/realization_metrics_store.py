@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+"""
+Incremental store of per-realization metrics for a run
+
+Results of a per-realization worker (i.e. calculateShortfallMetrics) are kept
+with the size, modification time and checksum of the file they were
+calculated from. When a run is updated only realizations that are new or
+whose file changed are recalculated, everything else is read back from the
+store, so percentile tables can be re-derived after re-running a few
+realizations without reprocessing the whole run.
+
+Results are also kept with the parameters of the calculation (i.e. failure
+definitions and a version of the worker). A store made with different
+parameters is discarded, so changing how metrics are calculated recalculates
+every realization even when none of the files changed.
+
+    store = RealizationMetricsStore(141, ['failure_periods', 'magnitudes'],
+                                    parameters = {'version' : 1})
+    store.update(filenames, calculateShortfallMetrics)
+    failure_periods = store.get('failure_periods')  # (realization x ...)
+
+@author: dgorelick
+"""
+
+import os
+import json
+import hashlib
+import numpy as np
+
+
+def file_checksum(filename):
+    md5 = hashlib.md5()
+    with open(filename, 'rb') as f:
+        for block in iter(lambda: f.read(2**20), b''):
+            md5.update(block)
+    return md5.hexdigest()
+
+
+def file_signature(filename, checksum = True):
+    stats = os.stat(filename)
+    signature = {'path' : filename, 'size' : stats.st_size, 'mtime' : stats.st_mtime}
+    if checksum:
+        signature['md5'] = file_checksum(filename)
+    return signature
+
+
+class RealizationMetricsStore:
+    def __init__(self, run, metrics, path = '.', parameters = None):
+        self.run = int(run)
+        self.metrics = list(metrics)
+        self.path = path
+        # as read back from the index (tuples become lists)
+        self.parameters = json.loads(json.dumps(parameters))
+        self.signatures = {}
+        self.results = {}
+
+        if os.path.exists(self.index_filename()) and os.path.exists(self.data_filename()):
+            self.load()
+
+    def index_filename(self):
+        return os.path.join(self.path, 'realization_metrics_' + str(self.run) + '.json')
+
+    def data_filename(self):
+        return os.path.join(self.path, 'realization_metrics_' + str(self.run) + '.npz')
+
+    @property
+    def realizations(self):
+        return sorted(self.results.keys())
+
+    def load(self):
+        with open(self.index_filename(), 'r') as f:
+            index = json.load(f)
+        # results stored for other metrics or calculated with other
+        # parameters can not be reused
+        if index['metrics'] != self.metrics or index.get('parameters') != self.parameters:
+            return
+        self.signatures = {int(r): s for r, s in index['signatures'].items()}
+
+        with np.load(self.data_filename(), allow_pickle = False) as stored:
+            realizations = stored['realizations']
+            metric_data = [stored[m] for m in self.metrics]
+        for i, r in enumerate(realizations):
+            self.results[int(r)] = [data[i] for data in metric_data]
+
+    def save(self):
+        os.makedirs(self.path, exist_ok = True)
+        realizations = self.realizations
+        if len(realizations) == 0:
+            return
+        np.savez(self.data_filename() + '.tmp.npz', realizations = np.array(realizations),
+                 **{m: np.stack([self.results[r][i] for r in realizations])
+                    for i, m in enumerate(self.metrics)})
+        os.replace(self.data_filename() + '.tmp.npz', self.data_filename())
+
+        with open(self.index_filename(), 'w') as f:
+            json.dump({'run' : self.run, 'metrics' : self.metrics, 'parameters' : self.parameters,
+                       'signatures' : {str(r): self.signatures[r] for r in realizations}}, f)
+
+    def changed(self, realization, filename):
+        # quick check on size and modification time, the checksum is only
+        # compared when those differ (i.e. a file copied again unchanged)
+        if realization not in self.results:
+            return True
+        stored = self.signatures[realization]
+        stats = os.stat(filename)
+        if stored['path'] == filename and stored['size'] == stats.st_size and \
+            stored['mtime'] == stats.st_mtime:
+            return False
+        if stored['size'] != stats.st_size:
+            return True
+        if file_checksum(filename) != stored['md5']:
+            return True
+
+        # same contents, remember the new location and time
+        self.signatures[realization] = file_signature(filename, checksum = False)
+        self.signatures[realization]['md5'] = stored['md5']
+        return False
+
+    def update(self, filenames, worker, realizations = None, n_processes = None):
+        # recalculate new or changed realizations in parallel with
+        # worker(filename), which returns one array per metric
+        # realizations are numbered 1 to n unless given
+        if realizations is None:
+            realizations = range(1, len(filenames) + 1)
+        realizations = [int(r) for r in realizations]
+
+        pending = [(r, f) for r, f in zip(realizations, filenames) if self.changed(r, f)]
+
+        if len(pending) > 0:
+            from multiprocessing import Pool
+            with Pool(n_processes) as pool:
+                results = pool.map(worker, [f for r, f in pending])
+            for (r, f), result in zip(pending, results):
+                self.results[r] = [np.asarray(x) for x in result]
+                self.signatures[r] = file_signature(f)
+
+        self.save()
+        return [r for r, f in pending]
+
+    def get(self, metric, realizations = None):
+        # (realization x ...) array of a metric
+        if realizations is None:
+            realizations = self.realizations
+        i = self.metrics.index(metric)
+        return np.stack([self.results[int(r)][i] for r in realizations])
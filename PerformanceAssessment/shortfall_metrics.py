@@ -0,0 +1,305 @@
+# -*- coding: utf-8 -*-
+"""
+Supply shortfall reliability, severity and magnitude for a run
+
+Reads only the slack variables of each realization's cleaned AMPL file once
+and calculates, for each of 20 365-day years:
+    1) failure periods: number of 30-day periods of continuous shortfall,
+       for all sources (any slack > 0), all sources except SCH (> 1 mgd)
+       and only SCH (> 1 mgd), as in Reliability_vulnerability_calcs*.m
+    2) 30-day moving shortfall magnitude: largest mean slack of each source
+       over a day and the 30 days after it, as in magnitudes.m
+Realizations are processed in parallel and the percentile tables are written
+to the Reliability/, Severity/ and Magnitude/ files read by the plotting
+scripts (plot_rel_vul_quantiles_by_scen*.py, failure_magnitudes_*.py, ...)
+
+sweepShortfallDefinitions repeats the failure period calculation for a grid of
+shortfall thresholds and window lengths to test sensitivity to the definition
+(by default over the 'no_sch' sources, so a 1 mgd threshold and 30-day window
+gives the 'no_sch' tables)
+
+The same tables are also stored in each run's metrics cube (see metrics_cube.py)
+and per-realization results are kept so only new or changed realization files
+are read when a run is updated (see realization_metrics_store.py)
+
+@author: dgorelick
+"""
+
+import os
+import re
+import numpy as np
+from glob import glob
+from analysis_functions import register_AMPL_columns, read_AMPL_cleaned_columns
+from objective_calculation_functions import findViolationEvents
+from metrics_cube import MetricsCube
+from realization_metrics_store import RealizationMetricsStore
+
+# slack variables of each source in cleaned AMPL files
+# (named as in yield_slacks.mat used by the MATLAB scripts)
+SHORTFALL_SOURCE_COLUMNS = {'Alafia'    : 'ngw_slack__Alafia',
+                            'TBC'       : 'ngw_slack__TBC',
+                            'Reservoir' : 'ngw_slack__Reservoir',
+                            'SCH'       : 'wup_mavg_pos__SCH',
+                            'SCH3'      : 'sch_demand__sch3_slack',
+                            'BUD'       : 'wup_mavg_pos__BUD',
+                            'CWUP'      : 'wup_mavg_pos__CWUP'}
+SHORTFALL_SOURCES = list(SHORTFALL_SOURCE_COLUMNS.keys())
+
+register_AMPL_columns('shortfall_metrics',
+                      optional = list(SHORTFALL_SOURCE_COLUMNS.values()))
+
+# failure definitions: sources checked and slack that counts as a shortfall
+FAILURE_DEFINITIONS = {'all'      : (SHORTFALL_SOURCES, 0),
+                       'no_sch'   : (['Alafia', 'TBC', 'Reservoir', 'BUD', 'CWUP'], 1),
+                       'only_sch' : (['SCH', 'SCH3'], 1)}
+
+# output files for each failure definition, {run} is the run number
+RELIABILITY_FILES = {'all'      : 'Reliability/reliability_30_day_run{run}.csv',
+                     'no_sch'   : 'Reliability/reliability_1mgd_30_day_no_sch_{run}.csv',
+                     'only_sch' : 'Reliability/reliability_only_SCH_{run}.csv'}
+SEVERITY_FILES = {'all'      : 'Severity/failure_duration_quantiles_30_day_run{run}.csv',
+                  'no_sch'   : 'Severity/failure_1mgd_duration_no_sch_{run}.csv',
+                  'only_sch' : 'Severity/failure_duration_only_SCH_{run}.csv'}
+MAGNITUDE_FILE = 'Magnitude/{source}_mov30_{run}.csv'
+
+N_YEARS = 20
+DAYS_PER_YEAR = 365
+FAILURE_PERIOD_DAYS = 30
+MOVING_AVERAGE_DAYS = 31 # day and the 30 days after it
+
+# parameters per-realization results are stored with, results calculated
+# with other parameters are recalculated (increase the version when
+# calculateShortfallMetrics changes)
+SHORTFALL_METRICS_VERSION = 1
+SHORTFALL_METRICS_PARAMETERS = {'version'             : SHORTFALL_METRICS_VERSION,
+                                'source_columns'      : SHORTFALL_SOURCE_COLUMNS,
+                                'failure_definitions' : FAILURE_DEFINITIONS,
+                                'n_years'             : N_YEARS,
+                                'days_per_year'       : DAYS_PER_YEAR,
+                                'failure_period_days' : FAILURE_PERIOD_DAYS,
+                                'moving_average_days' : MOVING_AVERAGE_DAYS}
+
+
+def getShortfallSlacks(AMPL_cleaned_data):
+    # (day x source) array of slack, sources not tracked are 0
+    slacks = np.zeros([len(AMPL_cleaned_data), len(SHORTFALL_SOURCES)])
+    for i, source in enumerate(SHORTFALL_SOURCES):
+        if SHORTFALL_SOURCE_COLUMNS[source] in AMPL_cleaned_data.columns:
+            slacks[:,i] = AMPL_cleaned_data[SHORTFALL_SOURCE_COLUMNS[source]].fillna(0)
+
+    return slacks
+
+
+def countFailurePeriods(in_failure, n_years = N_YEARS,
+                        period_days = FAILURE_PERIOD_DAYS):
+    # number of period_days-long stretches of continuous failure in each
+    # year, a 60 day failure counts as two periods and failures are not
+    # continued from one year into the next
+    annual_failure = in_failure[:n_years * DAYS_PER_YEAR].reshape(n_years, DAYS_PER_YEAR)
+    year, start, length = findViolationEvents(annual_failure)
+
+    return np.bincount(year, weights = length // period_days, minlength = n_years)
+
+
+def calculateMovingShortfallMagnitudes(slacks, n_years = N_YEARS,
+                                       window = MOVING_AVERAGE_DAYS):
+    # largest moving average slack of each source among windows starting in
+    # each year (windows must end within the record), negative means are 0
+    cumulative = np.vstack((np.zeros([1, slacks.shape[1]]), np.cumsum(slacks, axis = 0)))
+    moving_average = (cumulative[window:,:] - cumulative[:-window,:]) / window
+    moving_average = np.fmax(moving_average, 0)
+
+    magnitudes = np.zeros([n_years, slacks.shape[1]])
+    for year in range(n_years):
+        year_windows = moving_average[year * DAYS_PER_YEAR:(year + 1) * DAYS_PER_YEAR,:]
+        if len(year_windows) > 0:
+            magnitudes[year,:] = year_windows.max(axis = 0)
+
+    return magnitudes
+
+
+def calculateShortfallMetrics(filename, n_years = N_YEARS):
+    # worker: failure periods (definition x year) and moving shortfall
+    # magnitudes (year x source) for one realization
+    slacks = getShortfallSlacks(read_AMPL_cleaned_columns(filename, ['shortfall_metrics']))
+
+    failure_periods = np.zeros([len(FAILURE_DEFINITIONS), n_years])
+    for d, (sources, threshold) in enumerate(FAILURE_DEFINITIONS.values()):
+        source_index = [SHORTFALL_SOURCES.index(s) for s in sources]
+        in_failure = (slacks[:,source_index] > threshold).any(axis = 1)
+        failure_periods[d,:] = countFailurePeriods(in_failure, n_years)
+
+    return failure_periods, calculateMovingShortfallMagnitudes(slacks, n_years)
+
+
+def collectShortfallMetrics(filenames, n_years = N_YEARS, n_processes = None):
+    # failure periods (realization x definition x year) and moving
+    # shortfall magnitudes (realization x year x source) for a run
+    failure_periods = np.zeros([len(filenames), len(FAILURE_DEFINITIONS), n_years])
+    magnitudes = np.zeros([len(filenames), n_years, len(SHORTFALL_SOURCES)])
+
+    from multiprocessing import Pool
+    from functools import partial
+    with Pool(n_processes) as pool:
+        for r, (realization_failure_periods, realization_magnitudes) in enumerate(
+                pool.imap(partial(calculateShortfallMetrics, n_years = n_years),
+                          filenames, chunksize = 8)):
+            failure_periods[r,:,:] = realization_failure_periods
+            magnitudes[r,:,:] = realization_magnitudes
+
+    return failure_periods, magnitudes
+
+
+def updateShortfallMetrics(run, filenames, realizations = None, store_path = '.',
+                           n_processes = None):
+    # same as collectShortfallMetrics, but results of each realization are
+    # kept in a store so only new or changed realization files are read
+    store = RealizationMetricsStore(run, ['failure_periods', 'magnitudes'], store_path,
+                                    SHORTFALL_METRICS_PARAMETERS)
+    if realizations is None:
+        realizations = range(1, len(filenames) + 1)
+    store.update(filenames, calculateShortfallMetrics, realizations, n_processes)
+
+    return store.get('failure_periods', realizations), store.get('magnitudes', realizations)
+
+
+def addShortfallMetricsToCube(cube, failure_periods, magnitudes):
+    # store reliability and failure periods of each failure definition and
+    # moving shortfall magnitude of each source in a run's MetricsCube
+    for d, definition in enumerate(FAILURE_DEFINITIONS.keys()):
+        cube.add('reliability', definition, (failure_periods[:,d,:] > 0).mean(axis = 0))
+        cube.add('failure_periods', definition,
+                 percentilesAcrossRealizations(failure_periods[:,d,:]).T)
+    for s, source in enumerate(SHORTFALL_SOURCES):
+        cube.add('magnitude', source, percentilesAcrossRealizations(magnitudes[:,:,s]).T)
+
+    return cube
+
+
+def findShortfallEvents(slacks, threshold, sources = SHORTFALL_SOURCES,
+                        n_years = N_YEARS):
+    # events of continuous shortfall (slack of any of the sources above
+    # threshold) within each year, sorted by start day, with the total
+    # slack of the sources over the event as its magnitude
+    source_index = [SHORTFALL_SOURCES.index(s) for s in sources]
+    record_slack = slacks[:n_years * DAYS_PER_YEAR, source_index]
+    in_failure = (record_slack > threshold).any(axis = 1)
+    year, start, length = findViolationEvents(in_failure.reshape(n_years, DAYS_PER_YEAR))
+
+    start = year * DAYS_PER_YEAR + start
+    cumulative = np.concatenate(([0], np.cumsum(np.fmax(record_slack, 0).sum(axis = 1))))
+    magnitude = cumulative[start + length] - cumulative[start]
+
+    return year, start, length, magnitude
+
+
+def sweepShortfallRealization(filename, thresholds, windows,
+                              sources = FAILURE_DEFINITIONS['no_sch'][0], n_years = N_YEARS):
+    # worker: for one realization, number of failure periods of each
+    # window length (threshold x window x year), the longest continuous
+    # shortfall (threshold x year) and the largest total slack of a
+    # shortfall (threshold x year), events are found once per threshold
+    slacks = getShortfallSlacks(read_AMPL_cleaned_columns(filename, ['shortfall_metrics']))
+    windows = np.asarray(windows)
+
+    failure_periods = np.zeros([len(thresholds), len(windows), n_years])
+    longest_shortfall = np.zeros([len(thresholds), n_years])
+    largest_shortfall = np.zeros([len(thresholds), n_years])
+    for t, threshold in enumerate(thresholds):
+        year, start, length, magnitude = findShortfallEvents(slacks, threshold,
+                                                             sources, n_years)
+        for w, window in enumerate(windows):
+            failure_periods[t,w,:] = np.bincount(year, weights = length // window,
+                                                 minlength = n_years)
+        np.maximum.at(longest_shortfall[t,:], year, length)
+        np.maximum.at(largest_shortfall[t,:], year, magnitude)
+
+    return failure_periods, longest_shortfall, largest_shortfall
+
+
+def sweepShortfallDefinitions(filenames, thresholds = [0, 0.5, 1, 2, 5],
+                              windows = [7, 14, 30, 60, 90],
+                              sources = FAILURE_DEFINITIONS['no_sch'][0], n_years = N_YEARS,
+                              n_processes = None):
+    # sensitivity of reliability and severity to the failure definition,
+    # every threshold (mgd) and window (days) is evaluated in one pass over
+    # each realization. returns
+    #   reliability:       (threshold x window x year) fraction of realizations
+    #                      with at least one failure period
+    #   failure_periods:   (threshold x window x year x percentile)
+    #   longest_shortfall: (threshold x year x percentile) days
+    #   largest_shortfall: (threshold x year x percentile) total slack of the
+    #                      largest shortfall (mgd-days)
+    # percentiles are 1 to 100
+    failure_periods = np.zeros([len(filenames), len(thresholds), len(windows), n_years])
+    longest_shortfall = np.zeros([len(filenames), len(thresholds), n_years])
+    largest_shortfall = np.zeros([len(filenames), len(thresholds), n_years])
+
+    from multiprocessing import Pool
+    from functools import partial
+    with Pool(n_processes) as pool:
+        for r, (realization_failure_periods, realization_longest_shortfall,
+                realization_largest_shortfall) in enumerate(
+                pool.imap(partial(sweepShortfallRealization, thresholds = thresholds,
+                                  windows = windows, sources = sources, n_years = n_years),
+                          filenames, chunksize = 8)):
+            failure_periods[r,:,:,:] = realization_failure_periods
+            longest_shortfall[r,:,:] = realization_longest_shortfall
+            largest_shortfall[r,:,:] = realization_largest_shortfall
+
+    return {'thresholds'        : np.asarray(thresholds),
+            'windows'           : np.asarray(windows),
+            'reliability'       : (failure_periods > 0).mean(axis = 0),
+            'failure_periods'   : np.moveaxis(percentilesAcrossRealizations(failure_periods), 0, -1),
+            'longest_shortfall' : np.moveaxis(percentilesAcrossRealizations(longest_shortfall), 0, -1),
+            'largest_shortfall' : np.moveaxis(percentilesAcrossRealizations(largest_shortfall), 0, -1)}
+
+
+def percentilesAcrossRealizations(data):
+    # percentiles 1 to 100 along the first axis, interpolated the same way
+    # as MATLAB prctile so tables match those made by the .m scripts
+    return np.percentile(data, np.arange(1, 101), axis = 0, method = 'hazen')
+
+
+def writeShortfallMetrics(failure_periods, magnitudes, run, out_path = '.'):
+    # reliability: fraction of realizations with a 30-day failure each year
+    # severity: (percentile x year) failure periods
+    # magnitude: (year x percentile) 30-day moving shortfall per source
+    for d, definition in enumerate(FAILURE_DEFINITIONS.keys()):
+        reliability_file = os.path.join(out_path, RELIABILITY_FILES[definition].format(run = run))
+        severity_file = os.path.join(out_path, SEVERITY_FILES[definition].format(run = run))
+        os.makedirs(os.path.dirname(reliability_file), exist_ok = True)
+        os.makedirs(os.path.dirname(severity_file), exist_ok = True)
+        np.savetxt(reliability_file, (failure_periods[:,d,:] > 0).mean(axis = 0),
+                   delimiter = ',', fmt = '%.10g')
+        np.savetxt(severity_file, percentilesAcrossRealizations(failure_periods[:,d,:]),
+                   delimiter = ',', fmt = '%.10g')
+
+    for s, source in enumerate(SHORTFALL_SOURCES):
+        magnitude_file = os.path.join(out_path, MAGNITUDE_FILE.format(source = source, run = run))
+        os.makedirs(os.path.dirname(magnitude_file), exist_ok = True)
+        np.savetxt(magnitude_file, percentilesAcrossRealizations(magnitudes[:,:,s]).T,
+                   delimiter = ',', fmt = '%.10g')
+
+
+if __name__ == '__main__':
+    runs = [125, 141, 142, 143, 144]
+    run_path = 'F:/MonteCarlo_Project/Cornell_UNC/cleaned_AMPL_files/run{run}'
+
+    for run in runs:
+        # only realizations with a cleaned file in the run folder,
+        # numbered by their file name (ampl_0001.csv is realization 1)
+        realization_files = {}
+        for filename in glob(os.path.join(run_path.format(run = str(10000 + run)[1:]), 'ampl_*.csv')):
+            match = re.fullmatch(r'ampl_(\d+)\.csv', os.path.basename(filename))
+            if match is not None:
+                realization_files[int(match.group(1))] = filename
+        realizations = sorted(realization_files.keys())
+        if len(realizations) == 0:
+            print('No cleaned AMPL files for run ' + str(run))
+            continue
+
+        filenames = [realization_files[r] for r in realizations]
+        failure_periods, magnitudes = updateShortfallMetrics(run, filenames, realizations)
+        writeShortfallMetrics(failure_periods, magnitudes, run)
+        addShortfallMetricsToCube(MetricsCube(run), failure_periods, magnitudes).save()
@@ -11,52 +11,46 @@ import os
 import matplotlib.pyplot as plt 
 import matplotlib
 import matplotlib.cm as cm 
-from analysis_functions import read_AMPL_csv
-from objective_calculation_functions import getGWPermitViolations, getSWPermitViolations, getMonitoringWellViolations, calculateLevelOfService, calculateEnvironmentalSustainability
+from analysis_functions import read_AMPL_csv, read_AMPL_cleaned_columns
+from objective_calculation_functions import getGWPermitViolations, getSWPermitViolations, getMonitoringWellViolations, calculateLevelOfService, calculateAnnualLevelOfService, calculateEnvironmentalSustainability
 import seaborn as sns
 sns.set()
 
-def plotLOSQuantiles(n_rel, figureName):
-        
-    # load each cleaned AMPL outfile and store in a list
-    all_ampl = list()
+def readAnnualLevelOfService(filename, n_years = 20):
+    # worker: read only level of service columns of one realization and
+    # return its annual reliability/vulnerability, the frame is discarded
+    realization_data = read_AMPL_cleaned_columns(filename, ['level_of_service'])
+    realization_data.fillna(0, inplace=True)
     
-    for rel in range(1,n_rel):
-        if rel < 10:
-            num_str = '000'+ str(rel)
-        elif rel < 100:
-            num_str = '00' + str(rel)
-        else:
-            num_str = '0' + str(rel)
-        realization_data = pd.read_csv('Cleaned_zip/cleaned/ampl_' + num_str + 
-                                       '.csv')#, usecols=AMPL_cols)
-        realization_data.fillna(0, inplace=True)
-        
-        all_ampl.append(realization_data)
+    return calculateAnnualLevelOfService(realization_data, n_years)
+
+
+def plotLOSQuantiles(n_rel, figureName, realizations = None, n_processes = None):
+    # realizations 1 to n_rel-1 are used unless a list of realization ids
+    # is given (i.e. a demand band from demand_index.select_demand_band)
+    if realizations is None:
+        realizations = range(1, n_rel)
+    filenames = ['Cleaned_zip/cleaned/ampl_' + str(10000 + rel)[1:] + '.csv' 
+                 for rel in realizations]
     
     # Calculate LOS metrics for each year (missing leap years, fix later?)
-    annual_LOS_rel = np.zeros([n_rel, 20])
-    annual_LOS_vul = np.zeros([n_rel, 20])
-    
-    # loop through each realization
-    for rel in range(0, n_rel-1):
-        current_rel = all_ampl[rel]
-        
-        for day in np.linspace(0, 6935, 20):
-            day = int(day)
-            year = int(day/365)
-            current_year = current_rel.iloc[day:day+365]
-            annual_LOS_rel[rel, year], annual_LOS_vul[rel, year] = calculateLevelOfService(current_year)
+    # in parallel, keeping only the (realization x year) results
+    n_years = 20
+    annual_LOS_rel = np.zeros([len(filenames), n_years])
+    annual_LOS_vul = np.zeros([len(filenames), n_years])
     
+    from multiprocessing import Pool
+    from functools import partial
+    with Pool(n_processes) as pool:
+        for rel, (rel_by_year, vul_by_year) in enumerate(
+                pool.imap(partial(readAnnualLevelOfService, n_years = n_years), 
+                          filenames, chunksize = 8)):
+            annual_LOS_rel[rel, :len(rel_by_year)] = rel_by_year
+            annual_LOS_vul[rel, :len(vul_by_year)] = vul_by_year
     
-    # Calculate percentiles across realizations        
-    LOS_rel = np.zeros([20,100])
-    LOS_vul = np.zeros([20,100])        
-    # Extract 90th percentile from each LOS
-    for year in range(0,20):
-        for p in range(0,100):
-            LOS_rel[year,p] = np.percentile(annual_LOS_rel[:,year], (p+1))
-            LOS_vul[year,p] = np.percentile(annual_LOS_vul[:,year], (p+1))
+    # Calculate percentiles 1 to 100 across realizations for every year
+    LOS_rel = np.percentile(annual_LOS_rel, np.arange(1, 101), axis = 0).T
+    LOS_vul = np.percentile(annual_LOS_vul, np.arange(1, 101), axis = 0).T
     
     
     # plot time varying distribution    
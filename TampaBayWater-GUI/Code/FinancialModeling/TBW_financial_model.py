@@ -140,18 +140,40 @@ def estimate_VariableRate(annual_estimate,
     # applied to the Uniform Rate.
     return estimated_variable_costs/annual_estimate * uniform_rate
 
+### columns of cleaned AMPL output read by the model, registered with
+### the AMPL loaders in pull_ModeledData so only these columns are read
+### (slack is not tracked in every run, trigger variable is a placeholder)
+MEMBER_DELIVERY_AMPL_COLUMNS = ['wf_prod__NWH', 'wf_prod__CRW', 'pflow__NWPL',
+                                'pflow__THIC', 'pflow__LP_NW',
+                                'wtp_eff__MT', 'pflow__MT_LR',
+                                'wtp_eff__LR', 'wtp_eff__OD', 'pflow__41PS', 'pflow__LBBS',
+                                'pflow__RPIC',
+                                'wtp_eff__CH', 'wtp_eff__LT', 'pflow__Q_LT', 'pflow__SCH3',
+                                'wtp_eff__CM', 'pflow__L_STP',
+                                'pflow__MBPS']
+MEMBER_DEMAND_AMPL_COLUMNS = ['demand__NWH_1', 'demand__NWH_2',
+                              'demand__NPR',
+                              'demand__PAS_1', 'demand__PAS_2', 'demand__PAS_3', 'demand__PAS_4',
+                              'demand__PIN',
+                              'demand__SCH_1', 'demand__SCH_2', 'demand__SCH_3',
+                              'demand__STP',
+                              'demand__COT', 'pflow__J_COT']
+SUPPLY_SLACK_AMPL_COLUMNS = ['wup_mavg_pos__CWUP',
+                             'wup_mavg_pos__SCH',
+                             'wup_mavg_pos__BUD',
+                             'ngw_slack__Alafia',
+                             'ngw_slack__Reservoir',
+                             'ngw_slack__TBC',
+                             'sch_demand__sch3_slack']
+FINANCIAL_MODEL_AMPL_COLUMNS = {'required' : MEMBER_DELIVERY_AMPL_COLUMNS + MEMBER_DEMAND_AMPL_COLUMNS,
+                                'optional' : SUPPLY_SLACK_AMPL_COLUMNS + ['Trigger Variable']}
+
 def get_DailySupplySlack(csv_out):
     ### water supply model deliveries do not account for slack, which is
     ### only recorded on the supply side, not the delivery/demand side
     ### so we need to get all slack for the days we are looking at
     import pandas as pd
-    slack_source_variables = ['wup_mavg_pos__CWUP',
-                              'wup_mavg_pos__SCH',
-                              'wup_mavg_pos__BUD', 
-                              'ngw_slack__Alafia',
-                              'ngw_slack__Reservoir',
-                              'ngw_slack__TBC', 
-                              'sch_demand__sch3_slack']
+    slack_source_variables = SUPPLY_SLACK_AMPL_COLUMNS
     
     # initialize vectors of NaN for each variable
     slack_sources = np.zeros([len(csv_out),
@@ -854,11 +876,14 @@ def pull_ModeledData(additional_scripts_path, orop_output_path, oms_output_path,
     AMPL_cleaned_data = [np.nan]; TBC_raw_sales_to_CoT = [np.nan]; Year = [np.nan]; Month = [np.nan]
     one_thousand_added_to_read_files = 1000; n_days_in_year = 365
     if end_fiscal_year > first_modeled_fy: # meaning the last FY modeled financially is 2020
-        os.chdir(additional_scripts_path); from analysis_functions import read_AMPL_csv, read_AMPL_out
+        os.chdir(additional_scripts_path); from analysis_functions import read_AMPL_csv, read_AMPL_out, register_AMPL_columns, read_AMPL_cleaned_columns, select_AMPL_columns
+        register_AMPL_columns('financial_model', **FINANCIAL_MODEL_AMPL_COLUMNS)
         if PRE_CLEANED:
-            AMPL_cleaned_data = pd.read_csv(orop_output_path + '/ampl_0' + str(one_thousand_added_to_read_files + realization_id)[1:] + '.csv')
+            # only read columns used by the model
+            AMPL_cleaned_data = read_AMPL_cleaned_columns(orop_output_path + '/ampl_0' + str(one_thousand_added_to_read_files + realization_id)[1:] + '.csv', ['financial_model'])
         else:
             AMPL_cleaned_data = read_AMPL_csv(orop_output_path + '/ampl_0' + str(one_thousand_added_to_read_files + realization_id)[1:] + '.csv', export = False)
+            AMPL_cleaned_data = AMPL_cleaned_data[select_AMPL_columns(AMPL_cleaned_data.columns, ['financial_model'])].copy()
         ndays_of_realization = len(AMPL_cleaned_data.iloc[:,0])
         
         # until water supply model is changed to include infrastructure adjustment
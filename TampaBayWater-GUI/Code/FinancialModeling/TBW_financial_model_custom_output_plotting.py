@@ -12,6 +12,7 @@ import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
+from realization_plotting import plot_panels
 sns.set()
 data_path = "C:/Users/cmpet/OneDrive/Documents/UNCTBW/Modeloutput"
 dv_path = 'C:/Users/cmpet/OneDrive/Documents/UNC Chapel Hill/TBW/Code/TampaBayWater/FinancialModeling'
@@ -116,20 +117,10 @@ for f in range(0,len(formulation_to_plot)):
                     print('ERROR: CANNOT LOCATE ITEM: ' + item)
            
         # plot a long row of subplots together for as many 
-        # variables as have been chosen to visualize
-        fig, axs = plt.subplots(1, len(data_names_to_plot), sharey = False, figsize = (5*len(data_names_to_plot),5))
-        
-        # if plotting a single realization, make a special case
-        if len(realization_to_plot) == 1:
-            for ax, y_data, series_name in zip(axs.flat, hold_all_data_to_plot, data_names_to_plot):
-                ax.plot(metrics['Fiscal Year'].values, y_data[0,:])
-                ax.set_title(series_name)
-                ax.set_xticklabels([int(x) for x in metrics['Fiscal Year'].values], rotation = 90)
-        else:
-            for ax, y_data, series_name in zip(axs.flat, hold_all_data_to_plot, data_names_to_plot):
-                ax.boxplot(y_data[:,:])
-                ax.set_title(series_name)
-                ax.set_xticklabels([int(x) for x in metrics['Fiscal Year'].values], rotation = 90)
+        # variables as have been chosen to visualize, each panel draws
+        # all realizations at once (as traces, or as percentile fan
+        # bands when there are many realizations)
+        fig, axs = plot_panels(metrics['Fiscal Year'].values, hold_all_data_to_plot, data_names_to_plot)
                 
         # output and close figure to avoid overloading memory
         plt.savefig(data_path + '/Custom_Outputs_Plot_f' + str(formulation_to_plot[f]) + '_s' + str(simulation_to_plot[s]) + (('_SINGLE_REALIZATION_r' + str(realization_to_plot[r])) if len(realization_to_plot) == 1 else '') + '.png', bbox_inches= 'tight', dpi = 400)
@@ -13,6 +13,7 @@ import numpy as np
 from openpyxl import load_workbook
 import matplotlib.pyplot as plt
 import seaborn as sns
+from realization_plotting import draw_realizations
 sns.set()
 
 
@@ -176,17 +177,10 @@ for f in range(0,len(formulation_to_plot)):
         # variables as have been chosen to visualize
         #fig, axs = plt.subplots(1, 1, sharey = False, figsize = (5,5))
 
-        # if plotting a single realization, make a special case
-        if len(simulation_to_plot) == 1:
-            #for ax, y_data, series_name in zip(axs, hold_all_data_to_plot, data_name_to_plot):
-            axs.plot(metrics['Fiscal Year'].values, hold_all_data_to_plot[0])
-            axs.set_title(data_name_to_plot)
-            axs.set_xticklabels(metrics['Fiscal Year'].values.astype(int), rotation = 90)
-        else:
-            #for ax, y_data, series_name in zip(axs, hold_all_data_to_plot, data_name_to_plot):
-            axs.boxplot(hold_all_data_to_plot[:][:])
-            axs.set_title(data_name_to_plot)
-            axs.set_xticklabels(metrics['Fiscal Year'].values.astype(int), rotation = 90)
+        # all simulations are drawn at once, as traces or as
+        # percentile fan bands when there are many simulations
+        draw_realizations(axs, metrics['Fiscal Year'].values, hold_all_data_to_plot)
+        axs.set_title(data_name_to_plot)
 
         axs.set_xlabel('Fiscal Year')
         axs.set_ylabel("USD$")
@@ -142,18 +142,40 @@ def estimate_VariableRate(annual_estimate,
     # applied to the Uniform Rate.
     return estimated_variable_costs/annual_estimate * uniform_rate
 
+### columns of cleaned AMPL output read by the model, registered with
+### the AMPL loaders in pull_ModeledData so only these columns are read
+### (slack is not tracked in every run, trigger variable is a placeholder)
+MEMBER_DELIVERY_AMPL_COLUMNS = ['wf_prod__NWH', 'wf_prod__CRW', 'pflow__NWPL',
+                                'pflow__THIC', 'pflow__LP_NW',
+                                'wtp_eff__MT', 'pflow__MT_LR',
+                                'wtp_eff__LR', 'wtp_eff__OD', 'pflow__41PS', 'pflow__LBBS',
+                                'pflow__RPIC',
+                                'wtp_eff__CH', 'wtp_eff__LT', 'pflow__Q_LT', 'pflow__SCH3',
+                                'wtp_eff__CM', 'pflow__L_STP',
+                                'pflow__MBPS']
+MEMBER_DEMAND_AMPL_COLUMNS = ['demand__NWH_1', 'demand__NWH_2',
+                              'demand__NPR',
+                              'demand__PAS_1', 'demand__PAS_2', 'demand__PAS_3', 'demand__PAS_4',
+                              'demand__PIN',
+                              'demand__SCH_1', 'demand__SCH_2', 'demand__SCH_3',
+                              'demand__STP',
+                              'demand__COT', 'pflow__J_COT']
+SUPPLY_SLACK_AMPL_COLUMNS = ['wup_mavg_pos__CWUP',
+                             'wup_mavg_pos__SCH',
+                             'wup_mavg_pos__BUD',
+                             'ngw_slack__Alafia',
+                             'ngw_slack__Reservoir',
+                             'ngw_slack__TBC',
+                             'sch_demand__sch3_slack']
+FINANCIAL_MODEL_AMPL_COLUMNS = {'required' : MEMBER_DELIVERY_AMPL_COLUMNS + MEMBER_DEMAND_AMPL_COLUMNS,
+                                'optional' : SUPPLY_SLACK_AMPL_COLUMNS + ['Trigger Variable']}
+
 def get_DailySupplySlack(csv_out):
     ### water supply model deliveries do not account for slack, which is
     ### only recorded on the supply side, not the delivery/demand side
     ### so we need to get all slack for the days we are looking at
     import pandas as pd
-    slack_source_variables = ['wup_mavg_pos__CWUP',
-                              'wup_mavg_pos__SCH',
-                              'wup_mavg_pos__BUD',
-                              'ngw_slack__Alafia',
-                              'ngw_slack__Reservoir',
-                              'ngw_slack__TBC',
-                              'sch_demand__sch3_slack']
+    slack_source_variables = SUPPLY_SLACK_AMPL_COLUMNS
 
     # initialize vectors of NaN for each variable
     slack_sources = np.zeros([len(csv_out),
@@ -842,11 +864,14 @@ def pull_ModeledData(additional_scripts_path, orop_output_path, oms_output_path,
     AMPL_cleaned_data = [np.nan]; TBC_raw_sales_to_CoT = [np.nan]; Year = [np.nan]; Month = [np.nan]
     one_thousand_added_to_read_files = 1000; n_days_in_year = 365
     if end_fiscal_year > first_modeled_fy: # meaning the last FY modeled financially is 2020
-        os.chdir(additional_scripts_path); from analysis_functions import read_AMPL_csv, read_AMPL_out
+        os.chdir(additional_scripts_path); from analysis_functions import read_AMPL_csv, read_AMPL_out, register_AMPL_columns, read_AMPL_cleaned_columns, select_AMPL_columns
+        register_AMPL_columns('financial_model', **FINANCIAL_MODEL_AMPL_COLUMNS)
         if PRE_CLEANED:
-            AMPL_cleaned_data = pd.read_csv(orop_output_path + '/ampl_0' + str(one_thousand_added_to_read_files + realization_id)[1:] + '.csv')
+            # only read columns used by the model
+            AMPL_cleaned_data = read_AMPL_cleaned_columns(orop_output_path + '/ampl_0' + str(one_thousand_added_to_read_files + realization_id)[1:] + '.csv', ['financial_model'])
         else:
             AMPL_cleaned_data = read_AMPL_csv(orop_output_path + '/ampl_0' + str(one_thousand_added_to_read_files + realization_id)[1:] + '.csv', export = False)
+            AMPL_cleaned_data = AMPL_cleaned_data[select_AMPL_columns(AMPL_cleaned_data.columns, ['financial_model'])].copy()
         ndays_of_realization = len(AMPL_cleaned_data.iloc[:,0])
 
         # until water supply model is changed to include infrastructure adjustment
@@ -2637,7 +2662,40 @@ import numpy as np; import pandas as pd
 from openpyxl import load_workbook
 from os.path import exists
 import sys
-sys.path.insert(1, 'Code/data_management')
+import os
+import json
+import time
+if 'Code/data_management' not in sys.path:
+    sys.path.insert(1, 'Code/data_management')
+from scenario_scheduler import scheduleSimulations, fanOutSimulationResults
+from sobol_analysis import SobolAnalysis, simulationOutputs, simulationOutputNames
+
+# progress reporting and pausing for the GUI job runner (model_jobs.py),
+# the GUI sets TBW_MODEL_PAUSE_FILE and waits for PROGRESS lines on stdout
+pause_file = os.environ.get('TBW_MODEL_PAUSE_FILE')
+
+def report_progress(simulation, realization, completed, total):
+    print('PROGRESS ' + json.dumps({'simulation' : int(simulation), 'realization' : int(realization),
+                                    'completed' : int(completed), 'total' : int(total)}), flush = True)
+
+def wait_while_paused():
+    while pause_file is not None and exists(pause_file):
+        time.sleep(1)
+
+# when run by the GUI's warm model worker (model_worker.py), input files read
+# by earlier runs are kept in input_cache and a preload run only reads inputs
+input_cache = globals().get('input_cache', {})
+preload_only = globals().get('preload_only', False)
+
+def read_input(filename, reader = pd.read_csv, **kwargs):
+    # read an input file, or copy it from the cache if it has not changed
+    key = (os.path.abspath(filename), os.path.getmtime(filename), reader.__name__,
+           json.dumps(kwargs, sort_keys = True))
+    if key not in input_cache:
+        for old_key in [k for k in input_cache if k[0] == key[0] and k[2:] == key[2:]]:
+            del input_cache[old_key]
+        input_cache[key] = reader(filename, **kwargs)
+    return input_cache[key].copy()
 
 # set data paths, differentiating local vs common path components
 # see past commits or vgrid_version branch for paths to run on TBW system
@@ -2660,9 +2718,10 @@ local_dv_du_path = 'parameters/' + run_name + BAR
 # Use this if on VGrid
 local_MC_database_path = r"F:/MonteCarlo_Project/Cornell_UNC/cleaned_AMPL_files/run"
 
-# open the error file
+# open the error file, a preload does not run the model so it leaves the
+# error file of the last run in place (its messages are reported by the run)
 err_filepath = local_base_path + 'Output/' + run_name + '/error_files/err_financial_model.txt'
-err = open(err_filepath, 'w')
+err = open(os.devnull if preload_only else err_filepath, 'w')
 
 # model simulation start and end dates
 start_FY = run_model_sheet['D2'].value
@@ -2690,6 +2749,21 @@ if exists(du_path) == False:
     err.write("\n")
 DUFs = pd.read_csv(du_path, header=None)
 
+# Saltelli design the DVs and DU factors were sampled from, if any (written
+# by the GUI), in which case the whole design is run so every group of
+# simulations needed for the Sobol indices is complete
+sobol_problem_path = local_base_path + local_data_sub_path + local_dv_du_path + 'sobol_problem.json'
+sobol_problem = None
+if exists(sobol_problem_path):
+    with open(sobol_problem_path) as problem_file:
+        sobol_problem = json.load(problem_file)
+    if len(DVs) != sobol_problem['num_simulations'] or len(DUFs) != sobol_problem['num_simulations']:
+        err.write("WARNING: Scenario files do not match the sampled Sobol design, Sobol indices are not computed")
+        err.write("\n")
+        sobol_problem = None
+    else:
+        num_sims = sobol_problem['num_simulations']
+
 ### ---------------------------------------------------------------------------
 # read in historic records
 historical_data_path = local_base_path + local_data_sub_path + '/model_input_data/'
@@ -2713,44 +2787,44 @@ if exists(historical_data_path + input_filenames_sheet['A2'].value) == False:
     err.write("ERROR: Water deliveries and sales file does not exist in required location")
     err.write("\n")
 else:
-    monthly_water_deliveries_and_sales = pd.read_csv(historical_data_path + input_filenames_sheet['A2'].value)
+    monthly_water_deliveries_and_sales = read_input(historical_data_path + input_filenames_sheet['A2'].value)
 
 if exists(historical_data_path + input_filenames_sheet['B2'].value) == False:
     err.write("ERROR: Projected annual budget file does not exist in required location")
     err.write("\n")
 else:
-    historical_annual_budget_projections = pd.read_csv(historical_data_path + input_filenames_sheet['B2'].value)
+    historical_annual_budget_projections = read_input(historical_data_path + input_filenames_sheet['B2'].value)
 
 if exists(historical_data_path + input_filenames_sheet['C2'].value) == False:
     err.write("ERROR: Actual annual budget file does not exist in required location")
     err.write("\n")
 else:
-    annual_budget_data = pd.read_csv(historical_data_path + input_filenames_sheet['C2'].value)
+    annual_budget_data = read_input(historical_data_path + input_filenames_sheet['C2'].value)
 
 if exists(historical_data_path + input_filenames_sheet['D2'].value) == False:
     err.write("ERROR: Existing file does not exist in required location")
     err.write("\n")
 else:
-    existing_debt = pd.read_csv(historical_data_path + input_filenames_sheet['D2'].value)
+    existing_debt = read_input(historical_data_path + input_filenames_sheet['D2'].value)
 
 if exists(historical_data_path + input_filenames_sheet['E2'].value) == False:
     err.write("ERROR: Potential projects file does not exist in required location")
     err.write("\n")
 else:
-    infrastructure_options = pd.read_csv(historical_data_path + input_filenames_sheet['E2'].value)
+    infrastructure_options = read_input(historical_data_path + input_filenames_sheet['E2'].value)
 
 if exists(historical_data_path + input_filenames_sheet['F2'].value) == False:
     err.write("ERROR: Current and future issued bond files does not exist in required location")
     err.write("\n")
 else:
-    current_debt_targets = pd.read_excel(historical_data_path + input_filenames_sheet['F2'].value, \
+    current_debt_targets = read_input(historical_data_path + input_filenames_sheet['F2'].value, pd.read_excel, \
                                          sheet_name = 'FutureDSTotals')
 
 if exists(historical_data_path + input_filenames_sheet['G2'].value) == False:
     err.write("ERROR: Projected 10-year CIP spending file does not exist in required location")
     err.write("\n")
 else:
-    projected_10year_CIP_spending = pd.read_csv(historical_data_path + input_filenames_sheet['G2'].value)
+    projected_10year_CIP_spending = read_input(historical_data_path + input_filenames_sheet['G2'].value)
 
 if exists(historical_data_path + input_filenames_sheet['H2'].value) == False:
     err.write("ERROR: Projected 10-year CIP spending (fraction of major projects)\
@@ -2758,13 +2832,13 @@ if exists(historical_data_path + input_filenames_sheet['H2'].value) == False:
     err.write("\n")
 else:
     projected_10year_CIP_spending_major_project_fraction = \
-        pd.read_csv(historical_data_path + input_filenames_sheet['H2'].value)
+        read_input(historical_data_path + input_filenames_sheet['H2'].value)
 
 if exists(historical_data_path + input_filenames_sheet['I2'].value) == False:
     err.write("ERROR: Normalized CIP file does not exist in required location")
     err.write("\n")
 else:
-    normalized_CIP_spending = pd.read_csv(historical_data_path + input_filenames_sheet['I2'].value)
+    normalized_CIP_spending = read_input(historical_data_path + input_filenames_sheet['I2'].value)
 
 if exists(historical_data_path + input_filenames_sheet['J2'].value) == False:
     err.write("ERROR: Normalized CIP (fraction of major projects)\
@@ -2772,21 +2846,21 @@ if exists(historical_data_path + input_filenames_sheet['J2'].value) == False:
     err.write("\n")
 else:
     normalized_CIP_spending_major_project_fraction = \
-        pd.read_csv(historical_data_path + input_filenames_sheet['J2'].value)
+        read_input(historical_data_path + input_filenames_sheet['J2'].value)
 
 if exists(historical_data_path + input_filenames_sheet['K2'].value) == False:
     err.write("ERROR: Projected first year RF balances file does not exist in required location")
     err.write("\n")
 else:
     projected_first_year_reserve_fund_balances = \
-        pd.read_csv(historical_data_path + input_filenames_sheet['K2'].value)
+        read_input(historical_data_path + input_filenames_sheet['K2'].value)
 
 if exists(historical_data_path + input_filenames_sheet['L2'].value) == False:
     err.write("ERROR: Projected first year RF deposits file does not exist in required location")
     err.write("\n")
 else:
     projected_10year_reserve_fund_deposits = \
-        pd.read_csv(historical_data_path + input_filenames_sheet['L2'].value)
+        read_input(historical_data_path + input_filenames_sheet['L2'].value)
 
 ### =========================================================================== ###
 ### RUN FINANCIAL MODEL OVER RANGE OF INFRASTRUCTURE SCENARIOS/FORMULATIONS
@@ -2794,7 +2868,7 @@ else:
 
 curr_run_id = run_model_sheet['C2'].value
 
-for run_id in [curr_run_id]: # NOTE: DAVID'S LOCAL CP ONLY HAS 125 RUN OUTPUT FOR TESTING
+for run_id in ([] if preload_only else [curr_run_id]): # NOTE: DAVID'S LOCAL CP ONLY HAS 125 RUN OUTPUT FOR TESTING
     # run for testing: run_id = 0125; sim = 0; r_id = 1
 
     ### ---------------------------------------------------------------------------
@@ -2812,10 +2886,21 @@ for run_id in [curr_run_id]: # NOTE: DAVID'S LOCAL CP ONLY HAS 125 RUN OUTPUT FO
     start_fy = start_FY; end_fy = end_FY
     #n_sims_tested = num_sims
     n_reals_tested = num_reals
+    realizations_to_run = [r for r in range(1,n_reals_tested+1) if r != 95]
+    n_completed = 0
+
+    # simulations with the same (canonical) DVs and DU factors are run once,
+    # results are then copied to the duplicate simulation IDs
+    simulation_groups = scheduleSimulations(DVs.values[:num_sims,:], DUFs.values[:num_sims,:])
+    print('Running ' + str(len(simulation_groups)) + ' unique of ' + str(num_sims) + ' simulations')
+
+    # Sobol indices of the objectives and of the covenant violations and
+    # uniform rate by fiscal year, updated as each simulation finishes
+    sobol = {}
     # NOTE: DAVID'S LOCAL CP ONLY HAS RUN 125 MC REALIZATION FILES 0-200 FOR TESTING
     #for sim in range(0,len(DVs)): # sim = 0 for testing
     #for sim in range(0,1): # FOR RUNNING HISTORICALLY ONLY
-    for sim in range(0,num_sims): # FOR RUNNING MULTIPLE SIMULATIONS
+    for sim in simulation_groups.keys(): # FOR RUNNING MULTIPLE SIMULATIONS
         ### ----------------------------------------------------------------------- ###
         ### RUN REALIZATION FINANCIALMODELACROSS SET OF REALIZATIONS
         ### ----------------------------------------------------------------------- ###
@@ -2835,6 +2920,7 @@ for run_id in [curr_run_id]: # NOTE: DAVID'S LOCAL CP ONLY HAS 125 RUN OUTPUT FO
             # seems to be an issue with run 95 .mat file, skip this realization
             if r_id == 95:
                 continue
+            wait_while_paused()
             budget_projection, actuals, outcomes, water_vars, final_debt = \
                 run_FinancialModelForSingleRealization(
                         start_fiscal_year = start_fy, end_fiscal_year = end_fy,
@@ -2870,6 +2956,9 @@ for run_id in [curr_run_id]: # NOTE: DAVID'S LOCAL CP ONLY HAS 125 RUN OUTPUT FO
             variable_rate_years = np.vstack((variable_rate_years, [x for x in actuals['Uniform Rate (Variable Portion)']]))
             total_deliveries_months = np.vstack((total_deliveries_months, [x for x in water_vars['Water Delivery - Uniform Sales Total']]))
 
+            n_completed += 1
+            report_progress(sim, r_id, n_completed, len(simulation_groups) * len(realizations_to_run))
+
         ### ---------------------------------------------------------------------------
         # reorganize data
         DC = pd.DataFrame(debt_covenant_years[1:,:]); DC.columns = [int(x) for x in debt_covenant_years[0,:]]
@@ -2891,12 +2980,13 @@ for run_id in [curr_run_id]: # NOTE: DAVID'S LOCAL CP ONLY HAS 125 RUN OUTPUT FO
         # 3: uniform date (average of greatest annual rate across realizations)
         Objective_UR_Highs = UR.max(axis = 1).mean()
 
-        # write objectives to outfile
-        sim_objectives = np.vstack((sim_objectives,
-                                    [sim,
-                                     Objective_DC_Violations,
-                                     Objective_RC_Violations,
-                                     Objective_UR_Highs]))
+        # write objectives to outfile, duplicate simulations share the results
+        for sim_id in [sim] + simulation_groups[sim]:
+            sim_objectives = np.vstack((sim_objectives,
+                                        [sim_id,
+                                         Objective_DC_Violations,
+                                         Objective_RC_Violations,
+                                         Objective_UR_Highs]))
 
         ### ---------------------------------------------------------------------------
         # plot Debt Covenant, Rate Covenant, Uniform Rate, Variable Rate, Water Deliveries
@@ -2911,9 +3001,21 @@ for run_id in [curr_run_id]: # NOTE: DAVID'S LOCAL CP ONLY HAS 125 RUN OUTPUT FO
         RC.to_csv(output_path + '/RC_f' + str(run_id) + '_s' + str(sim) + '.csv')
         UR.to_csv(output_path + '/UR_f' + str(run_id) + '_s' + str(sim) + '.csv')
 
+        fanOutSimulationResults(output_path, run_id, sim, simulation_groups[sim], realizations_to_run)
+
+        if sobol_problem is not None:
+            for per_year, filename in [(False, '/Sobol_indices_f'), (True, '/Sobol_indices_by_year_f')]:
+                if per_year not in sobol:
+                    sobol[per_year] = SobolAnalysis(sobol_problem['names'],
+                                                    simulationOutputNames(DC, RC, UR, per_year = per_year))
+                for sim_id in [sim] + simulation_groups[sim]:
+                    sobol[per_year].add(sim_id, simulationOutputs(DC, RC, UR, per_year = per_year))
+                sobol[per_year].indices().to_csv(output_path + filename + str(run_id) + '.csv')
+
     ### ---------------------------------------------------------------------------
     # write output file for all objectives
     Objectives = pd.DataFrame(sim_objectives[1:,:])
+    Objectives = Objectives.sort_values(0).reset_index(drop = True)
     Objectives.columns = ['Simulation ID',
                           'Debt Covenant Violation Frequency',
                           'Rate Covenant Violation Frequency',
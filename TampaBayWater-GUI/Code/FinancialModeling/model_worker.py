@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+"""
+Warm financial model worker for the TBW Financial Model GUI
+
+A long running process that imports the model's libraries once and then
+runs TBW_financial_model_vGUI.py in-process for every request, so repeat
+runs skip interpreter startup and imports. Input files read by a run are
+kept (see read_input in the model) and reused by later runs until they
+change. Requests are JSON lines on stdin,
+
+    {"id": 1, "script": "Code/FinancialModeling/TBW_financial_model_vGUI.py",
+     "pause_file": "...", "preload": false}
+
+where a preload request only reads the model inputs. Output of the model
+is passed through on stdout, between the lines
+
+    START {"id": 1}
+    DONE {"id": 1, "returncode": 0}
+
+which the GUI (model_jobs.ModelWorker) uses to tell runs apart.
+
+@author: dgorelick
+"""
+
+import os
+import sys
+import json
+import runpy
+import traceback
+
+# libraries used by the model, imported once for all runs
+import numpy as np
+import pandas as pd
+import openpyxl
+try:
+    import h5py
+except ImportError:
+    pass
+
+READY_LINE = 'READY'
+START_PREFIX = 'START '
+DONE_PREFIX = 'DONE '
+PAUSE_FILE_VARIABLE = 'TBW_MODEL_PAUSE_FILE'
+
+
+def run_request(request, input_cache):
+    # run the model script as if started with python, returns its exit code
+    script = os.path.abspath(request['script'])
+    if os.path.dirname(script) not in sys.path:
+        sys.path.insert(0, os.path.dirname(script))
+    if request.get('pause_file') is not None:
+        os.environ[PAUSE_FILE_VARIABLE] = request['pause_file']
+    else:
+        os.environ.pop(PAUSE_FILE_VARIABLE, None)
+
+    try:
+        runpy.run_path(script, run_name = '__main__',
+                       init_globals = {'input_cache' : input_cache,
+                                       'preload_only' : bool(request.get('preload', False))})
+    except SystemExit as exit:
+        return exit.code if isinstance(exit.code, int) else int(exit.code is not None)
+    except Exception as error:
+        # a preload may fail before the model is initialized, only runs report it in full
+        if request.get('preload', False):
+            print('Model inputs not preloaded: ' + str(error))
+        else:
+            traceback.print_exc(file = sys.stdout)
+        return 1
+    return 0
+
+
+def main():
+    input_cache = {}
+    print(READY_LINE, flush = True)
+    for line in sys.stdin:
+        if len(line.strip()) == 0:
+            continue
+        request = json.loads(line)
+        print(START_PREFIX + json.dumps({'id' : request['id']}), flush = True)
+        returncode = run_request(request, input_cache)
+        print(DONE_PREFIX + json.dumps({'id' : request['id'], 'returncode' : returncode}), flush = True)
+
+
+if __name__ == '__main__':
+    main()
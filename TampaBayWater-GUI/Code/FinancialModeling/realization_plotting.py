@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+"""
+Rendering of many realization (or simulation) timeseries at once
+
+Drawing every realization as its own line gets slow and unreadable past a
+few hundred realizations. Here all traces are drawn as a single
+LineCollection (TraceChart) or summarized as percentile fan bands
+(FanChart), both with optional highlighting of selected realizations.
+Charts keep their artists and update them in place, so redrawing for another
+variable or realization subset does not rebuild the axes.
+
+    fig, axs = plot_panels(fiscal_years, data, data_names_to_plot)
+
+where data is a list of (realization x fiscal year) arrays, one per panel.
+
+@author: dgorelick
+"""
+
+import numpy as np
+import matplotlib.pyplot as plt
+from matplotlib.collections import LineCollection
+
+# (lower, upper) percentiles of fan bands, outermost first
+FAN_PERCENTILES = [(0,100), (5,95), (25,75)]
+
+# above this many traces the 'auto' style draws fan bands
+MAX_TRACES = 50
+
+
+def percentile_bands(data, percentiles = FAN_PERCENTILES):
+    # percentiles across realizations of (realization x time) data in one call,
+    # returned as a dict of percentile -> (time) values, including the median
+    q = sorted(set([p for band in percentiles for p in band] + [50]))
+    values = np.nanpercentile(data, q, axis = 0)
+    return {p: values[i] for i, p in enumerate(q)}
+
+
+def trace_segments(x, data):
+    # (realization x time x 2) vertices for a LineCollection
+    data = np.atleast_2d(data)
+    return np.stack((np.broadcast_to(x, data.shape), data), axis = -1)
+
+
+class TraceChart:
+    def __init__(self, ax, color = 'darkseagreen', linewidth = 0.8, alpha = None,
+                 highlight_color = 'darkred'):
+        self.ax = ax
+        self.color = color
+        self.linewidth = linewidth
+        self.alpha = alpha
+        self.highlight_color = highlight_color
+        self.traces = None
+        self.highlights = None
+
+    def update(self, x, data, highlight = None):
+        # draw (realization x time) data, highlight is a list of row indices
+        data = np.atleast_2d(data)
+        # fade traces as their number grows so overlap stays readable
+        alpha = self.alpha if self.alpha is not None else min(1., max(0.05, 20. / len(data)))
+
+        if self.traces is None:
+            self.traces = LineCollection(trace_segments(x, data), colors = self.color,
+                                         linewidths = self.linewidth, alpha = alpha)
+            self.ax.add_collection(self.traces)
+            self.highlights = LineCollection([], colors = self.highlight_color,
+                                             linewidths = 2 * self.linewidth)
+            self.ax.add_collection(self.highlights)
+        else:
+            self.traces.set_segments(trace_segments(x, data))
+            self.traces.set_alpha(alpha)
+
+        self.highlights.set_segments(trace_segments(x, data[highlight]) if highlight is not None else [])
+        self.set_visible(True)
+        rescale(self.ax, x, data)
+
+    def set_visible(self, visible):
+        if self.traces is not None:
+            self.traces.set_visible(visible)
+            self.highlights.set_visible(visible)
+
+
+class FanChart:
+    def __init__(self, ax, percentiles = FAN_PERCENTILES, color = 'darkseagreen',
+                 median_color = 'darkgreen', highlight_color = 'darkred'):
+        self.ax = ax
+        self.percentiles = percentiles
+        self.color = color
+        self.median_color = median_color
+        self.highlight_color = highlight_color
+        self.bands = None
+        self.median = None
+        self.highlights = None
+
+    def update(self, x, data, highlight = None):
+        # draw percentile bands of (realization x time) data, inner bands darker
+        data = np.atleast_2d(data)
+        values = percentile_bands(data, self.percentiles)
+
+        if self.bands is None:
+            self.bands = [self.ax.fill_between(x, values[lower], values[upper], color = self.color,
+                                               alpha = 0.25 + 0.5 * i / len(self.percentiles), linewidth = 0)
+                          for i, (lower, upper) in enumerate(self.percentiles)]
+            self.median, = self.ax.plot(x, values[50], color = self.median_color, linewidth = 1.5)
+            self.highlights = LineCollection([], colors = self.highlight_color, linewidths = 1.5)
+            self.ax.add_collection(self.highlights)
+        else:
+            for band, (lower, upper) in zip(self.bands, self.percentiles):
+                band.set_verts([np.column_stack((np.concatenate((x, x[::-1])),
+                                                 np.concatenate((values[upper], values[lower][::-1]))))])
+            self.median.set_data(x, values[50])
+
+        self.highlights.set_segments(trace_segments(x, data[highlight]) if highlight is not None else [])
+        self.set_visible(True)
+        rescale(self.ax, x, data)
+
+    def set_visible(self, visible):
+        if self.bands is not None:
+            for band in self.bands:
+                band.set_visible(visible)
+            self.median.set_visible(visible)
+            self.highlights.set_visible(visible)
+
+
+def rescale(ax, x, data):
+    # collections are not included by relim, set the data limits directly
+    ax.dataLim.set_points(np.array([[np.nanmin(x), np.nanmin(data)], [np.nanmax(x), np.nanmax(data)]]))
+    ax.autoscale_view()
+
+
+def format_fiscal_year_axis(ax, fiscal_years):
+    ax.set_xticks(np.arange(int(np.min(fiscal_years)), int(np.max(fiscal_years)+1)))
+    ax.set_xticklabels(np.arange(int(np.min(fiscal_years)), int(np.max(fiscal_years)+1)), rotation = 90)
+    ax.set_xlim(np.min(fiscal_years)-1, np.max(fiscal_years)+1)
+
+
+def draw_realizations(ax, fiscal_years, data, style = 'auto', highlight = None):
+    # single panel of (realization x fiscal year) data as traces or a fan,
+    # 'auto' draws traces for up to MAX_TRACES realizations
+    if style == 'auto':
+        style = 'traces' if np.atleast_2d(data).shape[0] <= MAX_TRACES else 'fan'
+    chart = TraceChart(ax) if style == 'traces' else FanChart(ax)
+    chart.update(np.asarray(fiscal_years, dtype = float), data, highlight = highlight)
+    format_fiscal_year_axis(ax, fiscal_years)
+    return chart
+
+
+def plot_panels(fiscal_years, data, names, style = 'auto', highlight = None, panel_size = 5):
+    # one row of panels, one per variable, data is a list of
+    # (realization x fiscal year) arrays in the order of names
+    fig, axs = plt.subplots(1, len(names), sharey = False, figsize = (panel_size*len(names), panel_size),
+                            squeeze = False)
+    for ax, y_data, series_name in zip(axs.flat, data, names):
+        draw_realizations(ax, fiscal_years, y_data, style = style, highlight = highlight)
+        ax.set_title(series_name)
+    return fig, axs.flat
@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+"""
+Deduplication of financial model simulations
+
+Each simulation is one row of financial_model_DVs.csv and
+financial_model_DUfactors.csv. Default scenarios fill every row the same
+and sampled designs can repeat rows or differ only in parameters the model
+does not use for that row, so every (DV, DUF) row is reduced to a canonical
+form and the model runs each distinct canonical scenario once. Results of
+the simulation that was run are then copied to the other simulation IDs
+with the same canonical scenario, so outputs look as if every simulation
+had been run.
+
+    simulation_groups = scheduleSimulations(DVs.values, DUFs.values)
+    for sim, duplicates in simulation_groups.items():
+        ... run simulation sim ...
+        fanOutSimulationResults(output_path, run_id, sim, duplicates, realizations)
+
+@author: dgorelick
+"""
+
+import os
+import glob
+import shutil
+import numpy as np
+
+# positions of parameters in the DV and DUF rows, as read by the model
+KEEP_UNIFORM_RATE_STABLE_DV = 2
+MANAGED_RATE_INCREASE_DV = 3
+MANAGED_RATE_DECREASE_DV = 4
+FLEXIBLE_CIP_SCHEDULE_DUF = 18
+FOLLOW_CIP_SCHEDULE_DUF = 19
+
+# per-realization output files written by run_FinancialModelForSingleRealization
+REALIZATION_OUTPUT_FILES = ['budget_projections', 'budget_actuals', 'financial_metrics',
+                            'final_debt_balance', 'water_deliveries_revenues']
+
+# per-simulation output files written after all realizations are run
+SIMULATION_OUTPUT_FILES = ['DC', 'RC', 'UR']
+
+
+def canonicalScenario(dvs, dufs, significant_digits = 12):
+    # canonical (DV, DUF) row, equal for rows the model treats the same
+    dvs = np.array(dvs, dtype = float); dufs = np.array(dufs, dtype = float)
+
+    # switches are only used rounded or as booleans
+    dvs[KEEP_UNIFORM_RATE_STABLE_DV] = np.round(dvs[KEEP_UNIFORM_RATE_STABLE_DV])
+    dufs[FLEXIBLE_CIP_SCHEDULE_DUF] = bool(dufs[FLEXIBLE_CIP_SCHEDULE_DUF])
+    dufs[FOLLOW_CIP_SCHEDULE_DUF] = bool(dufs[FOLLOW_CIP_SCHEDULE_DUF])
+
+    # managed rate bounds are not used unless the uniform rate is managed,
+    # but the model still checks that the increase bound >= decrease bound
+    if dvs[KEEP_UNIFORM_RATE_STABLE_DV] == 0 and \
+        dvs[MANAGED_RATE_INCREASE_DV] >= dvs[MANAGED_RATE_DECREASE_DV]:
+        dvs[MANAGED_RATE_INCREASE_DV] = 0
+        dvs[MANAGED_RATE_DECREASE_DV] = 0
+
+    # ignore differences from writing and reading back the csv files
+    row = np.concatenate((dvs, dufs))
+    return tuple(float('%.*g' % (significant_digits, x)) for x in row)
+
+
+def scheduleSimulations(DVs, DUFs, significant_digits = 12):
+    # simulation to run -> list of other simulation IDs with the same
+    # canonical scenario, in order of first appearance
+    simulation_groups = {}
+    first_simulation = {}
+    for sim in range(len(DVs)):
+        scenario = canonicalScenario(DVs[sim], DUFs[sim], significant_digits)
+        if scenario in first_simulation:
+            simulation_groups[first_simulation[scenario]].append(sim)
+        else:
+            first_simulation[scenario] = sim
+            simulation_groups[sim] = []
+    return simulation_groups
+
+
+def copyResultFile(source, destination):
+    # copies rather than hard links, as the model rewrites its output files
+    # in place and a later run would overwrite every linked simulation;
+    # an existing destination (possibly a link from an older version) is
+    # removed first so writing it cannot change another simulation's file
+    if os.path.exists(destination):
+        os.remove(destination)
+    shutil.copyfile(source, destination)
+
+
+def fanOutSimulationResults(output_path, formulation_id, simulation_id, duplicate_ids,
+                            realizations = None):
+    # copy output files of simulation_id to each duplicate simulation ID,
+    # all realizations found are copied unless realizations are given
+    prefix = '_f' + str(formulation_id) + '_s'
+    for name in REALIZATION_OUTPUT_FILES:
+        if realizations is None:
+            sources = glob.glob(os.path.join(output_path, name + prefix + str(simulation_id) + '_r*.csv'))
+        else:
+            sources = [os.path.join(output_path, name + prefix + str(simulation_id) + '_r' + str(r) + '.csv')
+                       for r in realizations]
+        for source in sources:
+            if not os.path.exists(source):
+                continue
+            realization_suffix = source[source.rindex('_r'):]
+            for duplicate in duplicate_ids:
+                copyResultFile(source, os.path.join(output_path, name + prefix + str(duplicate) + realization_suffix))
+
+    for name in SIMULATION_OUTPUT_FILES:
+        source = os.path.join(output_path, name + prefix + str(simulation_id) + '.csv')
+        if os.path.exists(source):
+            for duplicate in duplicate_ids:
+                copyResultFile(source, os.path.join(output_path, name + prefix + str(duplicate) + '.csv'))
@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+"""
+Streaming Sobol sensitivity analysis of financial model simulations
+
+Simulations follow a Saltelli design sampled without second order terms
+(SALib saltelli.sample(problem, N, calc_second_order = False)), where every
+group of D+2 consecutive simulations is (A, AB_1, ..., AB_D, B) for D
+parameters. Outputs of each simulation are added as soon as it finishes;
+once all simulations of a group are in, the group is folded into running
+sums and dropped, so memory does not grow with the size of the design.
+Only groups with simulations still running are kept.
+
+First order (Saltelli 2010) and total order (Jansen 1999) indices are the
+same estimators as SALib sobol.analyze. Confidence intervals come from an
+online (Poisson weighted) bootstrap over groups, so they can be updated with
+every group as well.
+
+    analysis = SobolAnalysis(problem['names'], OBJECTIVE_NAMES)
+    analysis.add(sim, simulationOutputs(DC, RC, UR))
+    analysis.indices().to_csv('sobol_indices.csv')
+
+@author: dgorelick
+"""
+
+import os
+import json
+import warnings
+import numpy as np
+import pandas as pd
+from scipy.stats import norm
+
+OBJECTIVE_NAMES = ['Debt Covenant Violation Frequency',
+                   'Rate Covenant Violation Frequency',
+                   'Peak Uniform Rate']
+
+
+def simulationOutputs(DC, RC, UR, per_year = False):
+    # outputs of a simulation from its (realization x FY) debt covenant,
+    # rate covenant and uniform rate tables: the three objectives of the
+    # model or, per year, the fraction of realizations violating each
+    # covenant and the mean uniform rate in every fiscal year
+    if per_year:
+        return np.concatenate(((DC.values < 1).mean(axis = 0),
+                               (RC.values < 1.25).mean(axis = 0),
+                               UR.values.mean(axis = 0)))
+    return np.array([(DC.values < 1).sum(axis = 0).max() / len(DC),
+                     (RC.values < 1.25).sum(axis = 0).max() / len(RC),
+                     UR.values.max(axis = 1).mean()])
+
+
+def simulationOutputNames(DC, RC, UR, per_year = False):
+    if per_year:
+        return [name + ' ' + str(year) for name, table in zip(OBJECTIVE_NAMES, [DC, RC, UR])
+                for year in table.columns]
+    return list(OBJECTIVE_NAMES)
+
+
+class SobolAnalysis:
+    def __init__(self, names, output_names, n_bootstrap = 1000, confidence = 0.95, seed = None):
+        self.names = list(names)
+        self.output_names = list(output_names)
+        self.n_bootstrap = n_bootstrap
+        self.confidence = confidence
+        self.group_size = len(self.names) + 2
+        self.rng = np.random.default_rng(seed)
+        self.pending = {}
+
+        # running sums for the estimate (weight 0) and each bootstrap replicate
+        n_weights, D, O = n_bootstrap + 1, len(self.names), len(self.output_names)
+        self.n = np.zeros(n_weights)
+        self.f = np.zeros((n_weights, O))
+        self.f2 = np.zeros((n_weights, O))
+        self.first = np.zeros((n_weights, D, O))
+        self.difference = np.zeros((n_weights, D, O))
+        self.total = np.zeros((n_weights, D, O))
+
+    @property
+    def n_groups(self):
+        return int(self.n[0])
+
+    def add(self, simulation, outputs):
+        # outputs of one simulation, (output) vector in the order of output_names
+        group, position = divmod(int(simulation), self.group_size)
+        outputs = np.asarray(outputs, dtype = float)
+        if outputs.shape != (len(self.output_names),):
+            raise ValueError('Expected ' + str(len(self.output_names)) + ' outputs for simulation ' +
+                             str(simulation) + ', got shape ' + str(outputs.shape))
+
+        self.pending.setdefault(group, {})[position] = outputs
+        if len(self.pending[group]) == self.group_size:
+            rows = self.pending.pop(group)
+            self.accumulate(np.stack([rows[p] for p in range(self.group_size)])[np.newaxis])
+
+    def accumulate(self, Y):
+        # fold complete groups, Y is (group x D+2 x output)
+        fA = Y[:,0,:]; fAB = Y[:,1:-1,:]; fB = Y[:,-1,:]
+        weights = np.column_stack((np.ones(len(Y)), self.rng.poisson(1., size = (len(Y), self.n_bootstrap))))
+
+        self.n += weights.sum(axis = 0)
+        self.f += weights.T @ (fA + fB)
+        self.f2 += weights.T @ (fA**2 + fB**2)
+        self.first += np.einsum('gw,gdo->wdo', weights, fB[:,np.newaxis,:] * (fAB - fA[:,np.newaxis,:]))
+        self.difference += np.einsum('gw,gdo->wdo', weights, fAB - fA[:,np.newaxis,:])
+        self.total += np.einsum('gw,gdo->wdo', weights, (fA[:,np.newaxis,:] - fAB)**2)
+
+    def _estimates(self):
+        # first and total order indices of the estimate and each replicate
+        with np.errstate(invalid = 'ignore', divide = 'ignore'):
+            n = self.n[:,np.newaxis]
+            mean = self.f / (2 * n)
+            variance = self.f2 / (2 * n) - mean**2
+            # fB centered on the mean, as SALib standardizes outputs, which
+            # keeps the bootstrap spread from depending on the output level
+            first = self.first - mean[:,np.newaxis,:] * self.difference
+            S1 = first / n[:,:,np.newaxis] / variance[:,np.newaxis,:]
+            ST = 0.5 * self.total / n[:,:,np.newaxis] / variance[:,np.newaxis,:]
+        return S1, ST
+
+    def indices(self):
+        # (parameter x output) table of indices with confidence intervals,
+        # intervals are z * standard deviation of replicates as in SALib
+        S1, ST = self._estimates()
+        z = norm.ppf(0.5 + self.confidence / 2)
+        # outputs constant across simulations have no (NaN) indices
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+            S1_conf = z * np.nanstd(S1[1:], axis = 0)
+            ST_conf = z * np.nanstd(ST[1:], axis = 0)
+
+        D, O = len(self.names), len(self.output_names)
+        return pd.DataFrame({'Output'    : np.tile(self.output_names, D),
+                             'Parameter' : np.repeat(self.names, O),
+                             'S1'        : S1[0].ravel(),
+                             'S1 Conf'   : S1_conf.ravel(),
+                             'ST'        : ST[0].ravel(),
+                             'ST Conf'   : ST_conf.ravel(),
+                             'Groups'    : self.n_groups})
+
+    def save(self, filename):
+        # keep the running sums and incomplete groups to continue later
+        pending_simulations = [g * self.group_size + p for g, rows in self.pending.items() for p in rows]
+        pending_outputs = [self.pending[s // self.group_size][s % self.group_size] for s in pending_simulations]
+        np.savez(filename + '.tmp.npz', n = self.n, f = self.f, f2 = self.f2,
+                 first = self.first, difference = self.difference, total = self.total,
+                 pending_simulations = np.array(pending_simulations, dtype = int),
+                 pending_outputs = np.array(pending_outputs).reshape(-1, len(self.output_names)),
+                 settings = json.dumps({'names' : self.names, 'output_names' : self.output_names,
+                                        'n_bootstrap' : self.n_bootstrap, 'confidence' : self.confidence,
+                                        'rng' : self.rng.bit_generator.state}))
+        os.replace(filename + '.tmp.npz', filename)
+
+    @classmethod
+    def load(cls, filename):
+        with np.load(filename, allow_pickle = False) as stored:
+            settings = json.loads(str(stored['settings']))
+            analysis = cls(settings['names'], settings['output_names'],
+                           settings['n_bootstrap'], settings['confidence'])
+            analysis.rng.bit_generator.state = settings['rng']
+            for name in ['n', 'f', 'f2', 'first', 'difference', 'total']:
+                setattr(analysis, name, stored[name])
+            for s, outputs in zip(stored['pending_simulations'], stored['pending_outputs']):
+                analysis.pending.setdefault(int(s) // analysis.group_size, {})[int(s) % analysis.group_size] = outputs
+        return analysis
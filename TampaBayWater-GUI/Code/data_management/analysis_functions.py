@@ -5,6 +5,63 @@ import re
 # FUNCTIONS TO DO BASIC DATA READING AND MANIPULATION OPERATIONS FOR TBW DATA
 # D GORELICK (APR 2019)
 
+# columns of cleaned AMPL files needed by each analysis. modules that use
+# AMPL output declare their columns with register_AMPL_columns so loaders
+# only read the union of columns needed by the analyses being run
+#   required: columns that must exist in the file
+#   optional: columns read if they exist (i.e. slack not tracked in all runs)
+#   prefixes: all columns starting with these (i.e. 'targetoffset_neg__')
+AMPL_COLUMN_REGISTRY = {}
+
+def register_AMPL_columns(analysis, required = [], optional = [], prefixes = []):
+    AMPL_COLUMN_REGISTRY[analysis] = {'required' : list(required), 
+                                      'optional' : list(optional), 
+                                      'prefixes' : list(prefixes)}
+
+
+
+def select_AMPL_columns(available_columns, analyses):
+    # collect union of columns declared by all active analyses
+    required = []; optional = []; prefixes = []
+    for analysis in analyses:
+        if analysis not in AMPL_COLUMN_REGISTRY:
+            raise KeyError('No AMPL columns registered for analysis ' + str(analysis) + 
+                           ', registered: ' + ', '.join(AMPL_COLUMN_REGISTRY.keys()))
+        required += AMPL_COLUMN_REGISTRY[analysis]['required']
+        optional += AMPL_COLUMN_REGISTRY[analysis]['optional']
+        prefixes += AMPL_COLUMN_REGISTRY[analysis]['prefixes']
+    
+    # check all required columns exist before reading any data
+    available_columns = [str(c) for c in available_columns]
+    available_set = set(available_columns)
+    missing = [c for c in dict.fromkeys(required) if c not in available_set]
+    if len(missing) > 0:
+        raise KeyError('AMPL data is missing columns required by ' + 
+                       ', '.join(analyses) + ': ' + ', '.join(missing))
+    
+    # keep file column order
+    wanted = set(required + optional)
+    prefixes = tuple(prefixes)
+    return [c for c in available_columns if c in wanted or 
+            (len(prefixes) > 0 and c.startswith(prefixes))]
+
+
+
+def read_AMPL_cleaned_columns(filename, analyses):
+    # read only the columns of a cleaned AMPL csv needed by the analyses
+    available_columns = pd.read_csv(filename, nrows = 0).columns
+    use_columns = select_AMPL_columns(available_columns, analyses)
+    
+    # if none of the columns are in the file (i.e. only optional slack
+    # columns that were not tracked), still keep one row per day so
+    # callers see missing columns as they would with the full file
+    if len(use_columns) == 0:
+        n_rows = len(pd.read_csv(filename, usecols = [0]))
+        return pd.DataFrame(index = pd.RangeIndex(n_rows))
+    
+    return pd.read_csv(filename, usecols = use_columns)[use_columns]
+
+
 def read_AMPL_csv(in_path, out_path, filename, export = True):
     # read in file
     csv_out = pd.read_csv(in_path + filename, sep = ',') # about a year is 50,000 rows
@@ -4,15 +4,42 @@ from tkinter import ttk
 import subprocess
 import sys
 import os
+import json
+import threading
 from tkinter import font
-import pandas as pd
-import numpy as np
-from openpyxl import load_workbook
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import (FigureCanvasTkAgg, NavigationToolbar2Tk)
-from SALib.sample import saltelli
-import seaborn as sns
-sns.set()
+from model_jobs import ModelWorker, format_progress, format_duration
+sys.path.insert(1, 'Code/FinancialModeling')
+
+# the window is shown before the heavy libraries are imported: numpy, pandas,
+# openpyxl and SALib are imported in the background after startup, matplotlib
+# and seaborn when the first figure is plotted
+np = None; pd = None; saltelli = None
+plt = None; result_cache = None; result_figures = None
+import_lock = threading.Lock()
+
+def import_libraries():
+    # safe to call from any thread, waits for an import already in progress
+    global np, pd, saltelli
+    with import_lock:
+        if saltelli is None:
+            import numpy as np
+            import pandas as pd
+            import openpyxl
+            from SALib.sample import saltelli
+
+def import_plotting():
+    # pyplot uses the Tk backend, so this is only called on the main thread
+    global plt, result_cache, result_figures
+    if result_figures is None:
+        import_libraries()
+        import matplotlib.pyplot as plt
+        import seaborn as sns
+        sns.set()
+        from result_browser import ResultCache
+        # outputs of recent runs are kept in memory, each (formulation,
+        # simulation) has its own figure, reused between plots
+        result_cache = ResultCache(max_runs = 4)
+        result_figures = {}
 
 #### ==================================
 # 0 - Setting up the frame
@@ -128,6 +155,7 @@ def open_popup(text_out):
 
 # make csv file for entry into both model and plotting
 def store_finmod_deets():
+    import_libraries()
     df = pd.DataFrame([[main_folder_loc_var.get(), run_name_var.get(), int(run_id_var.get()), int(start_fy_var.get()), 
                    int(end_fy_var.get()), int(num_reals_var.get()), int(num_sim_var.get())]], 
                    columns=['main_folder_loc', 'run_name', 'run_id', 'start_fy', 'end_fy', 'num_reals', 'num_sim'])
@@ -497,6 +525,7 @@ def scenarios_done():
     open_popup(popup_printout)
 
 def gen_default_scenario():
+    import_libraries()
     err_file = main_folder_loc_entry.get() + 'Output/' + run_name_entry.get() + '/error_files/err_generate_scenarios.txt'
     err = open(err_file, 'w')
     num_simulations = int(num_sim_entry.get())
@@ -553,6 +582,7 @@ def gen_default_scenario():
 
 
 def gen_one_new_scenario():
+    import_libraries()
     err_file_path = main_folder_loc_entry.get() + '/Output/' + run_name_entry.get() + '/error_files/err_generate_scenarios.txt'
 
     err = open(err_file_path, 'w')
@@ -688,6 +718,7 @@ def gen_one_new_scenario():
     open_popup(popup_str)
 
 def gen_alt_scenarios():
+    import_libraries()
     err_file_path = main_folder_loc_entry.get() + '/Output/' + run_name_entry.get() + '/error_files/err_generate_scenarios.txt'
     err = open(err_file_path, 'w')
 
@@ -695,9 +726,6 @@ def gen_alt_scenarios():
     if num_simulations <= 1:
         err.write("ERROR: Too few simulations.\nPlease use two or more simulations if generating more than one alternative scenario.")
 
-    # decision variables
-    dvs = np.zeros((num_simulations,11), dtype=float)
-
     KEEP_UNIFORM_RATE_STABLE = 0
 
     if clicked_cip_schedule.get() == "Yes":
@@ -769,34 +797,14 @@ def gen_alt_scenarios():
                                                          high=float(rf_fund_fraction_high.get()),
                                                          size=(num_simulations,))
     '''
-    decvar_values = saltelli.sample(dec_vars, num_simulations, calc_second_order=False)
-
-    # fill decision variable matrix
-    dvs[:,0] = decvar_values[:,0]  # covenant_threshold_net_revenue_plus_fund_balance
-    dvs[:,1] = decvar_values[:,1]   # debt_covenant_required_ratio
-    dvs[:,2].fill(KEEP_UNIFORM_RATE_STABLE)
-    dvs[:,3] = decvar_values[:,3]   # managed_uniform_rate_increase_rate
-    dvs[:,4] = decvar_values[:,4]   # managed_uniform_rate_decrease_rate
-    dvs[:,5] = decvar_values[:,5]  # previous_FY_unaccounted_fraction_of_total_enterprise_fund
-    dvs[:,6] = decvar_values[:,6]   # debt_service_cap_fraction_of_gross_revenues
-    dvs[:,7] = decvar_values[:,7]   # rr_fund_floor_fraction_of_gross_revenues
-    dvs[:,8] = decvar_values[:,8]   # cip_fund_floor_fraction_of_gross_revenues
-    dvs[:,9] = decvar_values[:,9]    #energy_fund_floor_fraction_of_gross_revenues
-    dvs[:,10] = decvar_values[:,10]   # reserve_fund_floor_fraction_of_gross_revenues
-
-    dvs_filepath = main_folder_loc_entry.get() + 'Data/parameters/' + run_name_entry.get() + "/financial_model_DVs.csv"
-    np.savetxt(dvs_filepath, dvs, delimiter=",")
-
     # DU factors
-    dufs  = np.zeros((num_simulations,20), dtype=float)
-
     FLEXIBLE_CIP_SCHEDULE_TOGGLE = 0
     FOLLOW_CIP_SCHEDULE_TOGGLE = 0
 
     # if user does not want to use default DU factor values
     # set decision variables
 
-    du_vars = {'num_vars': 10,
+    du_vars = {'num_vars': 18,
         'names': ['rate_stabilization_minimum_ratio', 
                   'rate_stabilization_maximum_ratio', 
                   'fraction_variable_operational_cost', 
@@ -908,7 +916,38 @@ def gen_alt_scenarios():
                                                          size=(num_simulations,))
     '''
 
-    dufs = saltelli.sample(dec_vars, num_simulations, calc_second_order=False)
+    # one Saltelli design over every DV and DU factor with a range, the
+    # number of simulations entered is the number of base samples N, giving
+    # N*(D+2) simulations for D varying parameters; parameters with equal
+    # bounds are held at that value and left out of the Sobol problem
+    # (DV column 2 is KEEP_UNIFORM_RATE_STABLE, DU columns 18-19 are the CIP toggles)
+    parameters = [('DV', column, name, bounds) for column, name, bounds in
+                  zip([0,1,3,4,5,6,7,8,9,10], dec_vars['names'], dec_vars['bounds'])] + \
+                 [('DU', column, name, bounds) for column, name, bounds in
+                  zip(range(18), du_vars['names'], du_vars['bounds'])]
+    varying = [p for p in parameters if p[3][0] < p[3][1]]
+    sobol_problem = {'num_vars': len(varying),
+                     'names': [p[2] for p in varying],
+                     'bounds': [p[3] for p in varying]}
+
+    if len(varying) > 0:
+        design = saltelli.sample(sobol_problem, num_simulations, calc_second_order=False)
+    else:
+        err.write("WARNING: All scenario bounds are equal, no parameters are sampled.\n")
+        design = np.zeros((num_simulations,0))
+    num_design_simulations = len(design)
+
+    dvs = np.zeros((num_design_simulations,11), dtype=float)
+    dufs = np.zeros((num_design_simulations,20), dtype=float)
+    dvs[:,2].fill(KEEP_UNIFORM_RATE_STABLE)
+    dufs[:,18].fill(FLEXIBLE_CIP_SCHEDULE_TOGGLE)
+    dufs[:,19].fill(FOLLOW_CIP_SCHEDULE_TOGGLE)
+    for table, column, name, bounds in parameters:
+        values = dvs if table == 'DV' else dufs
+        if name in sobol_problem['names']:
+            values[:,column] = design[:,sobol_problem['names'].index(name)]
+        else:
+            values[:,column].fill(bounds[0])
     '''
     dufs[:,0] = rate_stabilization_minimum_ratio
     dufs[:,1] = rate_stabilization_maximum_ratio
@@ -931,14 +970,27 @@ def gen_alt_scenarios():
     dufs[:,18].fill(FLEXIBLE_CIP_SCHEDULE_TOGGLE)
     dufs[:,19].fill(FOLLOW_CIP_SCHEDULE_TOGGLE)
     '''
+    dvs_filepath = main_folder_loc_entry.get() + 'Data/parameters/' + run_name_entry.get() + "/financial_model_DVs.csv"
+    np.savetxt(dvs_filepath, dvs, delimiter=",")
     dufs_filepath = main_folder_loc_entry.get() + 'Data/parameters/' + run_name_entry.get() + "/financial_model_DUfactors.csv"
     np.savetxt(dufs_filepath, dufs, delimiter=",")
 
+    # sampled problem, the model runs the whole design and computes Sobol
+    # indices of the objectives from it
+    problem_filepath = main_folder_loc_entry.get() + 'Data/parameters/' + run_name_entry.get() + "/sobol_problem.json"
+    if len(varying) > 0:
+        sobol_problem['num_simulations'] = num_design_simulations
+        with open(problem_filepath, 'w') as problem_file:
+            json.dump(sobol_problem, problem_file, indent = 4)
+    elif os.path.exists(problem_filepath):
+        os.remove(problem_filepath)
+    num_sim_var.set(str(num_design_simulations))
+
     err.write('End error file.')
     err.close()
 
     #myLabel = Label(frame_scenario_bounds, text='Done!', justify=LEFT, bg='moccasin').grid(row=18, column=5, sticky="we")
-    popup_str = "Done creating new financial scenarios.\nData can be found in\n'Data/parameters/" + run_name_entry.get() + "/'"
+    popup_str = "Done creating " + str(num_design_simulations) + " new financial scenarios.\nData can be found in\n'Data/parameters/" + run_name_entry.get() + "/'"
     open_popup(popup_str)
 
 #### ==================================
@@ -1028,18 +1080,20 @@ proj_rf_deposit_entry = Entry(frame_set_filenames, width=50)
 proj_rf_deposit_entry.insert(0,'projected_reserve_fund_deposits.csv')
 proj_rf_deposit_entry.grid(row=12, column=1)
 
-# Record filesnames
-df_filenames = pd.DataFrame([[prev_water_entry.get(), hist_est_budget_entry.get(), hist_act_budget_entry.get(), ext_debt_entry.get(),
-                              potential_projs_entry.get(), curr_future_bonds_entry.get(), og_cip_spending_entry.get(),
-                              og_cip_spending_major_entry.get(), norm_cip_spending_entry.get(), norm_cip_spending_major_entry.get(),
-                              proj_rf_start_bal_entry.get(), proj_rf_deposit_entry.get()]],
+# Record filesnames, written by the background startup once pandas is imported
+input_filenames = [prev_water_entry.get(), hist_est_budget_entry.get(), hist_act_budget_entry.get(), ext_debt_entry.get(),
+                   potential_projs_entry.get(), curr_future_bonds_entry.get(), og_cip_spending_entry.get(),
+                   og_cip_spending_major_entry.get(), norm_cip_spending_entry.get(), norm_cip_spending_major_entry.get(),
+                   proj_rf_start_bal_entry.get(), proj_rf_deposit_entry.get()]
+df_filenames_filepath = main_folder_loc_entry.get() + 'Data/model_input_data/model_initialization/input_filenames.xlsx'
 
-                            columns = ['prev_water', 'hist_est_budget', 'hist_act_budget', 'ext_debt', 'potential_projs', 'curr_future_bonds',
-                                       'og_cip_spending', 'og_cip_spending_major', 'norm_cip_spending', 'norm_cip_spending_major',
-                                       'proj_rf_bal', 'proj_rf_deposit'])
+def store_input_filenames():
+    df_filenames = pd.DataFrame([input_filenames],
 
-df_filenames_filepath = main_folder_loc_entry.get() + 'Data/model_input_data/model_initialization/input_filenames.xlsx'
-df_filenames.to_excel(df_filenames_filepath, index=False)
+                                columns = ['prev_water', 'hist_est_budget', 'hist_act_budget', 'ext_debt', 'potential_projs', 'curr_future_bonds',
+                                           'og_cip_spending', 'og_cip_spending_major', 'norm_cip_spending', 'norm_cip_spending_major',
+                                           'proj_rf_bal', 'proj_rf_deposit'])
+    df_filenames.to_excel(df_filenames_filepath, index=False)
 
 
 subframe_large = LabelFrame(sec_frame, width=800, height=480, borderwidth=0)
@@ -1074,19 +1128,99 @@ frame_run_model = LabelFrame(subframe_large, text="5-Run Model", padx=8, pady=8,
 frame_run_model.grid(row=1,column=0, padx=10, pady=10, sticky="ew")
 frame_run_model.grid_propagate(False)
 
+# the model runs as a background job so the window stays responsive,
+# progress is collected from the job every JOB_POLL_MS milliseconds
+JOB_POLL_MS = 500
+model_job = None
+model_job_run_name = ""
+
+# runs go to a warm model worker, started with the model inputs preloaded in
+# the background so the first run skips interpreter startup and reading inputs
+model_file = main_folder_loc_entry.get() + 'Code/FinancialModeling/TBW_financial_model_vGUI.py'
+model_worker = ModelWorker(main_folder_loc_entry.get() + 'Code/FinancialModeling/model_worker.py')
+
+def start_in_background():
+    import_libraries()
+    store_input_filenames()
+    try:
+        model_worker.preload(model_file)
+    except OSError as error:
+        print('Model worker not started: ' + str(error))
+
+startup_thread = threading.Thread(target=start_in_background, daemon=True)
+
 def running_model():
-    model_file = main_folder_loc_entry.get() + 'Code/FinancialModeling/TBW_financial_model_vGUI.py'
-    command = 'python ' + model_file
-    os.system(command)
-    popup_printout = "Model run complete.\nFind results in the 'Output/" + run_name_entry.get() + "/financial_model_results' folder."
+    global model_job, model_job_run_name
+    if model_job is not None and model_job.is_active():
+        open_popup("A model run is already in progress.\nCancel it before starting a new run.")
+        return
+
+    startup_thread.join()
+    model_job = model_worker.job(model_file)
+    model_job_run_name = run_name_entry.get()
+    model_job.start()
+    model_progress_var.set("Model run started...")
+    pause_button.config(text="Pause", state=NORMAL)
+    cancel_button.config(state=NORMAL)
+    root.after(JOB_POLL_MS, poll_model_job)
+
+def poll_model_job():
+    for event in model_job.poll():
+        if event['type'] == 'progress':
+            model_progress_var.set(format_progress(event))
+        elif event['type'] == 'output':
+            print(event['text'])
+
+    if model_job.is_active():
+        if model_job.status == 'paused':
+            model_progress_var.set("Paused - " + format_progress(model_job.last_progress)
+                                   if model_job.last_progress is not None else "Paused")
+        root.after(JOB_POLL_MS, poll_model_job)
+        return
+
+    pause_button.config(text="Pause", state=DISABLED)
+    cancel_button.config(state=DISABLED)
+    if model_job.status == 'finished':
+        model_progress_var.set("Model run complete in " + format_duration(model_job.elapsed()))
+        popup_printout = "Model run complete.\nFind results in the 'Output/" + model_job_run_name + "/financial_model_results' folder."
+    elif model_job.status == 'cancelled':
+        model_progress_var.set("Model run cancelled")
+        popup_printout = "Model run cancelled.\nResults of completed realizations are in the 'Output/" + model_job_run_name + "/financial_model_results' folder."
+    else:
+        model_progress_var.set("Model run failed")
+        popup_printout = "Model run failed.\nSee the console and 'Output/" + model_job_run_name + "/error_files' for details."
     open_popup(popup_printout)
 
+def pause_model():
+    if model_job is None:
+        return
+    if model_job.status == 'running':
+        model_job.pause()
+        pause_button.config(text="Resume")
+    elif model_job.status == 'paused':
+        model_job.resume()
+        pause_button.config(text="Pause")
+
+def cancel_model():
+    if model_job is not None:
+        model_job.cancel()
+
 run_model = Button(frame_run_model, text="Run Model", padx=10, pady=5, command=running_model,
                            fg='darkgreen', bg='palegreen', font=('HelvLight', 12, 'bold'), width=20).grid(row=2, column=0, sticky='W')
 
-emptyLab_runmodel = Label(frame_run_model, text="", justify=LEFT, bg='honeydew').grid(row=3, column=0, sticky = 'we')
+pause_button = Button(frame_run_model, text="Pause", padx=10, pady=5, command=pause_model, state=DISABLED,
+                      fg='darkgreen', bg='palegreen', font=('HelvLight', 12, 'bold'), width=8)
+pause_button.grid(row=2, column=1, sticky='W')
+
+cancel_button = Button(frame_run_model, text="Cancel", padx=10, pady=5, command=cancel_model, state=DISABLED,
+                       fg='darkgreen', bg='palegreen', font=('HelvLight', 12, 'bold'), width=8)
+cancel_button.grid(row=2, column=2, sticky='W')
+
+model_progress_var = StringVar(frame_run_model)
+emptyLab_runmodel = Label(frame_run_model, textvariable=model_progress_var, justify=LEFT, bg='honeydew').grid(row=3, column=0, columnspan=3, sticky = 'we')
 # Plot the figures
 def plot_data():
+    import_plotting()
     ACTUAL_VARIABLES = ['Fiscal Year', 'Uniform Rate (Full)', 'Uniform Rate (Variable Portion)',
                        'TBC Sales Rate', 'Interest Income', 'Gross Revenues', 'Debt Service',
                        'Acquisition Credits', 'Fixed Operational Expenses',
@@ -1134,13 +1268,7 @@ def plot_data():
     print('num_sim_value: ', num_sim_entry.get())
     results_path = main_folder_loc_entry.get() + 'Output/' + run_name_entry.get() + '/financial_model_results/'
 
-    metrics_test_read = pd.read_csv(results_path + 'financial_metrics_f' + str(formulation_to_plot[0]) +
-                                '_s' + str(simulation_to_plot[0]) + '_r' + str(realization_to_plot[0]) + '.csv',
-                                index_col = 0)
-
     dv_path = main_folder_loc_entry.get() + '/Data/parameters/' + run_name_entry.get() + '/'
-    DVs = pd.read_csv(dv_path + 'financial_model_DVs.csv', header = None)
-    DUFs = pd.read_csv(dv_path + 'financial_model_DUfactors.csv', header = None)
     err_filepath = main_folder_loc_entry.get() + '/Output/' + run_name_entry.get() + '/error_files/err_figures_gen.txt'
     err = open(err_filepath, 'w')
 
@@ -1170,79 +1298,43 @@ def plot_data():
     elif figure_to_plot == "Energy Savings Fund (Total)":
         data_name_to_plot = data_names_to_plot[10]
 
-    # loop through all results to report data
+    # realization 95 is skipped by the model
+    realization_to_plot = [r for r in realization_to_plot if r != 95]
+
+    # loop through all results to report data, each run is read
+    # only once and then kept in the result cache
     for f in range(0,len(formulation_to_plot)):
         print('Plotting output for Infrastructure Scenario 0' + str(formulation_to_plot[f]))
         for s in range(0,len(simulation_to_plot)):
             print('\tPlotting output for Simulation ' + str(simulation_to_plot[s]))
-            
-            # identify simulation conditions
-            dvs = [x for x in DVs.iloc[simulation_to_plot[s],:]]
-            dufs = [x for x in DUFs.iloc[simulation_to_plot[s],:]]
-            
-            # prepare data structure to hold collected data to plot
-            hold_all_data_to_plot = [np.empty(shape = (0, len(metrics_test_read['Fiscal Year'])))] * len(data_names_to_plot)
-            
-            # cycle through realizations to collect data
-            for r in range(0,len(realization_to_plot)):
-                print('\t\tCollecting output for Realization ' + str(realization_to_plot[r]))
-                
-                if realization_to_plot[r] == 95:
-                    continue
-                    
-                # read data input files
-                actuals = pd.read_csv(results_path + '/budget_actuals_f' + str(formulation_to_plot[f]) + '_s' + str(simulation_to_plot[s]) + '_r' + str(realization_to_plot[r]) + '.csv', index_col = 0)
-                budgets = pd.read_csv(results_path + '/budget_projections_f' + str(formulation_to_plot[f]) + '_s' + str(simulation_to_plot[s]) + '_r' + str(realization_to_plot[r]) + '.csv', index_col = 0)
-                metrics = pd.read_csv(results_path + '/financial_metrics_f' + str(formulation_to_plot[f]) + '_s' + str(simulation_to_plot[s]) + '_r' + str(realization_to_plot[r]) + '.csv', index_col = 0)
-
-                # collect data we want - reminder that actuals goes from
-                # 2 years before first modeled year (so 2019, if starting 2021)
-                # and ends at the final year (2039), budgets cover +1 year on 
-                # both sides (ex: 2020 to 2040), metrics are exact range (2021-2039)
-                # so they need to be trimmed to match up in time with just the
-                # modeled period...
-                for i in range(0,len(data_names_to_plot)):
-                    item = data_names_to_plot[i]
-                    if item in actuals.columns:
-                        print('\t\t\tCollecting ' + item + ' from actuals...') if r == 0 else None
-                        hold_all_data_to_plot[i] = np.append(hold_all_data_to_plot[i], [actuals[item].values[2:]], axis = 0)
-                        
-                    elif item in budgets.columns:
-                        print('\t\t\tCollecting ' + item + ' from budget...') if r == 0 else None
-                        hold_all_data_to_plot[i] = np.append(hold_all_data_to_plot[i], [budgets[item].values[1:-1]], axis = 0)
-                        
-                    elif item in metrics.columns:
-                        print('\t\t\tCollecting ' + item + ' from metrics...') if r == 0 else None
-                        hold_all_data_to_plot[i] = np.append(hold_all_data_to_plot[i], [metrics[item].values[:]], axis = 0)
-                        
-                    else:
-                        print('ERROR: CANNOT LOCATE ITEM: ' + item)
-            
-            # plot the selected figure
-            fig, axs = plt.subplots(1,1, sharey = False, figsize = (8,7))
-            # if plotting a single realization, make a special case and plot a line plot
-            if len(realization_to_plot) == 1:
-                axs.plot(metrics['Fiscal Year'].values, hold_all_data_to_plot[0])
-                axs.set_title(figure_to_plot)
-                axs.set_xticks(np.arange(int(np.min(metrics['Fiscal Year'].values)), int(np.max(metrics['Fiscal Year'].values)+1)))
-                axs.set_xticklabels(np.arange(int(np.min(metrics['Fiscal Year'].values)), int(np.max(metrics['Fiscal Year'].values)+1)), rotation = 90)
-                axs.set_xlim(np.min(metrics['Fiscal Year'].values)-1, np.max(metrics['Fiscal Year'].values)+1)
-            else:
-                #for ax, y_data, series_name in zip(axs, hold_all_data_to_plot, data_names_to_plot):
-                #ax.boxplot(y_data[:,:])
-                idx = data_names_to_plot.index(figure_to_plot)
-                axs.fill_between(metrics['Fiscal Year'].values, np.max(hold_all_data_to_plot[idx][:], axis = 0), np.min(hold_all_data_to_plot[idx][:], axis=0), 
-                                 alpha = 0.7, color='lightgreen',edgecolor='darkseagreen', linewidth=2)
-                
-                axs.set_title(data_name_to_plot)
-                axs.set_xticks(np.arange(int(np.min(metrics['Fiscal Year'].values)), int(np.max(metrics['Fiscal Year'].values)+1)))
-                axs.set_xticklabels(np.arange(int(np.min(metrics['Fiscal Year'].values)), int(np.max(metrics['Fiscal Year'].values)+1)), rotation = 90)
-                axs.set_xlim(np.min(metrics['Fiscal Year'].values)-1, np.max(metrics['Fiscal Year'].values)+1)
-                    
-            # output and close figure to avoid overloading memory
-            plt.savefig(results_path + '/Custom_Outputs_Plot_f' + str(formulation_to_plot[f]) + '_s' + str(simulation_to_plot[s]) + 
-                        (('_SINGLE_REALIZATION_r' + str(realization_to_plot[r])) if len(realization_to_plot) == 1 else '') + '.png', bbox_inches= 'tight', dpi = 400)
-            plt.show()
+
+            results = result_cache.get(results_path, formulation_to_plot[f], simulation_to_plot[s], realization_to_plot)
+            realizations_found = results.available(realization_to_plot)
+            if len(realizations_found) == 0:
+                err.write('ERROR: No results found for formulation ' + str(formulation_to_plot[f]) +
+                          ' simulation ' + str(simulation_to_plot[s]) + '\n')
+                continue
+            if data_name_to_plot not in results.variables:
+                err.write('ERROR: CANNOT LOCATE ITEM: ' + data_name_to_plot + '\n')
+                print('ERROR: CANNOT LOCATE ITEM: ' + data_name_to_plot)
+                continue
+
+            # plot the selected figure, updating the open figure of this
+            # formulation and simulation in place
+            figure_key = (formulation_to_plot[f], simulation_to_plot[s])
+            if figure_key not in result_figures:
+                from result_browser import ResultFigure
+                result_figures[figure_key] = ResultFigure(figsize = (8,7))
+            fig = result_figures[figure_key].show(results.fiscal_years, results.get(data_name_to_plot, realizations_found),
+                                                  data_name_to_plot,
+                                                  key = (results_path, formulation_to_plot[f], simulation_to_plot[s],
+                                                         data_name_to_plot, tuple(realizations_found),
+                                                         tuple(results.signatures[r] for r in realizations_found)))
+
+            # output figure
+            fig.savefig(results_path + '/Custom_Outputs_Plot_f' + str(formulation_to_plot[f]) + '_s' + str(simulation_to_plot[s]) +
+                        (('_SINGLE_REALIZATION_r' + str(realizations_found[0])) if len(realizations_found) == 1 else '') + '.png', bbox_inches= 'tight', dpi = 400)
+            plt.show(block = False)
 
         popup_printout = "Figure generated and stored in\n'Output/" + run_name_entry.get() + "/output_figures/'"
         open_popup(popup_printout)
@@ -1271,4 +1363,6 @@ plot_figures = Button(frame_run_model, text="Plot figure", padx=10, pady=5, comm
 
 emptyLab_plot = Label(frame_run_model, text="", justify=LEFT, bg='honeydew').grid(row=7, column=0, sticky = 'we')
 
+root.after(0, startup_thread.start)
 root.mainloop()
+model_worker.stop()
@@ -10,7 +10,7 @@ block_cipher = None
 
 a = Analysis(
     ['Financial_Model_GUI.py'],
-    pathex=[],
+    pathex=['Code/FinancialModeling'],
     binaries=[],
     datas=datas,
     hiddenimports=[],
@@ -25,20 +25,18 @@ a = Analysis(
 )
 pyz = PYZ(a.pure, a.zipped_data, cipher=block_cipher)
 
+# one-folder build: a one-file exe unpacks all libraries to a temporary
+# folder on every start, and UPX compressed libraries are unpacked on load
 exe = EXE(
     pyz,
     a.scripts,
-    a.binaries,
-    a.zipfiles,
-    a.datas,
     [],
+    exclude_binaries=True,
     name='Financial_Model_GUI',
     debug=False,
     bootloader_ignore_signals=False,
     strip=False,
-    upx=True,
-    upx_exclude=[],
-    runtime_tmpdir=None,
+    upx=False,
     console=True,
     disable_windowed_traceback=False,
     argv_emulation=False,
@@ -47,3 +45,13 @@ exe = EXE(
     entitlements_file=None,
     icon=['tbw_icon.ico'],
 )
+coll = COLLECT(
+    exe,
+    a.binaries,
+    a.zipfiles,
+    a.datas,
+    strip=False,
+    upx=False,
+    upx_exclude=[],
+    name='Financial_Model_GUI',
+)
@@ -0,0 +1,269 @@
+# -*- coding: utf-8 -*-
+"""
+Background jobs for the TBW Financial Model GUI
+
+The financial model runs in a separate process so the Tk window stays
+responsive (results of earlier runs can still be browsed and plotted).
+The model prints one progress line per realization,
+
+    PROGRESS {"simulation": 0, "realization": 12, "completed": 11, "total": 40}
+
+which a reader thread turns into events on a queue. The GUI collects them
+with ModelJob.poll() from a root.after() callback, i.e.
+
+    job = ModelJob(['python', '-u', 'Code/FinancialModeling/TBW_financial_model_vGUI.py'])
+    job.start()
+    ...
+    for event in job.poll():
+        print(event['simulation'], event['realization'], event['eta'])
+
+Pausing is cooperative: the model waits between realizations while the
+pause file given to it in the TBW_MODEL_PAUSE_FILE environment variable
+exists. Cancelling terminates the model process.
+
+Repeat runs can skip interpreter startup, imports and reading unchanged
+inputs by running in a warm ModelWorker (Code/FinancialModeling/model_worker.py)
+kept alive between runs; its jobs are polled, paused and cancelled the same
+way, and cancelling one stops the worker, which is started again for the
+next run.
+
+    worker = ModelWorker('Code/FinancialModeling/model_worker.py')
+    worker.start()
+    worker.preload('Code/FinancialModeling/TBW_financial_model_vGUI.py')
+    job = worker.job('Code/FinancialModeling/TBW_financial_model_vGUI.py')
+    job.start()
+
+@author: dgorelick
+"""
+
+import os
+import json
+import time
+import queue
+import itertools
+import tempfile
+import threading
+import subprocess
+
+PROGRESS_PREFIX = 'PROGRESS '
+PAUSE_FILE_VARIABLE = 'TBW_MODEL_PAUSE_FILE'
+
+# lines of the warm model worker protocol, see model_worker.py
+READY_LINE = 'READY'
+START_PREFIX = 'START '
+DONE_PREFIX = 'DONE '
+
+
+def parse_output_line(line):
+    # progress or plain output event from a line printed by the model
+    if line.startswith(PROGRESS_PREFIX):
+        try:
+            return {'type' : 'progress', **json.loads(line[len(PROGRESS_PREFIX):])}
+        except ValueError:
+            pass
+    return {'type' : 'output', 'text' : line}
+
+
+class ModelJob:
+    def __init__(self, command, cwd = None):
+        self.command = list(command)
+        self.cwd = cwd
+        self.events = queue.Queue()
+        self.process = None
+        self.status = 'waiting'
+        self.start_time = None
+        self.paused_time = 0.
+        self.pause_start = None
+        self.last_progress = None
+        self.output = []
+        self.pause_file = os.path.join(tempfile.gettempdir(),
+                                       'tbw_model_pause_' + str(os.getpid()) +
+                                       '_' + str(id(self)))
+
+    def start(self):
+        environment = dict(os.environ)
+        environment[PAUSE_FILE_VARIABLE] = self.pause_file
+        environment['PYTHONUNBUFFERED'] = '1'
+        self.process = subprocess.Popen(self.command, cwd = self.cwd, env = environment,
+                                        stdout = subprocess.PIPE, stderr = subprocess.STDOUT,
+                                        text = True, bufsize = 1)
+        self.status = 'running'
+        self.start_time = time.time()
+        threading.Thread(target = self._read_output, daemon = True).start()
+
+    def _read_output(self):
+        # runs on the reader thread, only touches the queue
+        for line in self.process.stdout:
+            self.events.put(parse_output_line(line.rstrip()))
+        self.events.put({'type' : 'exit', 'returncode' : self.process.wait()})
+
+    def elapsed(self):
+        if self.start_time is None:
+            return 0.
+        paused = self.paused_time + (time.time() - self.pause_start if self.pause_start else 0.)
+        return time.time() - self.start_time - paused
+
+    def poll(self):
+        # all events received since the last poll, progress events are
+        # completed with elapsed time, rate and estimated time remaining
+        received = []
+        while True:
+            try:
+                event = self.events.get_nowait()
+            except queue.Empty:
+                break
+
+            if event['type'] == 'progress':
+                elapsed = self.elapsed()
+                rate = event['completed'] / elapsed if elapsed > 0 else 0.
+                event['elapsed'] = elapsed
+                event['rate'] = rate
+                event['eta'] = (event['total'] - event['completed']) / rate if rate > 0 else None
+                self.last_progress = event
+            elif event['type'] == 'output':
+                self.output.append(event['text'])
+            elif event['type'] == 'exit':
+                self._clear_pause_file()
+                if self.status != 'cancelled':
+                    self.status = 'finished' if event['returncode'] == 0 else 'failed'
+            received.append(event)
+
+        return received
+
+    def is_active(self):
+        return self.status in ['running', 'paused']
+
+    def pause(self):
+        if self.status == 'running':
+            open(self.pause_file, 'w').close()
+            self.status = 'paused'
+            self.pause_start = time.time()
+
+    def resume(self):
+        if self.status == 'paused':
+            self._clear_pause_file()
+            self.status = 'running'
+            self.paused_time += time.time() - self.pause_start
+            self.pause_start = None
+
+    def cancel(self):
+        if self.is_active():
+            self.status = 'cancelled'
+            self._clear_pause_file()
+            self.process.terminate()
+
+    def _clear_pause_file(self):
+        if os.path.exists(self.pause_file):
+            os.remove(self.pause_file)
+
+
+class WorkerJob(ModelJob):
+    # model run sent to a warm ModelWorker instead of a new process
+    def __init__(self, worker, script):
+        super().__init__(worker.python_command + [script], worker.cwd)
+        self.worker = worker
+        self.script = script
+
+    def start(self):
+        self.worker.start()
+        self.process = self.worker.process
+        self.status = 'running'
+        self.start_time = time.time()
+        self.worker.submit(self, {'script' : self.script, 'pause_file' : self.pause_file})
+
+
+class ModelWorker:
+    def __init__(self, worker_script, python = 'python', cwd = None):
+        self.python_command = [python, '-u']
+        self.command = self.python_command + [worker_script]
+        self.cwd = cwd
+        self.process = None
+        self.jobs = {}
+        self.ids = itertools.count()
+        self.lock = threading.Lock()
+
+    def is_alive(self):
+        return self.process is not None and self.process.poll() is None
+
+    def start(self):
+        if self.is_alive():
+            return
+        environment = dict(os.environ)
+        environment['PYTHONUNBUFFERED'] = '1'
+        self.process = subprocess.Popen(self.command, cwd = self.cwd, env = environment,
+                                        stdin = subprocess.PIPE, stdout = subprocess.PIPE,
+                                        stderr = subprocess.STDOUT, text = True, bufsize = 1)
+        threading.Thread(target = self._read_output, args = (self.process,), daemon = True).start()
+
+    def stop(self):
+        if self.is_alive():
+            self.process.terminate()
+
+    def submit(self, job, request):
+        # queue a request, job (None for a preload) gets the events of its run
+        request_id = next(self.ids)
+        with self.lock:
+            self.jobs[request_id] = job
+        self.process.stdin.write(json.dumps({'id' : request_id, **request}) + '\n')
+        self.process.stdin.flush()
+
+    def preload(self, script):
+        # read the model inputs ahead of the first run
+        self.start()
+        self.submit(None, {'script' : script, 'preload' : True})
+
+    def job(self, script):
+        # job running script in this worker, or in its own process if the
+        # worker cannot be started
+        try:
+            self.start()
+        except OSError:
+            return ModelJob(self.python_command + [script], self.cwd)
+        return WorkerJob(self, script)
+
+    def _read_output(self, process):
+        # runs on the reader thread, passes output of each run to its job
+        job = None
+        for line in process.stdout:
+            line = line.rstrip()
+            if line == READY_LINE:
+                continue
+            if line.startswith(START_PREFIX):
+                with self.lock:
+                    job = self.jobs.get(json.loads(line[len(START_PREFIX):])['id'])
+                continue
+            if line.startswith(DONE_PREFIX):
+                done = json.loads(line[len(DONE_PREFIX):])
+                with self.lock:
+                    finished = self.jobs.pop(done['id'], None)
+                if finished is not None:
+                    finished.events.put({'type' : 'exit', 'returncode' : done['returncode']})
+                job = None
+                continue
+            if job is not None:
+                job.events.put(parse_output_line(line))
+
+        # worker stopped (e.g. a run was cancelled), jobs not done end with it
+        returncode = process.wait()
+        with self.lock:
+            for request_id in [i for i, j in self.jobs.items() if j is None or j.process is process]:
+                unfinished = self.jobs.pop(request_id)
+                if unfinished is not None:
+                    unfinished.events.put({'type' : 'exit', 'returncode' : returncode})
+
+
+def format_progress(event):
+    # one line summary of a progress event for the GUI status label
+    text = 'Simulation ' + str(event['simulation']) + ', realization ' + str(event['realization']) + \
+        ' (' + str(event['completed']) + '/' + str(event['total']) + ')' + \
+        ' - elapsed ' + format_duration(event['elapsed']) + \
+        ', ' + '%.2f' % event['rate'] + ' realizations/s'
+    if event['eta'] is not None:
+        text += ', ' + format_duration(event['eta']) + ' remaining'
+    return text
+
+
+def format_duration(seconds):
+    minutes, seconds = divmod(int(round(seconds)), 60)
+    hours, minutes = divmod(minutes, 60)
+    return '%d:%02d:%02d' % (hours, minutes, seconds)
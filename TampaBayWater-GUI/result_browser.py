@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+"""
+Cached browsing of financial model results for the TBW Financial Model GUI
+
+The budget_actuals_*, budget_projections_* and financial_metrics_* files of
+every realization of a run (formulation + simulation) are read once into an
+in-memory (realization x fiscal year x variable) cube. Cubes of the most
+recently used runs are kept (least recently used are dropped first) and a
+realization is only read again when one of its files changes, so results
+of a run still in progress can be browsed as realizations complete.
+
+    cache = ResultCache(max_runs = 4)
+    results = cache.get(results_path, formulation = 125, simulation = 0,
+                        realizations = range(1, 1001))
+    data = results.get('Uniform Rate')  # (realization x fiscal year)
+
+ResultFigure keeps one figure open and updates its artists in place when
+the variable, run or realization subset changes instead of redrawing
+(see realization_plotting in Code/FinancialModeling).
+
+@author: dgorelick
+"""
+
+import os
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+import matplotlib.pyplot as plt
+from realization_plotting import TraceChart, FanChart, MAX_TRACES, format_fiscal_year_axis
+
+# actuals start 2 years before the first modeled year and budgets 1 year
+# before and after the modeled period, rows are trimmed to the modeled
+# period in this order of precedence for variables found in several files
+RESULT_FILES = [('budget_actuals', slice(2, None)),
+                ('budget_projections', slice(1, -1)),
+                ('financial_metrics', slice(None))]
+
+
+def result_filenames(results_path, formulation, simulation, realization):
+    return [os.path.join(results_path, name + '_f' + str(formulation) + '_s' + str(simulation) +
+                         '_r' + str(realization) + '.csv') for name, rows in RESULT_FILES]
+
+
+class RunResults:
+    def __init__(self, results_path, formulation, simulation):
+        self.results_path = results_path
+        self.formulation = formulation
+        self.simulation = simulation
+        self.variables = None
+        self.fiscal_years = None
+        self.data = {}
+        self.signatures = {}
+
+    def signature(self, realization):
+        # modification time and size of each result file, None if any is missing
+        try:
+            stats = [os.stat(f) for f in result_filenames(self.results_path, self.formulation,
+                                                          self.simulation, realization)]
+        except FileNotFoundError:
+            return None
+        return tuple((s.st_mtime, s.st_size) for s in stats)
+
+    def read_realization(self, realization):
+        tables = [pd.read_csv(f, index_col = 0) for f in
+                  result_filenames(self.results_path, self.formulation, self.simulation, realization)]
+
+        if self.variables is None:
+            self.variables = list(OrderedDict.fromkeys([v for table in tables for v in table.columns]))
+        columns = []
+        for v in self.variables:
+            for table, (name, rows) in zip(tables, RESULT_FILES):
+                if v in table.columns:
+                    columns.append(pd.to_numeric(table[v], errors = 'coerce').values[rows])
+                    break
+            else:
+                columns.append(np.full(len(tables[-1]), np.nan))
+
+        return np.column_stack(columns)
+
+    def update(self, realizations, n_threads = 8):
+        # read realizations that are not loaded yet or whose files changed,
+        # realizations without (complete) results are skipped
+        signatures = {r: self.signature(r) for r in realizations}
+        pending = [r for r, s in signatures.items()
+                   if s is not None and self.signatures.get(r) != s]
+        if len(pending) == 0:
+            return pending
+
+        # first file sets the variable order for the run
+        if self.variables is None:
+            self.data[pending[0]] = self.read_realization(pending[0])
+            self.signatures[pending[0]] = signatures[pending[0]]
+            pending_to_read = pending[1:]
+        else:
+            pending_to_read = pending
+
+        with ThreadPoolExecutor(n_threads) as pool:
+            for r, data in zip(pending_to_read, pool.map(self.read_realization, pending_to_read)):
+                self.data[r] = data
+                self.signatures[r] = signatures[r]
+
+        self.fiscal_years = self.data[pending[0]][:, self.variables.index('Fiscal Year')]
+        return pending
+
+    def available(self, realizations = None):
+        if realizations is None:
+            return sorted(self.data.keys())
+        return [r for r in realizations if r in self.data]
+
+    def get(self, variable, realizations = None):
+        # (realization x fiscal year) values of a variable
+        if variable not in self.variables:
+            raise KeyError('Variable ' + str(variable) + ' not found in results of formulation ' +
+                           str(self.formulation) + ' simulation ' + str(self.simulation))
+        v = self.variables.index(variable)
+        return np.stack([self.data[r][:, v] for r in self.available(realizations)])
+
+
+class ResultCache:
+    def __init__(self, max_runs = 4):
+        self.max_runs = max_runs
+        self.runs = OrderedDict()
+
+    def get(self, results_path, formulation, simulation, realizations):
+        key = (os.path.normpath(results_path), int(formulation), int(simulation))
+        if key not in self.runs:
+            self.runs[key] = RunResults(results_path, formulation, simulation)
+        self.runs.move_to_end(key)
+        while len(self.runs) > self.max_runs:
+            self.runs.popitem(last = False)
+
+        self.runs[key].update(realizations)
+        return self.runs[key]
+
+
+class ResultFigure:
+    def __init__(self, figsize = (8,7)):
+        self.figsize = figsize
+        self.fig = None
+        self.ax = None
+        self.charts = {}
+        self.drawn = None
+
+    def _figure(self):
+        # reuse the open figure, a new one is only made if it was closed
+        if self.fig is None or not plt.fignum_exists(self.fig.number):
+            self.fig, self.ax = plt.subplots(1,1, sharey = False, figsize = self.figsize)
+            self.charts = {'traces' : TraceChart(self.ax), 'fan' : FanChart(self.ax)}
+            self.drawn = None
+        return self.fig, self.ax
+
+    def show(self, fiscal_years, data, title, key = None, highlight = None):
+        # (realization x fiscal year) data as traces for few realizations or
+        # percentile fan bands (min to max outermost) for many; nothing is
+        # redrawn if the same key (i.e. run, variable and realizations) is shown
+        fig, ax = self._figure()
+        if key is not None and key == self.drawn:
+            return fig
+
+        style = 'traces' if data.shape[0] <= MAX_TRACES else 'fan'
+        for name, chart in self.charts.items():
+            if name != style:
+                chart.set_visible(False)
+        self.charts[style].update(np.asarray(fiscal_years, dtype = float), data, highlight = highlight)
+
+        ax.set_title(title)
+        format_fiscal_year_axis(ax, fiscal_years)
+
+        self.drawn = key
+        fig.canvas.draw_idle()
+        return fig
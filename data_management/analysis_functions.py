@@ -5,6 +5,63 @@ import re
 # FUNCTIONS TO DO BASIC DATA READING AND MANIPULATION OPERATIONS FOR TBW DATA
 # D GORELICK (APR 2019)
 
+# columns of cleaned AMPL files needed by each analysis. modules that use
+# AMPL output declare their columns with register_AMPL_columns so loaders
+# only read the union of columns needed by the analyses being run
+#   required: columns that must exist in the file
+#   optional: columns read if they exist (i.e. slack not tracked in all runs)
+#   prefixes: all columns starting with these (i.e. 'targetoffset_neg__')
+AMPL_COLUMN_REGISTRY = {}
+
+def register_AMPL_columns(analysis, required = [], optional = [], prefixes = []):
+    AMPL_COLUMN_REGISTRY[analysis] = {'required' : list(required), 
+                                      'optional' : list(optional), 
+                                      'prefixes' : list(prefixes)}
+
+
+
+def select_AMPL_columns(available_columns, analyses):
+    # collect union of columns declared by all active analyses
+    required = []; optional = []; prefixes = []
+    for analysis in analyses:
+        if analysis not in AMPL_COLUMN_REGISTRY:
+            raise KeyError('No AMPL columns registered for analysis ' + str(analysis) + 
+                           ', registered: ' + ', '.join(AMPL_COLUMN_REGISTRY.keys()))
+        required += AMPL_COLUMN_REGISTRY[analysis]['required']
+        optional += AMPL_COLUMN_REGISTRY[analysis]['optional']
+        prefixes += AMPL_COLUMN_REGISTRY[analysis]['prefixes']
+    
+    # check all required columns exist before reading any data
+    available_columns = [str(c) for c in available_columns]
+    available_set = set(available_columns)
+    missing = [c for c in dict.fromkeys(required) if c not in available_set]
+    if len(missing) > 0:
+        raise KeyError('AMPL data is missing columns required by ' + 
+                       ', '.join(analyses) + ': ' + ', '.join(missing))
+    
+    # keep file column order
+    wanted = set(required + optional)
+    prefixes = tuple(prefixes)
+    return [c for c in available_columns if c in wanted or 
+            (len(prefixes) > 0 and c.startswith(prefixes))]
+
+
+
+def read_AMPL_cleaned_columns(filename, analyses):
+    # read only the columns of a cleaned AMPL csv needed by the analyses
+    available_columns = pd.read_csv(filename, nrows = 0).columns
+    use_columns = select_AMPL_columns(available_columns, analyses)
+    
+    # if none of the columns are in the file (i.e. only optional slack
+    # columns that were not tracked), still keep one row per day so
+    # callers see missing columns as they would with the full file
+    if len(use_columns) == 0:
+        n_rows = len(pd.read_csv(filename, usecols = [0]))
+        return pd.DataFrame(index = pd.RangeIndex(n_rows))
+    
+    return pd.read_csv(filename, usecols = use_columns)[use_columns]
+
+
 def read_AMPL_csv(in_path, out_path, filename, export = True):
     # read in file
     csv_out = pd.read_csv(in_path + filename, sep = ',') # about a year is 50,000 rows
@@ -147,35 +204,47 @@ def read_AMPL_log(filename):
     
 
 
-def read_AMPL_log_variable_constraints(filename):
+def read_AMPL_log_variable_constraints(filename, skiprows = None, verbose = False):
     # read input file
     f = open(filename, 'r')
     
-    # collect column names and initialize matrix to hold data
+    # collect column names and initialize list to hold data
 #    header = ['Variable', 'Slack', 'Lower Bound', 'Value', 
 #              'Upper Bound', 'Status']
     header = ['Variable', 'Lower Bound', 'Upper Bound']
-    ampl_out = np.empty((0,len(header)))
+    ampl_out = []
     
-    # read line by line (skip first 186 lines)
-    for _ in range(186):
-        next(f)
+    # read line by line (used to skip first 186 lines)
+    # changed to start at the "Variable" header of the constraints list
+    # because the length of the run information above it shifts between runs, 
+    # a fixed number of lines can still be skipped by passing skiprows
+    first_data_line_catch = False
+    if skiprows is not None:
+        for _ in range(skiprows):
+            next(f)
+        first_data_line_catch = True
         
     for line in f:
         # discard blank lines
         if len(line) > 1:
             formatted_line = line.split()
             
+            # skip lines until the constraints list starts
+            if first_data_line_catch == False:
+                if formatted_line[0] == 'Variable':
+                    first_data_line_catch = True
+                continue
+            
             # stop when reached the bottom of the constraints list
             if formatted_line[0] == 'DateNo':
-                print(formatted_line)
+                if verbose: print(formatted_line)
                 break
             
             # catch any headers to skip
             # CATCHES HERE THAT SHOULD BE INCLUDED, EXCEPTIONS ADDED
             if len(formatted_line) != 6:
                 # catch any issues?
-                if len(formatted_line) == 5:
+                if len(formatted_line) == 5 and verbose:
                     print(formatted_line)
                     
                 if formatted_line[0][0:12] == "BIDIR_NEG_UB" or formatted_line[2][0:9] == '-Infinity':  
@@ -184,14 +253,14 @@ def read_AMPL_log_variable_constraints(filename):
                     formatted_line = [formatted_line[0], formatted_line[1], 
                                       f_l_2, f_l_3, 
                                       formatted_line[3], formatted_line[4]]
-                    print(formatted_line)
+                    if verbose: print(formatted_line)
                 else:
-                    print(formatted_line)
+                    if verbose: print(formatted_line)
                     continue
             
             # ignore header label halfway through variables
             if formatted_line[0] == 'Constraint':
-                print(formatted_line)
+                if verbose: print(formatted_line)
                 continue
             
             # assign values to keep
@@ -202,10 +271,121 @@ def read_AMPL_log_variable_constraints(filename):
             upper_bound = formatted_line[4]
             
             # write keeper values
-            new_list = [var_or_constr_name, lower_bound, upper_bound]
-            ampl_out = np.vstack((ampl_out, [x for x in new_list]))
+            ampl_out.append([var_or_constr_name, lower_bound, upper_bound])
 
     f.close()
     
-    ampl_out = pd.DataFrame(ampl_out); ampl_out.columns = header
+    ampl_out = pd.DataFrame(ampl_out, columns = header)
     return ampl_out
+
+
+
+def index_AMPL_variable_constraints(var_ranges):
+    # break down variable/constraint names like wup_mavg_pos['CWUP'] into
+    # name and location components ONCE, so that they can be joined to
+    # cleaned AMPL csv column names (e.g. wup_mavg_pos__CWUP) by key
+    # only entries with a quoted location can match a csv column
+    names = []; locations = []
+    for n in var_ranges['Variable'].astype(str):
+        nset = re.split('\[|\]|\,', n) # split out the variable or constraint name components
+        
+        names.append(nset[0])
+        if len(nset) > 1 and len(nset[1]) > 1 and nset[1][0] == '\'' and nset[1][-1] == '\'':
+            locations.append(nset[1][1:-1])
+        else:
+            locations.append(np.nan)
+    
+    # bounds can be reported as +/-Infinity, which float conversion handles
+    constraint_index = pd.DataFrame({'Name' : names, 
+                                     'Location' : locations,
+                                     'Lower Bound' : var_ranges['Lower Bound'].astype(float).values,
+                                     'Upper Bound' : var_ranges['Upper Bound'].astype(float).values})
+    
+    return constraint_index.dropna(subset = ['Location'])
+
+
+
+def match_AMPL_constraints_to_columns(constraint_index, csv_columns):
+    # split the column names from the csv data to match
+    column_keys = pd.DataFrame({'Column' : [str(c) for c in csv_columns],
+                                'Column Index' : range(len(csv_columns))})
+    cset = column_keys['Column'].str.split('__')
+    column_keys['Name'] = cset.str[0]
+    column_keys['Location'] = cset.str[1]
+    
+    # hash join on (name, location) keys, this replaces looping over 
+    # every csv column for every constraint and keeps the same matches
+    # (in csv column order) as the nested loop did
+    matched = column_keys.dropna(subset = ['Location']).merge(
+            constraint_index, on = ['Name', 'Location'], how = 'inner')
+    
+    return matched
+
+
+
+def find_AMPL_bound_violations(csv_out, matched):
+    # compare daily values of all matched csv columns against their bounds
+    # at once, returning (days x matched columns) boolean arrays
+    data = csv_out.values[:, matched['Column Index'].values].astype(float)
+    
+    lower_violations = data < matched['Lower Bound'].values
+    upper_violations = data > matched['Upper Bound'].values
+    
+    return lower_violations, upper_violations, data
+
+
+
+def summarize_AMPL_bound_violations(realization, log_filename, csv_filename, 
+                                    out_path = None):
+    # read constraint bounds and daily csv output for a single realization
+    var_ranges = read_AMPL_log_variable_constraints(log_filename)
+    csv_out    = pd.read_csv(csv_filename)
+    
+    matched = match_AMPL_constraints_to_columns(
+            index_AMPL_variable_constraints(var_ranges), csv_out.columns)
+    lower_violations, upper_violations, data = \
+        find_AMPL_bound_violations(csv_out, matched)
+    
+    # optionally write daily record of violations, as was done previously
+    if out_path is not None:
+        lower_outs = pd.DataFrame(lower_violations.astype(float)); lower_outs.columns = matched['Column']
+        upper_outs = pd.DataFrame(upper_violations.astype(float)); upper_outs.columns = matched['Column']
+        
+        pd.DataFrame.to_csv(lower_outs, out_path + realization + '_lower_constraint_violations_csv_variables.csv')        
+        pd.DataFrame.to_csv(upper_outs, out_path + realization + '_upper_constraint_violations_csv_variables.csv') 
+    
+    # summarize count and size of violations for each matched variable
+    lb = matched['Lower Bound'].values; ub = matched['Upper Bound'].values
+    summary = pd.DataFrame({'Realization' : realization,
+                            'Variable' : matched['Column'].values,
+                            'Lower Bound' : lb,
+                            'Upper Bound' : ub,
+                            'Days Below Lower Bound' : lower_violations.sum(axis = 0),
+                            'Days Above Upper Bound' : upper_violations.sum(axis = 0),
+                            'Largest Lower Bound Violation' : np.where(lower_violations, lb - data, 0).max(axis = 0, initial = 0),
+                            'Largest Upper Bound Violation' : np.where(upper_violations, data - ub, 0).max(axis = 0, initial = 0)})
+    
+    # only keep variables with at least one violation
+    return summary[(summary['Days Below Lower Bound'] > 0) | 
+                   (summary['Days Above Upper Bound'] > 0)]
+
+
+
+def scan_AMPL_bound_violations(realizations, log_filenames, csv_filenames, 
+                               out_path = None, n_processes = None):
+    # run violation summary for every realization of a run in parallel
+    # and collect results into a single table (one row per violating variable)
+    from multiprocessing import Pool
+    
+    with Pool(n_processes) as pool:
+        summaries = pool.starmap(summarize_AMPL_bound_violations,
+                                 [(r, lf, cf, out_path) for r, lf, cf in 
+                                  zip(realizations, log_filenames, csv_filenames)])
+    
+    summary_columns = ['Realization', 'Variable', 'Lower Bound', 'Upper Bound',
+                       'Days Below Lower Bound', 'Days Above Upper Bound',
+                       'Largest Lower Bound Violation', 'Largest Upper Bound Violation']
+    if len(summaries) == 0:
+        return pd.DataFrame(columns = summary_columns)
+    
+    return pd.concat(summaries, ignore_index = True)[summary_columns]
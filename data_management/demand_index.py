@@ -0,0 +1,142 @@
+import os
+import numpy as np
+import pandas as pd
+from analysis_functions import register_AMPL_columns, read_AMPL_cleaned_columns
+from realization_catalog import DEFAULT_PATHS, format_id, find_realization_ids
+
+# DEMAND INDEX OF SWRE REALIZATIONS ACROSS RUNS
+# only demand columns of cleaned AMPL files are read, and for each
+# realization the annual mean/peak demand, growth rate over the horizon
+# and end-of-horizon averages are collected into two tables:
+#   annual table:      one row per run, realization, variable and year
+#   realization table: one row per run, realization and variable
+# both are written as csv so other scripts can select realizations
+# by demand band without re-reading AMPL output
+#
+# example:
+#   annual, summary = build_demand_index([125, 141])
+#   write_demand_index(annual, summary)
+#   low_ids = select_demand_band(summary, run = 141, upper_quantile = 0.05)
+# -----------------------------------------------------------------------------
+
+DEMAND_INDEX_COLUMNS = ['total_demand__none']
+register_AMPL_columns('demand_index', required = DEMAND_INDEX_COLUMNS)
+
+# where demand index tables are written
+DEFAULT_DEMAND_INDEX_PATH = 'F:/MonteCarlo_Project/Cornell_UNC/financial_model_input_data'
+
+DAYS_PER_YEAR = 365
+
+
+def calculate_demand_statistics(demand, end_days = DAYS_PER_YEAR):
+    # annual statistics use consecutive 365-day years from the first day,
+    # a partial final year is dropped. end of horizon statistics use the
+    # last end_days of the record (i.e. last year of a 2040 horizon)
+    demand = np.asarray(demand, dtype = np.float64)
+    n_years = len(demand) // DAYS_PER_YEAR
+    annual = demand[:n_years * DAYS_PER_YEAR].reshape(n_years, DAYS_PER_YEAR)
+    annual_mean = annual.mean(axis = 1)
+    annual_peak = annual.max(axis = 1)
+
+    # compound annual growth rate between first and last full years
+    if n_years > 1 and annual_mean[0] > 0:
+        growth_rate = (annual_mean[-1] / annual_mean[0]) ** (1 / (n_years - 1)) - 1
+    else:
+        growth_rate = np.nan
+
+    summary = {'Mean Demand'       : demand.mean(),
+               'Peak Demand'       : demand.max(),
+               'First Year Mean Demand' : annual_mean[0] if n_years > 0 else np.nan,
+               'End Mean Demand'   : demand[-end_days:].mean(),
+               'End Peak Demand'   : demand[-end_days:].max(),
+               'Growth Rate'       : growth_rate,
+               'Days'              : len(demand)}
+
+    return annual_mean, annual_peak, summary
+
+
+def index_realization_demand(filename, run, realization,
+                             columns = DEMAND_INDEX_COLUMNS, end_days = DAYS_PER_YEAR):
+    # read demand columns of one realization and collect statistics
+    if columns == DEMAND_INDEX_COLUMNS:
+        data = read_AMPL_cleaned_columns(filename, ['demand_index'])
+    else:
+        data = pd.read_csv(filename, usecols = columns)
+
+    annual_rows = []; summary_rows = []
+    for variable in columns:
+        annual_mean, annual_peak, summary = \
+            calculate_demand_statistics(data[variable].values, end_days)
+        for year in range(len(annual_mean)):
+            annual_rows.append([run, realization, variable, year + 1,
+                                annual_mean[year], annual_peak[year]])
+        summary_rows.append(dict({'Run' : run, 'Realization' : realization,
+                                  'Variable' : variable}, **summary))
+
+    return annual_rows, summary_rows
+
+
+def build_demand_index(runs, realizations = None, columns = DEMAND_INDEX_COLUMNS,
+                       ampl_path = DEFAULT_PATHS['ampl'], end_days = DAYS_PER_YEAR,
+                       n_processes = None):
+    # index demands of every realization of each run in parallel,
+    # realizations found on disk are used if not given
+    jobs = []
+    for run in runs:
+        run_realizations = realizations if realizations is not None else \
+            sorted(find_realization_ids(ampl_path, run))
+        for r in run_realizations:
+            jobs.append((ampl_path.format(run = format_id(run), realization = format_id(r)),
+                         int(run), int(r), list(columns), end_days))
+
+    from multiprocessing import Pool
+    with Pool(n_processes) as pool:
+        results = pool.starmap(index_realization_demand, jobs)
+
+    annual = pd.DataFrame([row for result in results for row in result[0]],
+                          columns = ['Run', 'Realization', 'Variable', 'Year',
+                                     'Mean Demand', 'Peak Demand'])
+    summary = pd.DataFrame([row for result in results for row in result[1]])
+
+    # percentile rank of end of horizon demand within each run,
+    # used to place realizations into demand bands
+    if len(summary) > 0:
+        summary['End Mean Demand Percentile'] = \
+            summary.groupby(['Run', 'Variable'])['End Mean Demand'].rank(pct = True)
+
+    return annual, summary
+
+
+def demand_index_filenames(out_path = DEFAULT_DEMAND_INDEX_PATH):
+    return os.path.join(out_path, 'demand_index_annual.csv'), \
+        os.path.join(out_path, 'demand_index_realizations.csv')
+
+
+def write_demand_index(annual, summary, out_path = DEFAULT_DEMAND_INDEX_PATH):
+    # replace rows of runs that were re-indexed, keep other runs
+    os.makedirs(out_path, exist_ok = True)
+    for table, filename in zip([annual, summary], demand_index_filenames(out_path)):
+        if os.path.exists(filename):
+            existing = pd.read_csv(filename)
+            existing = existing[~existing['Run'].isin(table['Run'].unique())]
+            table = pd.concat([existing, table], ignore_index = True)
+        table.sort_values(['Run', 'Realization'], kind = 'stable').to_csv(filename, index = False)
+
+
+def read_demand_index(out_path = DEFAULT_DEMAND_INDEX_PATH):
+    annual_filename, summary_filename = demand_index_filenames(out_path)
+    return pd.read_csv(annual_filename), pd.read_csv(summary_filename)
+
+
+def select_demand_band(summary, run = None, statistic = 'End Mean Demand',
+                       lower_quantile = 0, upper_quantile = 1,
+                       variable = 'total_demand__none'):
+    # realization ids with the statistic between the given quantiles
+    # (inclusive) of its distribution across realizations of the run
+    subset = summary[summary['Variable'] == variable]
+    if run is not None:
+        subset = subset[subset['Run'] == int(run)]
+    lower, upper = subset[statistic].quantile([lower_quantile, upper_quantile])
+    in_band = (subset[statistic] >= lower) & (subset[statistic] <= upper)
+
+    return subset.loc[in_band, 'Realization'].values
@@ -2,6 +2,7 @@ import os
 import csv
 import scipy.io as sio
 import numpy as np
+from multiprocessing import Pool
 
 # SCRIPT TO READ TBW FMS2 INPUT FLOW FILES TO OMS1
 # AND WRITE MONTHLY AND DAILY DATA TO CSV
@@ -13,85 +14,119 @@ import numpy as np
 # and writing code for consistency
 
 # this file loops across all inflow realization files (1,000) files
-# and writes the accumulated data to separate csv files
+# and writes the accumulated data to separate files for each site
 # each row of the resultant files is a single realization
 # realizations can be of monthly or daily data
 # monthly data is for 300 years (total realization length) per realization
 # daily data is for 40 years (limited by computation time)
+
+# each realization file is opened once and all monthly and daily sites
+# are pulled from it together, realizations are read in parallel and
+# written into preallocated (realization x time) memory-mapped .npy arrays
+# for each site, csv copies of the arrays are optional
 # -----------------------------------------------------------------------------
 
 # Step 0: Set working directory 
 os.chdir('C:/Users/David/Desktop/TBWData/1000_flow_realization') # DG1b personal cp
 
-# Step 1: Loop through inflow files
+# Step 1: Set up realizations and sites to read
 sims = list(range(1,1001)) # 1,000 realizations to be read 
 dailyrecordlength = 15000 # limit on number of days
 monthlyrecordlength = 3600 # full 300-year record of monthly data
+ten_thousand_added_to_read_files = 10000
 
 # names of sites to be read in - not all sites have both monthly and daily records
 monthlysites = ['CYC', 'STL', 'PC', 'MB', 'TBC', 'ALA', 'Cyp', 'Trt', 'ZH', 'HRUnmeas']
 dailysites = ['LPUnmeas', 'MPUnmeas', 'MB', 'TBC', 'ALA', 'Cyp', 'Trt', 'ZH', 'HRUnmeas']
 
-# Step 2: Read in each site and collect flow values
-for site in np.unique(monthlysites + dailysites):
+# set to True to also write csv copies of the arrays in the 
+# original format (first two rows of daily files are year and month)
+EXPORT_CSV = False
+
+
+def get_FMS_filename(sim):
+    return '1000_flow_realization/sim_' + str(ten_thousand_added_to_read_files + sim)[1:] + \
+        '_SimRain_NPMonthlyNoise_NPDailyNoise_Nov2011.mat'
+
+
+def read_FMS_realization(sim):
+    # read the data ONCE for all sites
+    RawData = sio.loadmat(get_FMS_filename(sim))
     
-    # initialize collectors to hold data
-    dailycollector = np.array([])
-    monthlycollector = np.array([])
+    # get in necessary form
+    InflowData = RawData[list(RawData)[3]] # gets ndarray of actual data
+    MonthlyInflowRecords = InflowData['mandy'] # gets monthly records of flow for all inflow sites
+    DailyInflowRecords = InflowData['daily'] # gets daily records of flow for all inflow sites
     
+    monthly_flows = {}; daily_flows = {}
+    for site in monthlysites:
+        monthly_flows[site] = MonthlyInflowRecords.item(0)[site][0,0][0:monthlyrecordlength,0]
+    for site in dailysites:
+        daily_flows[site] = DailyInflowRecords.item(0)[site][0,0][0:dailyrecordlength,0]
+        
+    return sim, monthly_flows, daily_flows
+
+
+def read_FMS_daily_dates(sim):
     # monthly data is easily aggregated to yearly levels, but daily data
     # requires an index of month and year to make manipulation better later
-    # get initial year and month values for daily data
-    if site in dailysites:
-        RawData = sio.loadmat('000' + str(1) + '_SimRain_NPMonthlyNoise_NPDailyNoise_Nov2011.mat')
-        InflowData = RawData[list(RawData)[3]] # gets ndarray of actual data
-        DailyInflowRecords = InflowData['daily'] # gets daily records of flow for all inflow sites
-        
-        # ONLY KEEP 15000 DAILY RECORDS, about 40 years
-        # first two rows of collected data is the year and month of simulation
-        dailycollector = np.concatenate((dailycollector, DailyInflowRecords.item(0)['dv'][0,0][0:dailyrecordlength,0]), axis=0)
-        dailycollector = np.concatenate((dailycollector, DailyInflowRecords.item(0)['dv'][0,0][0:dailyrecordlength,1]), axis=0)
+    # ONLY KEEP 15000 DAILY RECORDS, about 40 years
+    RawData = sio.loadmat(get_FMS_filename(sim))
+    InflowData = RawData[list(RawData)[3]] # gets ndarray of actual data
+    DailyInflowRecords = InflowData['daily'] # gets daily records of flow for all inflow sites
     
-    # loop through all sites for actual flow data
-    for sim in sims:
-        
-        # this is an ugly statement but captures the correct file
-        # read the data
-        if sim < 10:
-            RawData = sio.loadmat('1000_flow_realization/sim_' + '000' + str(sim) + '_SimRain_NPMonthlyNoise_NPDailyNoise_Nov2011.mat')
-        elif sim < 100:
-            RawData = sio.loadmat('1000_flow_realization/sim_' + '00' + str(sim) + '_SimRain_NPMonthlyNoise_NPDailyNoise_Nov2011.mat')
-        elif sim < 1000:
-            RawData = sio.loadmat('1000_flow_realization/sim_' + '0' + str(sim) + '_SimRain_NPMonthlyNoise_NPDailyNoise_Nov2011.mat')
-        else:
-            RawData = sio.loadmat('1000_flow_realization/sim_' + str(sim) + '_SimRain_NPMonthlyNoise_NPDailyNoise_Nov2011.mat')
-        
-        # get in necessary form
-        InflowData = RawData[list(RawData)[3]] # gets ndarray of actual data
-        MonthlyInflowRecords = InflowData['mandy'] # gets monthly records of flow for all inflow sites
-        DailyInflowRecords = InflowData['daily'] # gets daily records of flow for all inflow sites
-        
-        # collect in one row
+    year_month = np.stack((DailyInflowRecords.item(0)['dv'][0,0][0:dailyrecordlength,0],
+                           DailyInflowRecords.item(0)['dv'][0,0][0:dailyrecordlength,1]))
+    return year_month
+
+
+def write_csv(filename, rows):
+    myFile = open(filename, 'w')  
+    with myFile:
+        writer = csv.writer(myFile, lineterminator = '\n')
+        writer.writerows(rows)
+
+
+if __name__ == '__main__':
+    # Step 2: preallocate memory-mapped arrays for each site
+    # as this code is set up, it is saved to a file within a subfolder
+    # named with the site name
+    monthlycollector = {}; dailycollector = {}
+    for site in np.unique(monthlysites + dailysites):
+        if not os.path.exists(site):
+            os.mkdir(site)
         if site in monthlysites:
-            monthlycollector = np.concatenate((monthlycollector, MonthlyInflowRecords.item(0)[site][0,0][:,0]), axis=0)
+            monthlycollector[site] = np.lib.format.open_memmap(
+                    site + '/monthlyflowrealizations.npy', mode = 'w+', 
+                    dtype = np.float64, shape = (len(sims), monthlyrecordlength))
         if site in dailysites:
-            dailycollector = np.concatenate((dailycollector, DailyInflowRecords.item(0)[site][0,0][0:dailyrecordlength,0]), axis=0)
+            dailycollector[site] = np.lib.format.open_memmap(
+                    site + '/dailyflowrealizations.npy', mode = 'w+', 
+                    dtype = np.float64, shape = (len(sims), dailyrecordlength))
+    
+    # year and month of daily records are the same for all realizations
+    daily_year_month = read_FMS_daily_dates(sims[0])
+    np.save('daily_year_month.npy', daily_year_month)
+    
+    # Step 3: read each realization file once (in parallel) and
+    # collect flow values into its row of each site array
+    row_of_sim = {sim: row for row, sim in enumerate(sims)}
+    with Pool() as pool:
+        for sim, monthly_flows, daily_flows in pool.imap_unordered(read_FMS_realization, sims):
+            for site in monthlysites:
+                monthlycollector[site][row_of_sim[sim], :len(monthly_flows[site])] = monthly_flows[site]
+            for site in dailysites:
+                dailycollector[site][row_of_sim[sim], :len(daily_flows[site])] = daily_flows[site]
+    
+    for site in monthlycollector:
+        monthlycollector[site].flush()
+    for site in dailycollector:
+        dailycollector[site].flush()
 
-    # Step 3: Write data for each site to csv
-    # as this code is set up, it is saved to a file within a subfolder
-    # named with the site name - this may require another line of code 
-    # to create the folder. there may also be errors if the file already exists
-    # when you try to write a new one. just delete the old copy
-    if site in dailysites:
-        collector_aranged = np.reshape(dailycollector,[int(dailycollector.size/dailyrecordlength),dailyrecordlength], order = 'C')     
-        myFile = open(site + '/dailyflowrealizations.csv', 'w')  
-        with myFile:
-            writer = csv.writer(myFile, lineterminator = '\n')
-            writer.writerows(collector_aranged)
-
-    if site in monthlysites:
-        collector_aranged = np.reshape(monthlycollector,[int(monthlycollector.size/monthlyrecordlength),monthlyrecordlength], order = 'C')     
-        myFile = open(site + '/monthlyflowrealizations.csv', 'w')  
-        with myFile:
-            writer = csv.writer(myFile, lineterminator = '\n')
-            writer.writerows(collector_aranged)
\ No newline at end of file
+    # Step 4: (optional) write data for each site to csv
+    if EXPORT_CSV:
+        for site in dailysites:
+            write_csv(site + '/dailyflowrealizations.csv', 
+                      np.vstack((daily_year_month, dailycollector[site])))
+        for site in monthlysites:
+            write_csv(site + '/monthlyflowrealizations.csv', monthlycollector[site])
@@ -0,0 +1,313 @@
+import os
+import re
+import json
+import hashlib
+from glob import glob
+import numpy as np
+import pandas as pd
+from analysis_functions import read_AMPL_csv, read_AMPL_log, read_AMPL_out, select_AMPL_columns
+
+# CATALOG OF SWRE RUN/REALIZATION OUTPUT FILES WITH LAZY LOADERS
+# each run is indexed once: for every realization the cleaned AMPL csv,
+# raw AMPL csv, .log, .out and OMS .mat files are located and their
+# size, modification time, checksum, row count, columns and date range
+# are stored in a small json file so later scripts can list and validate
+# a run without crawling directories or slicing file names
+#
+# example:
+#   catalog = Catalog()
+#   catalog.build(141)  # only needed once per run, or after files change
+#   data = catalog.run(141).realization(378).ampl(columns = ['total_demand__none'])
+# -----------------------------------------------------------------------------
+
+# where run output lives, {run} and {realization} are filled with
+# 4-digit ids (i.e. run0141/ampl_0378.csv)
+DEFAULT_PATHS = {'ampl' : 'F:/MonteCarlo_Project/Cornell_UNC/cleaned_AMPL_files/run{run}/ampl_{realization}.csv',
+                 'csv'  : 'F:/SWRE/Output/rrv_{run}/ampl_{realization}.csv',
+                 'log'  : 'F:/SWRE/Output/rrv_{run}/ampl_{realization}.log',
+                 'out'  : 'F:/SWRE/Output/rrv_{run}/ampl_{realization}.out',
+                 'mat'  : 'F:/SWRE/Output/rrv_{run}/sim_{realization}.mat'}
+
+# where catalog index files and cached binary copies of data are kept
+DEFAULT_CATALOG_PATH = 'F:/MonteCarlo_Project/Cornell_UNC/catalog'
+
+FILE_KINDS = ['ampl', 'csv', 'log', 'out', 'mat']
+TEXT_FILE_KINDS = ['ampl', 'csv', 'log', 'out']
+
+
+def format_id(number):
+    # 141 -> '0141', 378 -> '0378', matches file naming in SWRE output
+    return str(10000 + int(number))[1:]
+
+
+def find_realization_ids(path_template, run):
+    # find realization ids present on disk by matching the path template
+    pattern = re.escape(path_template.format(run = format_id(run), realization = '{realization}'))
+    pattern = pattern.replace(re.escape('{realization}'), '([0-9]+)')
+    pattern = re.compile(pattern.replace('/', '[/\\\\]'), re.IGNORECASE)
+
+    realization_ids = []
+    for f in glob(path_template.format(run = format_id(run), realization = '*')):
+        match = pattern.search(f)
+        if match is not None:
+            realization_ids.append(int(match.group(1)))
+
+    return realization_ids
+
+
+def summarize_file(filename, kind, checksum = True):
+    # collect file attributes, reading text files once to get
+    # the checksum and number of lines in the same pass
+    stats = os.stat(filename)
+    summary = {'path' : filename, 'size' : stats.st_size, 'mtime' : stats.st_mtime}
+
+    if checksum or kind in TEXT_FILE_KINDS:
+        md5 = hashlib.md5(); n_lines = 0
+        with open(filename, 'rb') as f:
+            for block in iter(lambda: f.read(2**20), b''):
+                md5.update(block)
+                n_lines += block.count(b'\n')
+        if checksum:
+            summary['md5'] = md5.hexdigest()
+        if kind in TEXT_FILE_KINDS:
+            summary['rows'] = n_lines - 1 if kind in ['ampl', 'csv'] else n_lines
+
+    # column names as pandas reports them when reading the file
+    if kind in ['ampl', 'csv']:
+        summary['columns'] = [str(c) for c in pd.read_csv(filename, nrows = 0).columns]
+
+    return summary
+
+
+def index_realization(paths, run, realization, checksum = True, read_dates = True):
+    # index every available file of one realization
+    record = {'realization' : int(realization)}
+    for kind in FILE_KINDS:
+        filename = paths[kind].format(run = format_id(run), realization = format_id(realization))
+        if os.path.exists(filename):
+            record[kind] = summarize_file(filename, kind, checksum)
+
+    # date range of the realization is taken from the .out file
+    if read_dates and 'out' in record:
+        dates = read_AMPL_out(record['out']['path'])['Date']
+        record['dates'] = [str(int(min(dates))), str(int(max(dates)))]
+
+    return record
+
+
+class RealizationFiles:
+    # lazy accessors for the files of a single realization
+    def __init__(self, run_catalog, record):
+        self.run_catalog = run_catalog
+        self.record = record
+        self.realization = record['realization']
+
+    def has(self, kind):
+        return kind in self.record
+
+    def path(self, kind):
+        if kind not in self.record:
+            raise FileNotFoundError('No ' + kind + ' file indexed for run ' +
+                                    format_id(self.run_catalog.run) + ' realization ' +
+                                    format_id(self.realization))
+        return self.record[kind]['path']
+
+    @property
+    def columns(self):
+        for kind in ['ampl', 'csv']:
+            if kind in self.record:
+                return self.run_catalog.column_sets[self.record[kind]['columns']]
+        return []
+
+    @property
+    def n_days(self):
+        return self.record['ampl']['rows'] if 'ampl' in self.record else np.nan
+
+    @property
+    def dates(self):
+        return self.record.get('dates', [None, None])
+
+    def cache_path(self):
+        return os.path.join(self.run_catalog.cache_folder(), 'ampl_' + format_id(self.realization) + '.npy')
+
+    def cache_ampl(self):
+        # store a binary copy of the cleaned AMPL file that can be
+        # memory-mapped so later column reads skip csv parsing
+        columns = self.run_catalog.column_sets[self.record['ampl']['columns']]
+        data = pd.read_csv(self.path('ampl'))
+        data.columns = columns
+        os.makedirs(self.run_catalog.cache_folder(), exist_ok = True)
+        np.save(self.cache_path(), data.values.astype(np.float64))
+
+    def ampl(self, columns = None, analyses = None):
+        # cleaned AMPL data, read from the fastest representation available:
+        # (1) cached binary copy, (2) cleaned csv, (3) raw AMPL csv
+        # columns can be listed directly or taken from the columns
+        # registered by analyses (see register_AMPL_columns)
+        if analyses is not None and 'ampl' in self.record:
+            columns = list(dict.fromkeys((columns or []) + 
+                                         select_AMPL_columns(self.columns, analyses)))
+        if columns is not None and 'ampl' in self.record:
+            missing = [c for c in columns if c not in self.columns]
+            if len(missing) > 0:
+                raise KeyError('Columns not in run ' + format_id(self.run_catalog.run) +
+                               ' realization ' + format_id(self.realization) + ': ' +
+                               ', '.join(missing))
+
+        # cached copy is only used if it was written after the csv was indexed
+        if 'ampl' in self.record and os.path.exists(self.cache_path()) and \
+            os.stat(self.cache_path()).st_mtime >= self.record['ampl']['mtime']:
+            all_columns = self.columns
+            use_columns = all_columns if columns is None else columns
+            column_position = {c: i for i, c in enumerate(all_columns)}
+            data = np.load(self.cache_path(), mmap_mode = 'r')
+            return pd.DataFrame(np.array(data[:, [column_position[c] for c in use_columns]]),
+                                columns = use_columns)
+
+        if 'ampl' in self.record:
+            return pd.read_csv(self.path('ampl'), usecols = columns)[columns] \
+                if columns is not None else pd.read_csv(self.path('ampl'))
+
+        raw_path = self.path('csv')
+        ampl_out = read_AMPL_csv(os.path.dirname(raw_path) + '/', None,
+                                 os.path.basename(raw_path), export = False)
+        return ampl_out if columns is None else ampl_out[columns]
+
+    def raw_csv(self, columns = None):
+        return pd.read_csv(self.path('csv'), usecols = columns)
+
+    def log(self):
+        return read_AMPL_log(self.path('log'))
+
+    def out(self):
+        return read_AMPL_out(self.path('out'))
+
+    def mat(self):
+        import h5py
+        return h5py.File(self.path('mat'), 'r')
+
+
+class RunCatalog:
+    # index of all realizations of one run, loaded from its json file
+    def __init__(self, catalog, run, index):
+        self.catalog = catalog
+        self.run = int(run)
+        self.paths = index['paths']
+        self.column_sets = index['column_sets']
+        self.records = {int(r['realization']): r for r in index['realizations']}
+
+    @property
+    def realizations(self):
+        return sorted(self.records.keys())
+
+    def realization(self, realization):
+        if int(realization) not in self.records:
+            raise KeyError('Realization ' + format_id(realization) +
+                           ' not indexed for run ' + format_id(self.run))
+        return RealizationFiles(self, self.records[int(realization)])
+
+    def __iter__(self):
+        for r in self.realizations:
+            yield self.realization(r)
+
+    def __len__(self):
+        return len(self.records)
+
+    def cache_folder(self):
+        return os.path.join(self.catalog.catalog_path, 'run' + format_id(self.run))
+
+    def summary(self):
+        # one row per realization showing which files exist and their sizes
+        rows = []
+        for r in self.realizations:
+            record = self.records[r]
+            row = {'Realization' : r}
+            for kind in FILE_KINDS:
+                row[kind] = kind in record
+            row['Days'] = record['ampl']['rows'] if 'ampl' in record else np.nan
+            row['Start Date'], row['End Date'] = record.get('dates', [None, None])
+            rows.append(row)
+        return pd.DataFrame(rows)
+
+    def validate(self, deep = False):
+        # check indexed files still match what is on disk, quick check uses
+        # file size and modification time, deep check recomputes checksums
+        problems = []
+        for r in self.realizations:
+            record = self.records[r]
+            for kind in FILE_KINDS:
+                if kind not in record:
+                    continue
+                filename = record[kind]['path']
+                if not os.path.exists(filename):
+                    problems.append([r, kind, filename, 'missing'])
+                    continue
+                stats = os.stat(filename)
+                if stats.st_size != record[kind]['size'] or stats.st_mtime != record[kind]['mtime']:
+                    problems.append([r, kind, filename, 'modified'])
+                elif deep and 'md5' in record[kind]:
+                    if summarize_file(filename, kind, checksum = True)['md5'] != record[kind]['md5']:
+                        problems.append([r, kind, filename, 'checksum mismatch'])
+
+        return pd.DataFrame(problems, columns = ['Realization', 'File', 'Path', 'Problem'])
+
+
+class Catalog:
+    # entry point for finding run/realization data
+    def __init__(self, catalog_path = DEFAULT_CATALOG_PATH, paths = DEFAULT_PATHS):
+        self.catalog_path = catalog_path
+        self.paths = dict(paths)
+        self.loaded_runs = {}
+
+    def index_filename(self, run):
+        return os.path.join(self.catalog_path, 'catalog_run' + format_id(run) + '.json')
+
+    def runs(self):
+        return sorted([int(os.path.basename(f)[11:15]) for f in
+                       glob(os.path.join(self.catalog_path, 'catalog_run*.json'))])
+
+    def build(self, run, realizations = None, checksum = True, read_dates = True,
+              n_processes = None):
+        # find all realizations with any file present and index them in parallel
+        if realizations is None:
+            realizations = set()
+            for kind in FILE_KINDS:
+                realizations.update(find_realization_ids(self.paths[kind], run))
+            realizations = sorted(realizations)
+
+        from multiprocessing import Pool
+        with Pool(n_processes) as pool:
+            records = pool.starmap(index_realization,
+                                   [(self.paths, run, r, checksum, read_dates) for r in realizations])
+
+        # most realizations share identical column lists,
+        # so store each unique list once and refer to it by position
+        column_sets = []; column_set_ids = {}
+        for record in records:
+            for kind in ['ampl', 'csv']:
+                if kind in record:
+                    key = tuple(record[kind]['columns'])
+                    if key not in column_set_ids:
+                        column_set_ids[key] = len(column_sets)
+                        column_sets.append(list(key))
+                    record[kind]['columns'] = column_set_ids[key]
+
+        index = {'run' : int(run), 'paths' : self.paths,
+                 'column_sets' : column_sets, 'realizations' : records}
+
+        os.makedirs(self.catalog_path, exist_ok = True)
+        with open(self.index_filename(run), 'w') as f:
+            json.dump(index, f)
+
+        self.loaded_runs[int(run)] = RunCatalog(self, run, index)
+        return self.loaded_runs[int(run)]
+
+    def run(self, run):
+        # load index of a run, building it first if it does not exist yet
+        if int(run) not in self.loaded_runs:
+            if not os.path.exists(self.index_filename(run)):
+                return self.build(run)
+            with open(self.index_filename(run), 'r') as f:
+                self.loaded_runs[int(run)] = RunCatalog(self, run, json.load(f))
+
+        return self.loaded_runs[int(run)]
@@ -1,9 +1,8 @@
-import statsmodels.api as sm
-from statsmodels.sandbox.regression.predstd import wls_prediction_std
-from scipy.stats import t
 import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
+from regression_screening import batched_least_squares, design_matrix, \
+    prediction_interval, bootstrap_prediction_bands
 sns.set()
 
 # load summary data
@@ -18,24 +17,19 @@ penalty = summary_data[:,5]
 
 
 # fit linear model of TRG offset from demand
-demand = sm.add_constant(demand)
-demand_TRG_model = sm.OLS(TRG_offset[4:326]/20,demand[4:326,:])
+params, sigma2, standard_errors, r_squared = \
+    batched_least_squares(design_matrix(demand[4:326]), TRG_offset[4:326]/20)
 
-results = demand_TRG_model.fit()
+print('TRG offset = %.2f (%.2f) + %.2f (%.2f) * demand, R2 = %.3f' %
+      (params[0], standard_errors[0], params[1], standard_errors[1], r_squared))
 
-#print results.params
-print results.summary()
-
-prediction = np.ones(len(demand[4:326,:]))
-
-for i in range(0,len(prediction)): 
-	prediction[i] = results.params[0] + results.params[1]*demand[i+4,1]
+prediction = design_matrix(demand[4:326]) @ params
 
 # plot the OLS fit
 fig, ax = plt.subplots(1,1, figsize=(9,7))
 plt.rc('font', size=16)
-ax.scatter(demand[4:326,1], TRG_offset[4:326]/20, c='g', alpha=.7, s=70, edgecolor='none')
-ax.plot(demand[4:326,1], prediction, c='black')
+ax.scatter(demand[4:326], TRG_offset[4:326]/20, c='g', alpha=.7, s=70, edgecolor='none')
+ax.plot(demand[4:326], prediction, c='black')
 ax.set_xlim([140, 280])
 ax.set_ylim([200000/20, 800000/20])
 #ax.set_xticklabels([140, 160, 180, 200, 220, 240, 260], fontsize=14)
@@ -61,27 +55,19 @@ seventyfifthpercentile = demand_predictions[:,4]
 ninetyfifthpercentile = demand_predictions[:,5]
 
 
-fifthpercentile = sm.add_constant(fifthpercentile)
-fifth_sdev, fifth_lower, fifth_upper = wls_prediction_std(results, exog=fifthpercentile, alpha=.1)
-
-fiftiethpercentile = sm.add_constant(fiftiethpercentile)
-fiftieth_sdev, fiftieth_lower, fiftieth_upper = wls_prediction_std(results, exog=fiftiethpercentile, alpha=.1)
-
-seventyfifthpercentile = sm.add_constant(seventyfifthpercentile)
-seventyfifth_sdev, seventyfifth_lower, seventyfifth_upper = wls_prediction_std(results, exog=seventyfifthpercentile, alpha=.1)
-
-ninetyfifthpercentile = sm.add_constant(ninetyfifthpercentile)
-ninetyfifth_sdev, ninetyfifth_lower, ninetyfifth_upper = wls_prediction_std(results, exog=ninetyfifthpercentile, alpha=.1)
+# prediction intervals (90%) of each demand percentile, all years at once
+fifth_predictions, fifth_lower, fifth_upper = \
+    prediction_interval(demand[4:326], TRG_offset[4:326]/20, fifthpercentile, alpha=.1)
+fiftieth_predictions, fiftieth_lower, fiftieth_upper = \
+    prediction_interval(demand[4:326], TRG_offset[4:326]/20, fiftiethpercentile, alpha=.1)
+seventyfifth_predictions, seventyfifth_lower, seventyfifth_upper = \
+    prediction_interval(demand[4:326], TRG_offset[4:326]/20, seventyfifthpercentile, alpha=.1)
+ninetyfifth_predictions, ninetyfifth_lower, ninetyfifth_upper = \
+    prediction_interval(demand[4:326], TRG_offset[4:326]/20, ninetyfifthpercentile, alpha=.1)
 
-fifth_predictions = np.ones(len(fifthpercentile))
-fiftieth_predictions = np.ones(len(fiftiethpercentile))
-seventyfifth_predictions = np.ones(len(seventyfifthpercentile))
-ninetyfifth_predictions = np.ones(len(ninetyfifthpercentile))
-for i in range(0, len(year)): 
-	fifth_predictions[i] = results.params[0] + results.params[1]*fifthpercentile[i,1]
-	fiftieth_predictions[i] = results.params[0] + results.params[1]*fiftiethpercentile[i,1]
-	seventyfifth_predictions[i] = results.params[0] + results.params[1]*seventyfifthpercentile[i,1]
-	ninetyfifth_predictions[i] = results.params[0] + results.params[1]*ninetyfifthpercentile[i,1]
+# bootstrap confidence band of the fitted line along the median projection
+fiftieth_band = bootstrap_prediction_bands(demand[4:326], TRG_offset[4:326]/20,
+                                           fiftiethpercentile, n_resamples=5000, alpha=.1)
 
 fig, ax = plt.subplots(1,1, figsize=(9,7))
 #ax.fill_between(year, fiftieth_lower, fiftieth_upper, color='green', alpha=.1)
@@ -90,6 +76,7 @@ fig, ax = plt.subplots(1,1, figsize=(9,7))
 #ax.plot(year, seventyfifth_predictions, c='blue')
 ax.fill_between(year, fifth_lower, ninetyfifth_upper, color='green', alpha=.1)
 ax.plot(year, fiftieth_predictions, c='green')
+ax.fill_between(year, fiftieth_band['lower'], fiftieth_band['upper'], color='green', alpha=.2)
 ax.plot(year, fifth_lower, color='green', alpha=.5,linewidth=.5)
 ax.plot(year, ninetyfifth_upper, color='green', alpha=.5,linewidth=.5)
 ax.set_ylim([0,35000])
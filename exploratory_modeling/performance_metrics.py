@@ -2,8 +2,61 @@ import numpy as np
 import pandas as pd
 from glob import glob
 import os
+import sys
 import time
 
+# analysis_functions is in data_management in this repository (and was kept
+# in the Visualization folder on the original setup), both are put on the
+# path so Pool workers can import it whatever the working directory is
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data_management'))
+sys.path.append('C:\\Users\\dgorelic\\OneDrive - University of North Carolina at Chapel Hill\\UNC\\Research\\TBW\\Code\\Visualization')
+from analysis_functions import read_AMPL_log
+
+# folder with the cleaned_<run> outputs of the runs compared in tradeoff plots
+#   0079 is base run, plan Z2
+#   0080 is a slight change on base run, plan A2
+#   0082 is concept 1
+#   0087 is concept 6A
+#   0102 is plan X4
+#   0103 is plan X5
+TRADEOFF_RUNS_PATH = 'C:/Users/dgorelic/Desktop/TBWruns'
+#TRADEOFF_RUNS_PATH = 'C:/Users/dgorelic/OneDrive - University of North Carolina at Chapel Hill/UNC/Research/TBW/Data'
+TRADEOFF_SIMULATIONS = ['0079','0080','0082','0087','0102','0103']
+#TRADEOFF_SIMULATIONS = ['0079','0080','0082','0087']
+
+
+# permit overage (groundwater) and slack (surface water) variables
+# counted as violations of the level of service
+GW_VIOLATION_VARIABLES = ['wup_mavg_pos__BUD','wup_mavg_pos__CWUP','wup_mavg_pos__SCH']
+SW_VIOLATION_VARIABLES = ['ngw_slack__Alafia','ngw_slack__TBC']
+
+
+def get_violations(csv_file):
+    # (day x variable) array of GW then SW violation variables,
+    # variables that are not tracked and missing days are 0
+    variables = GW_VIOLATION_VARIABLES + SW_VIOLATION_VARIABLES
+    violations = np.zeros((len(csv_file), len(variables)))
+    tracked = [i for i, v in enumerate(variables) if v in csv_file.columns]
+    violations[:,tracked] = csv_file[[variables[i] for i in tracked]].values
+    
+    return np.nan_to_num(violations)
+
+
+def calc_LOS_batch(violations):
+    # level of service for a (realization x day x variable) stack of 
+    # violations (see get_violations), realization length is taken from
+    # the data. returns fraction of days with any violation, number of 
+    # variables in violation each day and total violation each day
+    violations = np.asarray(violations, dtype = np.float64)
+    if violations.ndim == 2:
+        violations = violations[np.newaxis,:,:]
+    
+    Total_Violations = (violations > 0).sum(axis = 2)
+    Violation_Magnitude = violations.sum(axis = 2)
+    LOS_All = (Total_Violations > 0).mean(axis = 1)
+    
+    return LOS_All, Total_Violations, Violation_Magnitude
+
 
 def calc_LOS(csv_file):
 	
@@ -12,40 +65,10 @@ def calc_LOS(csv_file):
     #  FOR WHICH VIOLATIONS OF PERMITS ARE TRACKED CUMULATIVELY AS
     #  THE OVERAGE TERM IN THE OUT FILE
     # if the variable wup_mavg_pos__CWUP exists, then according to TBW demands can be met with satisfaction
+    # also record number of violations and magnitude of events each day for later
+    LOS_All, Total_Violations, Violation_Magnitude = calc_LOS_batch(get_violations(csv_file))
 
-
-    CWUP_Violations = 0
-    if max(csv_file.columns.str.find('wup_mavg_pos__CWUP')) != -1: # if variable is tracked...
-        CWUP_Violations = sum(csv_file['wup_mavg_pos__CWUP'].dropna() > 0)
-    
-    # convert metrics into fraction of time violations occur
-    LOS_CWUP = CWUP_Violations / 7304 # divide by number of simulated days
-    
-    # what about days with any violation? 
-    # also record magnitude of events for later
-    Total_GW_Violations = np.zeros((7304)); Total_SW_Violations = np.zeros((7304))
-    Mag_GW_Violations = np.zeros((7304)); Mag_SW_Violations = np.zeros((7304))
-    for gw in ['wup_mavg_pos__BUD','wup_mavg_pos__CWUP','wup_mavg_pos__SCH']:
-        if max(csv_file.columns.str.find(gw)) != -1: # if variable is tracked...
-            which_NaN = np.isnan(csv_file[gw]); csv_file[gw][which_NaN] = 0
-            Total_GW_Violations = [Total_GW_Violations[a] + (csv_file[gw][a] > 0) for a in range(len(csv_file[gw]))]
-            Mag_GW_Violations = [Mag_GW_Violations[a] + csv_file[gw][a] for a in range(len(csv_file[gw]))]
-            
-    for sw in ['ngw_slack__Alafia','ngw_slack__TBC']:
-        if max(csv_file.columns.str.find(sw)) != -1: # if variable is tracked...
-            which_NaN = np.isnan(csv_file[sw]); csv_file[sw][which_NaN] = 0
-            Total_SW_Violations = [Total_SW_Violations[a] + (csv_file[sw][a] > 0) for a in range(len(csv_file[sw]))]
-            Mag_SW_Violations = [Mag_SW_Violations[a] + csv_file[sw][a] for a in range(len(csv_file[sw]))]
-    
-    Total_Violations = [Total_SW_Violations[a] + Total_GW_Violations[a] for a in range(len(Total_SW_Violations))]
-    LOS_All = 0
-    for a in range(len(Total_Violations)): 
-        if Total_Violations[a] > 0: LOS_All += 1
-    LOS_All = LOS_All / 7304
-
-    Violation_Magnitude = [Mag_SW_Violations[a] + Mag_GW_Violations[a] for a in range(len(Total_SW_Violations))]
-
-    return LOS_All, Total_Violations, Violation_Magnitude
+    return LOS_All[0], Total_Violations[0], Violation_Magnitude[0]
 
 
 def calc_environmental_burden(csv_file, log_file):
@@ -67,38 +90,59 @@ def calc_environmental_burden(csv_file, log_file):
 
     return Environmental_Burden
 
-def find_failure_periods(Total_Violations, Violation_Magnitude):
-	#determine periods of unmet demand
-	failureconditions = 0; counter = 0; largefailure = 0;
-	length_of_fail = []; magnitude_of_fail =[]; magnitude_count = 0
-
-	for k in range(len(Total_Violations)):
-		if Total_Violations[k] > 0:
-			magnitude_count += Violation_Magnitude[k]	
-			counter += 1
-		elif counter > 14: # how bad was the event?
-			length_of_fail.append(counter)
-			magnitude_of_fail.append(magnitude_count)
-			counter = 0
-			magnitude_count = 0 # reset
-		# if failure occurs long enough to be an issue for reliability
-		# treat each event the same: a 15-day unmanageable event
-		# counted the same as a 100-day one... 
-		if counter == 15: failureconditions += 1
-		if counter == 365: largefailure += 1
-    
-	# use the number of 2+ week-long periods where demands cannot be met
-	# as a proxy for the need for short-term mitigation
-	Unmanageable_Event_Count = failureconditions
-	Annual_Failures = largefailure
-	Unmanageable_Severity_95th = 0
-	Unmanageable_Duration_95th = 0
-	if len(length_of_fail) > 0:
-		Unmanageable_Duration_95th = np.quantile(length_of_fail, 0.95)
-		Unmanageable_Severity_95th = np.quantile(magnitude_of_fail, 0.95)
+def find_failure_events(Total_Violations):
+    # run-length encoding of consecutive days with any violation for a 
+    # (realization x day) array, returns realization, first day and length
+    # of every event in order of realization and day
+    in_violation = np.atleast_2d(np.asarray(Total_Violations) > 0)
+    padded = np.zeros((in_violation.shape[0], in_violation.shape[1] + 2), dtype = np.int8)
+    padded[:,1:-1] = in_violation
+    change = np.diff(padded, axis = 1)
+    realization, start = np.nonzero(change == 1)
+    end = np.nonzero(change == -1)[1]
+    
+    return realization, start, end - start
+
+
+def find_failure_periods_batch(Total_Violations, Violation_Magnitude, 
+                               unmanageable_days = 15, large_failure_days = 365):
+    # failure event statistics for (realization x day) arrays from calc_LOS_batch
+    Total_Violations = np.atleast_2d(Total_Violations)
+    Violation_Magnitude = np.atleast_2d(np.asarray(Violation_Magnitude, dtype = np.float64))
+    n_realizations = Total_Violations.shape[0]
+    realization, start, length = find_failure_events(Total_Violations)
+    
+    # total violation over each event from cumulative sums
+    cumulative = np.concatenate((np.zeros((n_realizations, 1)), 
+                                 np.cumsum(Violation_Magnitude, axis = 1)), axis = 1)
+    magnitude = cumulative[realization, start + length] - cumulative[realization, start]
+    
+    # if failure occurs long enough to be an issue for reliability
+    # treat each event the same: a 15-day unmanageable event
+    # counted the same as a 100-day one... 
+    # use the number of 2+ week-long periods where demands cannot be met
+    # as a proxy for the need for short-term mitigation
+    unmanageable = length >= unmanageable_days
+    Unmanageable_Event_Count = np.bincount(realization[unmanageable], minlength = n_realizations)
+    Annual_Failures = np.bincount(realization[length >= large_failure_days], minlength = n_realizations)
+    
+    # how bad were the unmanageable events?
+    Unmanageable_Severity_95th = np.zeros(n_realizations)
+    Unmanageable_Duration_95th = np.zeros(n_realizations)
+    for r in np.unique(realization[unmanageable]):
+        events = unmanageable & (realization == r)
+        Unmanageable_Duration_95th[r] = np.quantile(length[events], 0.95)
+        Unmanageable_Severity_95th[r] = np.quantile(magnitude[events], 0.95)
+    
+    return Unmanageable_Event_Count, Annual_Failures, Unmanageable_Severity_95th, Unmanageable_Duration_95th
 
-	
-	return Unmanageable_Event_Count, Annual_Failures, Unmanageable_Severity_95th, Unmanageable_Duration_95th
+
+def find_failure_periods(Total_Violations, Violation_Magnitude):
+    #determine periods of unmet demand
+    Unmanageable_Event_Count, Annual_Failures, Unmanageable_Severity_95th, Unmanageable_Duration_95th = \
+        find_failure_periods_batch(Total_Violations, Violation_Magnitude)
+    
+    return Unmanageable_Event_Count[0], Annual_Failures[0], Unmanageable_Severity_95th[0], Unmanageable_Duration_95th[0]
 
 def calc_cost(run):
 	
@@ -130,4 +174,132 @@ def calc_cost(run):
     
     Additional_Capital_Costs = lcc
 
-    return Additional_Capital_Costs
\ No newline at end of file
+    return Additional_Capital_Costs
+
+# summary features of each realization for tradeoff plots
+TRADEOFF_FEATURES = ['Simulation', 'SimOrder', 'Realization', 
+                     'Level of Service (CWUP only)', 'Level of Service (all GW)', 
+                     'Level of Service (SW only)', 'Level of Service (all)',
+                     'Environmental Burden (target offset)', 
+                     'Average SCH Production (MGD)', 'Average SCH Node 1 Demand (MGD)', 'Average SCH Node 2 Demand (MGD)',
+                     '95th Percentile SCH Production', '95th Percentile SCH Node 1 Demand', '95th Percentile SCH Node 2 Demand',
+                     'Unmanageable Events (15+ day events)', 'Annual Failures (365+ day events)',
+                     'Unmanageable Duration 95th Percentile (days)', 
+                     'Unmanageable Severity 95th Percentile (total MG deficit)',
+                     'Capital Costs ($MM)']
+
+
+def calc_LOS_by_source(csv_file):
+    # fraction of days with CWUP violations, and of days x variables with 
+    # GW violations and SW violations
+    violations = get_violations(csv_file) > 0
+    n_gw = len(GW_VIOLATION_VARIABLES)
+    LOS_CWUP = violations[:,GW_VIOLATION_VARIABLES.index('wup_mavg_pos__CWUP')].sum() / len(csv_file)
+    LOS_GW = violations[:,:n_gw].sum() / len(csv_file)
+    LOS_SW = violations[:,n_gw:].sum() / len(csv_file)
+    
+    return LOS_CWUP, LOS_GW, LOS_SW
+
+
+def calc_SCH_statistics(csv_file):
+    # offset data not clearly available for SCH wells?
+    # keep a variety of SCH data in place of offset values
+    SCH_data = csv_file[['wf_prod__SCH', 'demand__SCH_1', 'demand__SCH_2']].values
+    
+    return list(np.mean(SCH_data, axis = 0)) + list(np.quantile(SCH_data, 0.95, axis = 0))
+
+
+def file_checksum(filename):
+    import hashlib
+    md5 = hashlib.md5()
+    with open(filename, 'rb') as f:
+        for block in iter(lambda: f.read(2**20), b''):
+            md5.update(block)
+    return md5.hexdigest()
+
+
+def file_signature(filename, cached = None):
+    # [size, modification time, md5] of a file, the checksum is only
+    # computed again when size or modification time differ from cached
+    stats = os.stat(filename)
+    if cached is not None and cached[0] == stats.st_size and cached[1] == stats.st_mtime:
+        return list(cached)
+    return [stats.st_size, stats.st_mtime, file_checksum(filename)]
+
+
+SIGNATURE_COLUMNS = ['CSV Size', 'CSV MTime', 'CSV MD5', 'Log Size', 'Log MTime', 'Log MD5']
+
+
+def extract_realization_features(run, sim_order, realization, csv_filename, log_filename):
+    # worker: all tradeoff features of one realization
+    csv_out = pd.read_csv(csv_filename)
+    log_out = read_AMPL_log(log_filename)
+    
+    LOS_CWUP, LOS_GW, LOS_SW = calc_LOS_by_source(csv_out)
+    LOS_All, Total_Violations, Violation_Magnitude = calc_LOS(csv_out)
+    Environmental_Burden = calc_environmental_burden(csv_out, log_out)
+    Unmanageable_Event_Count, Annual_Failures, Unmanageable_Severity_95th, \
+    Unmanageable_Duration_95th = find_failure_periods(Total_Violations, Violation_Magnitude)
+    
+    return [run, sim_order, realization, 
+            1-LOS_CWUP, 1-LOS_GW, 1-LOS_SW, 1-LOS_All,
+            Environmental_Burden] + calc_SCH_statistics(csv_out) + \
+           [Unmanageable_Event_Count, Annual_Failures,
+            Unmanageable_Duration_95th, Unmanageable_Severity_95th,
+            calc_cost(run)]
+
+
+def collect_tradeoff_features(simulations = TRADEOFF_SIMULATIONS, runs_path = TRADEOFF_RUNS_PATH,
+                              cache_path = 'tradeoff_features', n_processes = None):
+    # one row of TRADEOFF_FEATURES per realization of each simulation
+    # (runs_path/cleaned_<run>/ampl_<realization>.csv and .log), features 
+    # of each simulation are cached (in runs_path/cache_path unless an 
+    # absolute path is given) with the size, modification time and checksum
+    # of the files they came from so only new or changed realizations are
+    # read again (files are only hashed when their size or time changed)
+    # each simulation takes about 23 min when read for the first time
+    cache_path = os.path.join(runs_path, cache_path)
+    os.makedirs(cache_path, exist_ok = True)
+    all_features = []
+    for sim_order, run in enumerate(simulations):
+        t = time.time()
+        cache_file = os.path.join(cache_path, 'tradeoff_features_' + run + '.csv')
+        cached = pd.read_csv(cache_file, dtype = {'Simulation' : str}, float_precision = 'round_trip') \
+            if os.path.exists(cache_file) else pd.DataFrame(columns = TRADEOFF_FEATURES + SIGNATURE_COLUMNS)
+        cached = cached.set_index('Realization', drop = False)
+        cached = cached.reindex(columns = TRADEOFF_FEATURES + SIGNATURE_COLUMNS)
+        
+        # pair realization files by name rather than by glob order
+        jobs = []; signatures = {}
+        for csv_filename in sorted(glob(os.path.join(runs_path, 'cleaned_' + run, 'ampl_*.csv'))):
+            realization = int(os.path.basename(csv_filename)[5:-4])
+            log_filename = csv_filename[:-4] + '.log'
+            if not os.path.exists(log_filename):
+                continue
+            stored = cached.loc[realization, SIGNATURE_COLUMNS].tolist() if realization in cached.index else None
+            signatures[realization] = file_signature(csv_filename, None if stored is None else stored[:3]) + \
+                                      file_signature(log_filename, None if stored is None else stored[3:])
+            if stored is not None and [stored[2], stored[5]] == [signatures[realization][2], signatures[realization][5]]:
+                continue
+            jobs.append((run, sim_order, realization, csv_filename, log_filename))
+        
+        if len(jobs) > 0:
+            from multiprocessing import Pool
+            with Pool(n_processes) as pool:
+                new_features = pd.DataFrame(pool.starmap(extract_realization_features, jobs), 
+                                            columns = TRADEOFF_FEATURES)
+            cached = pd.concat([cached[~cached.index.isin(new_features['Realization'])], 
+                                new_features.set_index('Realization', drop = False)])
+        
+        # drop realizations whose files were removed, keep the current
+        # signature of the others (i.e. new times of unchanged copies)
+        # and write the cache
+        cached = cached[cached.index.isin(signatures.keys())].sort_index()
+        cached[SIGNATURE_COLUMNS] = pd.DataFrame.from_dict(signatures, orient = 'index', 
+                                                           columns = SIGNATURE_COLUMNS).loc[cached.index]
+        cached['SimOrder'] = sim_order
+        cached.to_csv(cache_file, index = False)
+        all_features.append(cached[TRADEOFF_FEATURES].reset_index(drop = True).infer_objects())
+        print("Simulation ", run, ": ", len(jobs), " realizations read in ", (time.time() - t)/60, " minutes")
+    
+    return pd.concat(all_features, ignore_index = True)
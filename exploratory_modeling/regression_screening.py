@@ -0,0 +1,125 @@
+import numpy as np
+import pandas as pd
+from glob import glob
+from scipy.stats import t
+
+# REGRESSION SCREENING OF SUMMARY DATA ACROSS RUNS
+# fits simple linear models (response = intercept + slope * predictor) for
+# every response/predictor pair of summary_data columns and every run at
+# once with batched least squares, and gives bootstrap confidence bands for
+# predictions with all resamples fit in one array operation
+# (same model as TRG_OLS.py, which fits TRG offset on demand for one run)
+#
+# example:
+#   data = load_summary_data(glob('summary_data_*.csv'))
+#   fits = fit_combinations(data, rows = slice(4,326))
+#   bands = bootstrap_prediction_bands(data['summary_data_0141.csv'][4:326,0],
+#                                      data['summary_data_0141.csv'][4:326,4]/20,
+#                                      np.linspace(140,280,50))
+
+SUMMARY_DATA_VARIABLES = ['demand', 'inflow', 'OPRC', 'GW_overage', 'TRG_offset', 'penalty']
+
+
+def load_summary_data(filenames):
+    # summary data of each run, keyed by file name
+    return {f: np.loadtxt(f, delimiter=',', skiprows=1) for f in filenames}
+
+
+def design_matrix(x):
+    # add constant to predictor(s) along the last axis, (... x n) -> (... x n x 2)
+    x = np.asarray(x, dtype = np.float64)
+    return np.stack((np.ones(x.shape), x), axis = -1)
+
+
+def batched_least_squares(X, y):
+    # ordinary least squares for a stack of problems
+    #   X: (batch x n x p) design matrices, y: (batch x n) responses
+    # returns params (batch x p), residual variance (batch),
+    # parameter standard errors (batch x p) and R squared (batch)
+    X = np.asarray(X, dtype = np.float64); y = np.asarray(y, dtype = np.float64)
+    n, p = X.shape[-2:]
+    XtX = np.einsum('...ni,...nj->...ij', X, X)
+    Xty = np.einsum('...ni,...n->...i', X, y)
+    params = np.linalg.solve(XtX, Xty[...,np.newaxis])[...,0]
+
+    residuals = y - np.einsum('...ni,...i->...n', X, params)
+    sigma2 = (residuals**2).sum(axis = -1) / (n - p)
+    standard_errors = np.sqrt(sigma2[...,np.newaxis] *
+                              np.diagonal(np.linalg.inv(XtX), axis1 = -2, axis2 = -1))
+    total = ((y - y.mean(axis = -1, keepdims = True))**2).sum(axis = -1)
+    r_squared = 1 - (residuals**2).sum(axis = -1) / total
+
+    return params, sigma2, standard_errors, r_squared
+
+
+def fit_combinations(summary_data, responses = SUMMARY_DATA_VARIABLES,
+                     predictors = SUMMARY_DATA_VARIABLES, rows = slice(None)):
+    # fit every response ~ predictor pair (response != predictor) for every
+    # run in a single batched solve, summary_data is a dict of
+    # (observation x variable) arrays keyed by run as from load_summary_data
+    # and rows selects the observations used (i.e. slice(4,326) as TRG_OLS.py)
+    runs = list(summary_data.keys())
+    data = np.stack([summary_data[r][rows,:] for r in runs])
+    pairs = [(response, predictor) for response in responses
+             for predictor in predictors if response != predictor]
+    response_index = [SUMMARY_DATA_VARIABLES.index(response) for response, predictor in pairs]
+    predictor_index = [SUMMARY_DATA_VARIABLES.index(predictor) for response, predictor in pairs]
+
+    # (run x pair x observation) arrays
+    y = np.moveaxis(data[:,:,response_index], 2, 1)
+    X = design_matrix(np.moveaxis(data[:,:,predictor_index], 2, 1))
+    params, sigma2, standard_errors, r_squared = batched_least_squares(X, y)
+
+    n = data.shape[1]
+    slope_t = params[...,1] / standard_errors[...,1]
+    fits = pd.DataFrame({'Run'                 : np.repeat(runs, len(pairs)),
+                         'Response'            : [response for response, predictor in pairs] * len(runs),
+                         'Predictor'           : [predictor for response, predictor in pairs] * len(runs),
+                         'Intercept'           : params[...,0].ravel(),
+                         'Slope'               : params[...,1].ravel(),
+                         'Intercept Std Error' : standard_errors[...,0].ravel(),
+                         'Slope Std Error'     : standard_errors[...,1].ravel(),
+                         'Slope P Value'       : (2 * t.sf(np.abs(slope_t), n - 2)).ravel(),
+                         'Residual Variance'   : sigma2.ravel(),
+                         'R Squared'           : r_squared.ravel(),
+                         'Observations'        : n})
+
+    return fits
+
+
+def prediction_interval(x, y, x_new, alpha = 0.1):
+    # fitted values and t-based prediction interval for new observations,
+    # same as statsmodels wls_prediction_std used in TRG_OLS.py
+    X = design_matrix(x); X_new = design_matrix(x_new)
+    params, sigma2, standard_errors, r_squared = batched_least_squares(X, y)
+
+    XtX_inverse = np.linalg.inv(X.T @ X)
+    prediction = X_new @ params
+    prediction_std = np.sqrt(sigma2 * (1 + np.einsum('mi,ij,mj->m', X_new, XtX_inverse, X_new)))
+    t_value = t.ppf(1 - alpha / 2, len(x) - 2)
+
+    return prediction, prediction - t_value * prediction_std, prediction + t_value * prediction_std
+
+
+def bootstrap_prediction_bands(x, y, x_new, n_resamples = 5000, alpha = 0.1,
+                               seed = None):
+    # confidence band of the fitted line at x_new from pairs bootstrap,
+    # all resampled fits are solved together as one batch
+    x = np.asarray(x, dtype = np.float64); y = np.asarray(y, dtype = np.float64)
+    rng = np.random.default_rng(seed)
+    resamples = rng.integers(0, len(x), size = (n_resamples, len(x)))
+
+    params = batched_least_squares(design_matrix(x[resamples]), y[resamples])[0]
+    predictions = params @ design_matrix(x_new).T # (resample x new observation)
+    lower, median, upper = np.quantile(predictions, [alpha / 2, 0.5, 1 - alpha / 2], axis = 0)
+
+    return {'prediction' : design_matrix(x_new) @ batched_least_squares(design_matrix(x), y)[0],
+            'median' : median, 'lower' : lower, 'upper' : upper,
+            'params' : params}
+
+
+if __name__ == '__main__':
+    # screen all runs with summary data in the working directory
+    data = load_summary_data(sorted(glob('summary_data*.csv')))
+    fits = fit_combinations(data, rows = slice(4,326))
+    fits.to_csv('summary_data_regression_screening.csv', index = False)